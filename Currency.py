@@ -1,642 +1,4712 @@
-# Advanced Currency Converter with Main Menu
-
-import os
-import time
-import requests
-from datetime import datetime
-from colorama import Fore, Back, Style, init
-
-# Initialize colorama for cross-platform colored output
-init(autoreset=True)
-
-# VATcomply API Base URL
-API_BASE_URL = "https://api.vatcomply.com"
-
-def clear_screen():
-    """Clear the terminal screen based on operating system"""
-    os.system('cls' if os.name == 'nt' else 'clear')
-
-def print_header(show_dollar=True):
-    """Print the application header with optional dollar bill ASCII art"""
-    clear_screen()
-    
-    # Dollar Bill ASCII Art Banner with green color
-    if show_dollar:
-        print(Fore.GREEN + r"""
-||====================================================================||
-||//$\\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\//$\\||
-||(100)==================| FEDERAL RESERVE NOTE |================(100)||
-||\\$//        ~         '------========--------'                \\$//||
-||<< /        /$\              // ____ \\                         \ >>||
-||>>|  12    //L\\            // ///..) \\         L38036133B   12 |<<||
-||<<|        \\ //           || <||  >\  ||                        |>>||
-||>>|         \$/            ||  $$ --/  ||        One Hundred     |<<||
-||<<|      L38036133B        *\\  |\_/  //* series                 |>>||
-||>>|  12                     *\\/___\_//*   1989                  |<<||
-||<<\      Treasurer     ______/Franklin\________     Secretary 12 />>||
-||//$\                 ~|UNITED STATES OF AMERICA|~               /$\\||
-||(100)===================  ONE HUNDRED DOLLARS =================(100)||
-||\\$//\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\\$//||
-||====================================================================||""")
-    
-    # Application title
-    print(Fore.CYAN + Back.BLACK + Style.BRIGHT + "\n" + "=" * 60)
-    print(Fore.CYAN + Back.BLACK + Style.BRIGHT + "                 CURRENCY CONVERTER v1.0                 ")
-    print(Fore.CYAN + Back.BLACK + Style.BRIGHT + "=" * 60 + "\n")
-
-def get_exchange_rates():
-    """Fetch current exchange rates from VATcomply API"""
-    try:
-        print(Fore.YELLOW + "Connecting to VATcomply API...")
-        response = requests.get(f"{API_BASE_URL}/rates", timeout=10)
-        response.raise_for_status()  # Raise exception for HTTP errors
-        data = response.json()
-        
-        # Extract rates and date
-        rates = data.get('rates', {})
-        # Add USD (base currency) which is not included in the response
-        rates['USD'] = 1.0
-        date = data.get('date')
-        
-        # Debug output
-        print(Fore.YELLOW + f"API returned {len(rates)} currencies")
-        
-        # Check if we're getting expected number of currencies
-        if len(rates) < 50:
-            print(Fore.YELLOW + "Fetching additional currencies...")
-            
-            # Get all available currencies from the currencies endpoint
-            currencies_response = requests.get(f"{API_BASE_URL}/currencies", timeout=10)
-            currencies_response.raise_for_status()
-            currencies_data = currencies_response.json()
-            
-            # For currencies not in rates but available in the API, add them with estimates
-            base_currency = data.get('base', 'EUR')
-            base_rate = rates.get(base_currency, 1.0)
-            
-            # Get individual currency rates if needed
-            for code in currencies_data:
-                if code not in rates and code != base_currency:
-                    try:
-                        # Try to get rate for this specific currency
-                        curr_response = requests.get(f"{API_BASE_URL}/rates?base={base_currency}&symbols={code}", timeout=5)
-                        if curr_response.status_code == 200:
-                            curr_data = curr_response.json()
-                            if 'rates' in curr_data and code in curr_data['rates']:
-                                rates[code] = curr_data['rates'][code]
-                    except Exception:
-                        pass  # Skip if we can't get this currency
-        
-        return True, rates, date
-    except (requests.RequestException, ValueError, KeyError) as e:
-        return False, str(e), None
-
-def get_user_location():
-    """Get user's location to suggest local currency"""
-    try:
-        response = requests.get(f"{API_BASE_URL}/geolocate", timeout=10)
-        response.raise_for_status()
-        data = response.json()
-        country = data.get('country', {})
-        country_name = country.get('name', 'Unknown')
-        currency_code = country.get('currency', 'USD')
-        return True, currency_code, country_name
-    except (requests.RequestException, ValueError, KeyError):
-        return False, 'USD', 'Unknown'
-
-def get_fallback_rates():
-    """Return static fallback exchange rates if API fails"""
-    return {
-        # Major currencies
-        "USD": 1.00,    # US Dollar
-        "EUR": 0.94,    # Euro
-        "GBP": 0.82,    # British Pound
-        "JPY": 149.30,  # Japanese Yen
-        "CNY": 7.23,    # Chinese Yuan
-        "AUD": 1.55,    # Australian Dollar
-        "CAD": 1.38,    # Canadian Dollar
-        "CHF": 0.89,    # Swiss Franc
-        "HKD": 7.82,    # Hong Kong Dollar
-        "SGD": 1.36,    # Singapore Dollar
-        
-        # Europe
-        "SEK": 10.71,   # Swedish Krona
-        "NOK": 10.80,   # Norwegian Krone
-        "DKK": 7.01,    # Danish Krone
-        "PLN": 4.03,    # Polish Zloty
-        "CZK": 23.45,   # Czech Koruna
-        "HUF": 358.80,  # Hungarian Forint
-        "RON": 4.68,    # Romanian Leu
-        "BGN": 1.84,    # Bulgarian Lev
-        "ISK": 138.50,  # Icelandic Krona
-        "RUB": 92.50,   # Russian Ruble
-        
-        # Americas
-        "MXN": 17.03,   # Mexican Peso
-        "BRL": 5.15,    # Brazilian Real
-        "ARS": 870.0,   # Argentine Peso
-        "COP": 3950.0,  # Colombian Peso
-        "CLP": 927.0,   # Chilean Peso
-        "PEN": 3.70,    # Peruvian Sol
-        
-        # Asia
-        "INR": 83.39,   # Indian Rupee
-        "KRW": 1345.0,  # South Korean Won
-        "IDR": 15680.0, # Indonesian Rupiah
-        "MYR": 4.72,    # Malaysian Ringgit
-        "THB": 36.14,   # Thai Baht
-        "PHP": 56.70,   # Philippine Peso
-        "PKR": 278.50,  # Pakistani Rupee
-        "BDT": 109.50,  # Bangladeshi Taka
-        "VND": 24890.0, # Vietnamese Dong
-        "ILS": 3.70,    # Israeli Shekel
-        
-        # Africa & Middle East
-        "ZAR": 18.94,   # South African Rand
-        "EGP": 46.80,   # Egyptian Pound
-        "NGN": 1420.0,  # Nigerian Naira
-        "KES": 129.50,  # Kenyan Shilling
-        "SAR": 3.75,    # Saudi Riyal
-        "AED": 3.67,    # UAE Dirham
-        "QAR": 3.64,    # Qatari Riyal
-        "TRY": 32.17,   # Turkish Lira
-        
-        # Oceania
-        "NZD": 1.67,    # New Zealand Dollar
-        "FJD": 2.27,    # Fijian Dollar
-    }
-
-def get_currency_info():
-    """Get full currency information from the API"""
-    try:
-        response = requests.get(f"{API_BASE_URL}/currencies", timeout=10)
-        response.raise_for_status()
-        currencies = response.json()
-        return True, currencies
-    except (requests.RequestException, ValueError, KeyError) as e:
-        return False, str(e)
-
-def get_all_currency_symbols():
-    """Return a comprehensive dictionary of currency symbols"""
-    return {
-        # Major currencies
-        "USD": "$",
-        "EUR": "€",
-        "GBP": "£",
-        "JPY": "¥",
-        "CNY": "¥",
-        "AUD": "A$",
-        "CAD": "C$",
-        "CHF": "Fr",
-        "HKD": "HK$",
-        "SGD": "S$",
-        
-        # Europe
-        "SEK": "kr",
-        "NOK": "kr",
-        "DKK": "kr",
-        "PLN": "zł",
-        "CZK": "Kč",
-        "HUF": "Ft",
-        "RON": "lei",
-        "BGN": "лв",
-        "ISK": "kr",
-        "RUB": "₽",
-        "UAH": "₴",
-        "HRK": "kn",
-        "RSD": "din",
-        "MKD": "ден",
-        "ALL": "L",
-        "MDL": "L",
-        "BAM": "KM",
-        
-        # Americas
-        "MXN": "$",
-        "BRL": "R$",
-        "ARS": "$",
-        "COP": "$",
-        "CLP": "$",
-        "PEN": "S/",
-        "UYU": "$",
-        "BOB": "Bs",
-        "VES": "Bs",
-        "PYG": "₲",
-        "GTQ": "Q",
-        "HNL": "L",
-        "NIO": "C$",
-        "CRC": "₡",
-        "PAB": "B/",
-        "DOP": "RD$",
-        "JMD": "J$",
-        "TTD": "TT$",
-        "BMD": "$",
-        "BBD": "$",
-        
-        # Asia
-        "INR": "₹",
-        "KRW": "₩",
-        "IDR": "Rp",
-        "MYR": "RM",
-        "THB": "฿",
-        "PHP": "₱",
-        "PKR": "₨",
-        "BDT": "৳",
-        "VND": "₫",
-        "ILS": "₪",
-        "TWD": "NT$",
-        "LKR": "Rs",
-        "NPR": "₨",
-        "MMK": "K",
-        "KHR": "៛",
-        "MNT": "₮",
-        "KZT": "₸",
-        "UZS": "so'm",
-        "KGS": "сом",
-        
-        # Africa & Middle East
-        "ZAR": "R",
-        "EGP": "E£",
-        "NGN": "₦",
-        "KES": "KSh",
-        "SAR": "﷼",
-        "AED": "د.إ",
-        "QAR": "﷼",
-        "TRY": "₺",
-        "MAD": "د.م.",
-        "TND": "د.ت",
-        "GHS": "₵",
-        "UGX": "USh",
-        "TZS": "TSh",
-        "ETB": "Br",
-        "ZMW": "ZK",
-        "BHD": ".د.ب",
-        "KWD": "د.ك",
-        "IQD": "ع.د",
-        "JOD": "د.ا",
-        "OMR": "ر.ع.",
-        
-        # Oceania
-        "NZD": "NZ$",
-        "FJD": "FJ$",
-        "PGK": "K",
-        "SBD": "SI$",
-        "WST": "WS$",
-        "TOP": "T$",
-        "VUV": "VT",
-        
-        # Cryptocurrencies
-        "BTC": "₿",
-        "ETH": "Ξ",
-        "LTC": "Ł",
-        "XRP": "XRP",
-        "BCH": "BCH",
-        "XMR": "ɱ",
-        "USDT": "₮",
-        "USDC": "USDC",
-        "DAI": "DAI",
-    }
-
-def categorize_currencies(currencies_dict, rates):
-    """Categorize currencies into regions based on ISO codes and available data"""
-    # Define regions with their known currencies
-    regions = {
-        "Major Currencies": ["USD", "EUR", "GBP", "JPY", "CNY", "AUD", "CAD", "CHF", "HKD", "SGD"],
-        "Europe": ["SEK", "NOK", "DKK", "PLN", "CZK", "HUF", "RON", "BGN", "ISK", "RUB", "UAH", "HRK", 
-                  "RSD", "MKD", "ALL", "MDL", "BAM", "BYN"],
-        "Americas": ["MXN", "BRL", "ARS", "COP", "CLP", "PEN", "UYU", "BOB", "VES", "PYG", "GTQ", 
-                    "HNL", "NIO", "CRC", "PAB", "DOP", "JMD", "TTD", "BMD", "BBD"],
-        "Asia": ["INR", "KRW", "IDR", "MYR", "THB", "PHP", "PKR", "BDT", "VND", "ILS", "TWD", "LKR", 
-                "NPR", "MMK", "KHR", "MNT", "KZT", "UZS", "KGS", "TJS", "AFN", "MVR"],
-        "Africa & Middle East": ["ZAR", "EGP", "NGN", "KES", "SAR", "AED", "QAR", "TRY", "MAD", "TND", 
-                               "GHS", "UGX", "TZS", "ETB", "ZMW", "BHD", "KWD", "IQD", "JOD", "OMR", 
-                               "LBP", "DZD", "LYD", "SDG", "XOF", "XAF"],
-        "Oceania": ["NZD", "FJD", "PGK", "SBD", "WST", "TOP", "VUV"],
-        "Cryptocurrencies": ["BTC", "ETH", "LTC", "XRP", "BCH", "XMR", "USDT", "USDC", "DAI"]
-    }
-    
-    # Create a flattened set of all known categorized currencies
-    all_categorized = set()
-    for currencies in regions.values():
-        all_categorized.update(currencies)
-    
-    # Get the list of available currencies from rates
-    available_currencies = set(rates.keys())
-    
-    # Create a "Others" region for uncategorized currencies
-    others = available_currencies - all_categorized
-    if others:
-        regions["Others"] = sorted(list(others))
-    
-    # Filter regions to only include available currencies
-    filtered_regions = {}
-    for region, currencies in regions.items():
-        available = [c for c in currencies if c in available_currencies]
-        if available:
-            filtered_regions[region] = available
-    
-    return filtered_regions
-
-def display_main_menu(user_currency=None, country=None):
-    """Display the main menu of the application"""
-    print_header(show_dollar=False)
-    
-    location_info = f" - Location: {country} [{user_currency}]" if user_currency else ""
-    print(Fore.YELLOW + Style.BRIGHT + f"MAIN MENU{location_info}\n")
-    
-    # Menu options
-    print(Fore.WHITE + " 1. " + Fore.CYAN + "Convert Currency")
-    print(Fore.WHITE + " 2. " + Fore.CYAN + "View All Available Currencies")
-    print(Fore.WHITE + " 3. " + Fore.CYAN + "Check Exchange Rate")
-    print(Fore.WHITE + " 4. " + Fore.CYAN + "Help")
-    print(Fore.WHITE + " 0. " + Fore.RED + "Exit")
-    
-    print(Fore.CYAN + "\n" + "=" * 60)
-    
-    # Get user choice
-    while True:
-        try:
-            choice = input(Fore.YELLOW + "\nEnter your choice (0-4): " + Style.BRIGHT)
-            if choice in ['0', '1', '2', '3', '4']:
-                return choice
-            print(Fore.RED + "Invalid option. Please enter a number between 0 and 4.")
-        except Exception:
-            print(Fore.RED + "Invalid input. Please try again.")
-
-def display_currencies(rates, symbols, regions):
-    """Display available currencies with colors by region"""
-    print_header(show_dollar=False)
-    print(Fore.YELLOW + Style.BRIGHT + "🌍 AVAILABLE CURRENCIES\n")
-    
-    # Display currencies by region with different colors for each region
-    region_colors = [Fore.CYAN, Fore.GREEN, Fore.MAGENTA, Fore.RED, Fore.YELLOW, Fore.BLUE, Fore.WHITE]
-    
-    # Calculate total available currencies
-    total_count = len(rates)
-    
-    # Display number of currencies at the top
-    print(Fore.WHITE + f"Total currencies available: {Fore.GREEN}{total_count}")
-    print(Fore.WHITE + f"All currencies: {Fore.CYAN}{', '.join(sorted(rates.keys()))}")
-    print()
-    
-    for i, (region, currencies) in enumerate(regions.items()):
-        color = region_colors[i % len(region_colors)]
-        print(f"{color}{Style.BRIGHT}{region} ({len(currencies)}):{Style.RESET_ALL}")
-        
-        # Create display strings with symbols
-        currency_display = []
-        for code in currencies:
-            symbol = symbols.get(code, '')
-            name = code  # Default to code if we don't have currency info
-            currency_display.append(f"{code} {symbol}")
-        
-        # Display in columns with consistent formatting
-        for j in range(0, len(currency_display), 6):
-            row = currency_display[j:j+6]
-            print("  " + "  ".join(f"{color}{c:<10}" for c in row))
-        print()
-    
-    # Wait for user input before returning to main menu
-    input(Fore.YELLOW + "\nPress Enter to return to the main menu...")
-
-def check_exchange_rate(rates, symbols, default_currency):
-    """Check exchange rate between two currencies"""
-    print_header(show_dollar=False)
-    print(Fore.YELLOW + Style.BRIGHT + "💱 EXCHANGE RATE CHECKER\n")
-    
-    print(Fore.CYAN + "Enter the currency codes to check the exchange rate between them.")
-    print(Fore.CYAN + "Available currencies: " + Fore.WHITE + ", ".join(sorted(rates.keys())))
-    
-    # Get base currency
-    base_currency = input(f"\n{Fore.CYAN}Base currency {Fore.YELLOW}(default: {default_currency}): {Style.BRIGHT}").upper() or default_currency
-    if base_currency not in rates:
-        print(f"\n{Fore.RED}❌ Error: {base_currency} is not supported.")
-        input(Fore.YELLOW + "\nPress Enter to return to the main menu...")
-        return
-    
-    # Get target currencies (comma-separated)
-    target_input = input(f"{Fore.CYAN}Target currency/currencies (comma separated): {Style.BRIGHT}").upper()
-    target_currencies = [c.strip() for c in target_input.split(",")]
-    
-    print(f"\n{Fore.YELLOW}Exchange rates for {Fore.GREEN}{Style.BRIGHT}1 {base_currency} {symbols.get(base_currency, '')}:")
-    
-    for target in target_currencies:
-        if target not in rates:
-            print(f"{Fore.RED}❌ {target}: Not supported")
-            continue
-        
-        # Calculate rate
-        rate = rates[target] / rates[base_currency]
-        print(f"{Fore.WHITE}→ {Fore.GREEN}{rate:.4f} {target} {symbols.get(target, '')}")
-    
-    input(Fore.YELLOW + "\nPress Enter to return to the main menu...")
-
-def show_help():
-    """Display help information"""
-    print_header(show_dollar=False)
-    print(Fore.YELLOW + Style.BRIGHT + "ℹ️ HELP INFORMATION\n")
-    
-    print(Fore.CYAN + "ABOUT THIS APPLICATION")
-    print(Fore.WHITE + "This Currency Converter allows you to convert between 50+ currencies using")
-    print(Fore.WHITE + "real-time exchange rates fetched from the VATcomply API.")
-    
-    print(Fore.CYAN + "\nFEATURES")
-    print(Fore.WHITE + "• Convert between many world currencies")
-    print(Fore.WHITE + "• View up-to-date exchange rates")
-    print(Fore.WHITE + "• Automatic location detection")
-    print(Fore.WHITE + "• Colorful and easy-to-use interface")
-    
-    print(Fore.CYAN + "\nHOW TO USE")
-    print(Fore.WHITE + "1. From the main menu, select the option you want")
-    print(Fore.WHITE + "2. For currency conversion, enter the source currency, amount, and target currency")
-    print(Fore.WHITE + "3. For checking rates, specify which currencies you want to compare")
-    
-    print(Fore.CYAN + "\nCURRENCY CODES")
-    print(Fore.WHITE + "Use standard 3-letter currency codes (e.g., USD, EUR, GBP, JPY)")
-    
-    print(Fore.CYAN + "\nDATA SOURCE")
-    print(Fore.WHITE + "Exchange rates are provided by VATcomply API (https://www.vatcomply.com)")
-    
-    input(Fore.YELLOW + "\nPress Enter to return to the main menu...")
-
-def convert_currency(rates, symbols, suggested_currency):
-    """Handle currency conversion workflow"""
-    print_header()
-    print(Fore.YELLOW + Style.BRIGHT + "💱 CURRENCY CONVERSION\n")
-    
-    # Help text
-    print(Fore.WHITE + "Tip: Enter the 3-letter currency code (e.g., USD, EUR, JPY)")
-    
-    # Get source currency with suggestion based on location
-    suggestion = f"(default: {suggested_currency})" if suggested_currency else "(default: USD)"
-    source_currency = input(Fore.CYAN + "Enter source currency " + Fore.YELLOW + f"{suggestion}: " + Style.BRIGHT).upper() or suggested_currency or "USD"
-    
-    if source_currency not in rates:
-        print(f"\n{Fore.RED}❌ Error: {source_currency} is not supported.")
-        input(Fore.YELLOW + "\nPress Enter to return to the main menu...")
-        return
-    
-    try:
-        amount_prompt = f"Enter amount in {source_currency} {symbols.get(source_currency, '')}: "
-        amount = float(input(Fore.CYAN + amount_prompt + Style.BRIGHT))
-        if amount < 0:
-            print(f"\n{Fore.RED}❌ Error: Amount cannot be negative.")
-            input(Fore.YELLOW + "\nPress Enter to return to the main menu...")
-            return
-    except ValueError:
-        print(f"\n{Fore.RED}❌ Error: Please enter a valid number.")
-        input(Fore.YELLOW + "\nPress Enter to return to the main menu...")
-        return
-    
-    # Get target currency
-    target_currency = input(Fore.CYAN + "Enter target currency: " + Style.BRIGHT).upper()
-    if target_currency not in rates:
-        print(f"\n{Fore.RED}❌ Error: {target_currency} is not supported.")
-        input(Fore.YELLOW + "\nPress Enter to return to the main menu...")
-        return
-    
-    # Convert to USD first if not already USD (because VATcomply rates are based on EUR)
-    usd_amount = amount / rates[source_currency] if source_currency != "USD" else amount
-    
-    # Convert from USD to target currency
-    converted_amount = usd_amount * rates[target_currency]
-    
-    # Display result with colors and formatting
-    display_conversion_result(source_currency, amount, target_currency, converted_amount, rates, symbols)
-    
-    input(Fore.YELLOW + "\nPress Enter to return to the main menu...")
-
-def display_conversion_result(source_currency, amount, target_currency, converted_amount, rates, symbols):
-    """Display the conversion result with formatting and colors"""
-    print(Fore.CYAN + "\n" + "=" * 60)
-    
-    # Result box with blue background
-    print(Fore.WHITE + Back.BLUE + """
-    ╔═══════════════════════════════════════════════════════╗
-    ║                   CONVERSION RESULT                    ║
-    ╚═══════════════════════════════════════════════════════╝
-    """ + Style.RESET_ALL)
-    
-    source_symbol = symbols.get(source_currency, '')
-    target_symbol = symbols.get(target_currency, '')
-    
-    # Result with bright green color for the amounts
-    print(Fore.WHITE + f"      {Fore.GREEN}{Style.BRIGHT}{amount:.2f} {source_currency} {source_symbol}{Fore.WHITE} = ", end="")
-    print(f"{Fore.GREEN}{Style.BRIGHT}{converted_amount:.2f} {target_currency} {target_symbol}")
-    print(Fore.WHITE + f"      Rate: 1 {source_currency} = {Fore.YELLOW}{rates[target_currency]/rates[source_currency]:.4f} {target_currency}")
-    
-    print(Fore.CYAN + "\n" + "=" * 60)
-
-def fetch_all_available_currencies():
-    """Fetch all available currencies from VATcomply API, regardless of having rates"""
-    try:
-        print(Fore.YELLOW + "Fetching complete currency list...")
-        # First get currencies list
-        currencies_response = requests.get(f"{API_BASE_URL}/currencies", timeout=10)
-        currencies_response.raise_for_status()
-        currencies_data = currencies_response.json()
-        
-        # Then get rates
-        rates_response = requests.get(f"{API_BASE_URL}/rates", timeout=10)
-        rates_response.raise_for_status()
-        rates_data = rates_response.json()
-        rates = rates_data.get('rates', {})
-        rates['USD'] = 1.0  # Add USD as base
-        
-        # Create empty rates for currencies that don't have exchange rates yet
-        for code in currencies_data:
-            if code not in rates:
-                rates[code] = 0.0  # Placeholder
-                
-        return True, rates, rates_data.get('date')
-    except Exception as e:
-        return False, str(e), None
-    
-def main():
-    """Main function with menu-driven interface and complete currency support"""
-    # Display the startup splash screen
-    print_header()
-    
-    # Small delay for dramatic effect
-    time.sleep(0.5)
-    
-    # First try to fetch ALL available currencies
-    print(Fore.YELLOW + "Fetching ALL available currencies...")
-    all_success, all_rates, all_date = fetch_all_available_currencies()
-    
-    # If that worked, use it, otherwise fall back to regular method
-    if all_success and len(all_rates) > 31:
-        rates = all_rates
-        date = all_date
-        print(Fore.GREEN + f"✓ Complete currency list loaded with {len(rates)} currencies")
-    else:
-        # Fall back to regular exchange rates
-        print(Fore.YELLOW + "Fetching standard exchange rates...")
-        success, rates_data, date = get_exchange_rates()
-        
-        if success:
-            rates = rates_data
-        else:
-            rates = get_fallback_rates()
-            print(Fore.RED + f"✗ Couldn't fetch live rates: {rates_data}")
-            print(Fore.YELLOW + "Using stored rates as fallback")
-            date = None
-    
-    print(Fore.GREEN + f"✓ {len(rates)} currencies available as of {date}")
-    
-    # Get user location for currency suggestion
-    location_success, suggested_currency, country = get_user_location()
-    if location_success:
-        print(Fore.GREEN + f"✓ Detected location: {country} [{suggested_currency}]")
-    else:
-        suggested_currency = "USD"
-        country = "Unknown"
-        print(Fore.YELLOW + "Could not detect location. Using USD as default.")
-    
-    # Try to get detailed currency information
-    print(Fore.YELLOW + "Loading currency information...")
-    
-    # Get comprehensive currency symbols
-    symbols = get_all_currency_symbols()
-    
-    # Categorize currencies by region
-    regions = categorize_currencies({}, rates)
-    
-    # Small delay before showing menu
-    time.sleep(1)
-    
-    # Main application loop
-    while True:
-        choice = display_main_menu(suggested_currency, country)
-        
-        if choice == '0':  # Exit
-            clear_screen()
-            print(Fore.GREEN + Style.BRIGHT + """
-Thank you for using Currency Converter!
-      .--.
-     /.-. '----------.
-     \'-' .--"--""-"-'
-      '--'
-            """)
-            break
-            
-        elif choice == '1':  # Convert Currency
-            convert_currency(rates, symbols, suggested_currency)
-            
-        elif choice == '2':  # View Available Currencies
-            display_currencies(rates, symbols, regions)
-            
-        elif choice == '3':  # Check Exchange Rate
-            check_exchange_rate(rates, symbols, suggested_currency)
-            
-        elif choice == '4':  # Help
-            show_help()
-
-if __name__ == "__main__":
-    try:
-        main()
-    except KeyboardInterrupt:
-        clear_screen()
-        print(Fore.YELLOW + "\nProgram terminated by user. Goodbye!")
-    except Exception as e:
-
-        print(Fore.RED + f"\nAn unexpected error occurred: {e}")
+# Advanced Currency Converter with Main Menu
+
+import os
+import argparse
+import atexit
+import bisect
+import builtins
+import contextlib
+import csv
+import decimal
+import functools
+import gzip
+import importlib
+import inspect
+import io
+import itertools
+import json
+import math
+import mmap
+import random
+import struct
+import sys
+import tempfile
+import threading
+import time
+import unicodedata
+import zlib
+from collections import deque, namedtuple
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, as_completed
+from concurrent.futures import wait as wait_futures
+from datetime import datetime, timedelta
+from fractions import Fraction
+from types import MappingProxyType
+from urllib.parse import parse_qs, urlencode, urljoin, urlsplit
+
+class LazyImport:
+    """Stand-in for a module-level name that imports the real object on first attribute access"""
+    
+    def __init__(self, name, loader):
+        self._name = name
+        self._loader = loader
+    
+    def __getattr__(self, attribute):
+        with _import_lock:
+            if globals()[self._name] is self:
+                self._loader()
+        return getattr(globals()[self._name], attribute)
+
+def lazy_module(name, module=None):
+    """Bind a module name (optionally for a dotted submodule) that is imported the first time anything on it is used"""
+    return LazyImport(name, lambda: globals().__setitem__(name, importlib.import_module(module or name)))
+
+def load_colorama():
+    """Import colorama and initialize it for cross-platform colored output on first use of a color"""
+    import colorama
+    colorama.init(autoreset=True)
+    globals().update(Fore=colorama.Fore, Back=colorama.Back, Style=colorama.Style)
+
+# Heavy modules load on first use, so one-shot commands only pay for what they touch
+_import_lock = threading.RLock()
+requests = lazy_module("requests")
+asyncio = lazy_module("asyncio")
+statistics = lazy_module("statistics")
+subprocess = lazy_module("subprocess")
+timeit = lazy_module("timeit")
+multiprocessing = lazy_module("multiprocessing")
+shared_memory = lazy_module("shared_memory", "multiprocessing.shared_memory")
+process_pool = lazy_module("process_pool", "concurrent.futures.process")
+ssl = lazy_module("ssl")
+Fore = LazyImport("Fore", load_colorama)
+Back = LazyImport("Back", load_colorama)
+Style = LazyImport("Style", load_colorama)
+
+# Screen clearing with ANSI escapes: erase the display, then home the cursor
+CLEAR_SEQUENCE = "\x1b[2J\x1b[H"
+
+# Rendered screens cached by the identity of the immutable rate set they show
+_screen_cache = {}
+
+# VATcomply API Base URL
+API_BASE_URL = os.environ.get("CURRENCY_API_URL", "https://api.vatcomply.com")
+
+# ISO 4217 minor unit exponents that differ from the usual 2 decimal places
+CURRENCY_EXPONENTS = {
+    "BIF": 0, "CLP": 0, "DJF": 0, "GNF": 0, "ISK": 0, "JPY": 0, "KMF": 0, "KRW": 0, "PYG": 0,
+    "RWF": 0, "UGX": 0, "UYI": 0, "VND": 0, "VUV": 0, "XAF": 0, "XOF": 0, "XPF": 0,
+    "BHD": 3, "IQD": 3, "JOD": 3, "KWD": 3, "LYD": 3, "OMR": 3, "TND": 3,
+    "CLF": 4, "UYW": 4,
+}
+
+# Minor-unit rates are integer fractions whose numerator × denominator fits int64, so every row of a
+# batch can be worked out with int64 operations; a quoted rate stays exact, a derived one is rounded
+INT64_MAX = (1 << 63) - 1
+MINOR_BATCH_BLOCK = 16384  # Rows per block in the batched fixed-point path
+
+# Rate graph: cost of a hop over a live quote and over a stored fallback quote, so stored rates only fill gaps
+ROUTE_LIVE_COST = 1
+ROUTE_STORED_COST = 10
+
+# Historical backfill: concurrent workers, requests per second and days per bulk write
+BACKFILL_WORKERS = 8
+BACKFILL_RATE_LIMIT = 20
+BACKFILL_FLUSH_DAYS = 64
+
+# HTTP conversion service
+SERVICE_PORT = 8080
+SERVICE_MAX_BODY = 8 * 1024 * 1024
+SERVICE_SCALAR_ITEMS = 16
+SERVICE_PATHS = ("/convert", "/rate", "/rates", "/metrics")
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4"
+HTTP_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 413: "Payload Too Large",
+                422: "Unprocessable Entity", 500: "Internal Server Error"}
+
+# Rates shared between worker processes: segment name, layout version and how often workers look for updates
+SHARED_RATES_NAME = os.environ.get("CURRENCY_SHARED_NAME", "currency-rates")
+SHARED_RATES_MAGIC = b"CCSNAP\0\0"
+SHARED_RATES_VERSION = 2
+SHARED_HEADER = struct.Struct("<8sIIQd16s8sII")
+SHARED_ROUTED = 1  # Header flag: the routing graph's cost, rate and via matrices follow the cross-rate matrix
+SHARED_CONTROL = struct.Struct("<8sI4xQ")
+SHARED_ATTACH_ATTEMPTS = 5
+SHARED_POLL_INTERVAL = 1.0
+
+# Shared memory segments created by this process
+_published_segments = set()
+
+# Benchmark suite
+BENCH_SIZES = (1000, 100000, 1000000)
+BENCH_THRESHOLD = 0.10
+BENCH_DATE = "2024-01-02"
+BENCH_VERSION = 1
+BENCH_PIPELINE_ROWS = 500000
+BENCH_REPORT_CURRENCIES = ("USD", "EUR", "GBP", "JPY", "CHF")
+BENCH_MOVED_RATES = 3  # Rates changed between the two snapshots a portfolio alternates between
+
+# Records per chunk in the streaming conversion pipeline
+PIPELINE_CHUNK_SIZE = 65536
+
+# Sharded pipeline: the largest byte range one worker converts at a time, and shards per worker for load balancing
+PIPELINE_SHARD_SIZE = 32 * 1024 * 1024
+PIPELINE_SHARDS_PER_WORKER = 4
+
+# Settings a sharded pipeline worker received from its initializer
+_shard_worker = {}
+
+# Overall network budget for startup, in seconds
+STARTUP_DEADLINE = 15
+
+# Worker pool size for concurrent per-symbol rate lookups
+SYMBOL_FETCH_WORKERS = 8
+
+# Local rate snapshot cache; VATcomply rates only change once a day
+CACHE_DIR = os.environ.get("CURRENCY_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".currency_converter"))
+CACHE_FILE = os.path.join(CACHE_DIR, "rates.json.gz")
+CACHE_TTL = int(os.environ.get("CURRENCY_CACHE_TTL", 6 * 60 * 60))  # Seconds
+CACHE_VERSION = 2
+
+# Currency search: results per query, and how misspelled a word may be
+SEARCH_LIMIT = 8
+SEARCH_MAX_EDITS = 2
+SEARCH_FUZZY_MIN_LENGTH = 4
+
+# Seconds between background checks for new rates; 0 disables refreshing
+REFRESH_INTERVAL = float(os.environ.get("CURRENCY_REFRESH_INTERVAL", 15 * 60))
+
+# Memory-mapped historical rate store
+HISTORY_FILE = os.path.join(CACHE_DIR, "history.bin")
+HISTORY_MAGIC = b"CCHIST\0\0"
+HISTORY_VERSION = 1
+EPOCH_ORDINAL = 719163  # date(1970, 1, 1).toordinal(), for numpy datetime64 days
+
+# HTTP client tuning for all VATcomply calls
+API_POOL_CONNECTIONS = 4
+API_POOL_MAXSIZE = SYMBOL_FETCH_WORKERS
+API_MAX_RETRIES = 3
+API_BACKOFF_BASE = 0.25  # Seconds, doubled on every retry
+API_BACKOFF_MAX = 4.0
+API_MAX_REDIRECTS = 10
+API_TIMEOUTS = {"/rates": 10, "/currencies": 10, "/geolocate": 10}
+API_DEFAULT_TIMEOUT = 10
+
+# Outbound API requests per second across the whole process, and how many may go out back to back (0 disables)
+API_RATE_LIMIT = float(os.environ.get("CURRENCY_API_RATE_LIMIT", 50))
+API_RATE_BURST = 20
+
+# Shared API client, created on first use
+_api_client = None
+
+# Async API clients by event loop, since their connections cannot outlive the loop that opened them
+_async_clients = {}
+
+# Process-wide request limiter, created on first use
+_api_bucket = None
+
+# Recorded API cassettes: layout version and the response headers worth keeping
+CASSETTE_VERSION = 1
+CASSETTE_HEADERS = ("etag", "last-modified", "content-type", "cache-control")
+
+# (cassette, mode, faults) when API traffic is being recorded or replayed
+_api_cassette = None
+
+# Circuit breaker: failed requests in a row that trip it, and seconds the API is then left alone (0 disables)
+BREAKER_FILE = os.path.join(CACHE_DIR, "breaker.json")
+BREAKER_THRESHOLD = 3
+BREAKER_COOLDOWN = float(os.environ.get("CURRENCY_BREAKER_COOLDOWN", 300))
+
+# Circuit breakers by API base URL, created on first use
+_breakers = {}
+
+# Rate providers: how long to wait on one before hedging with the next, and how failures demote it
+PROVIDER_TIMEOUT = 12
+PROVIDER_HEDGE_PERCENTILE = 0.95
+PROVIDER_HEDGE_DEFAULT = 0.5
+PROVIDER_HEDGE_MIN = 0.05
+PROVIDER_HEDGE_MAX = 2.0
+PROVIDER_HEALTH_WINDOW = 50
+PROVIDER_MIN_SAMPLES = 3
+PROVIDER_FAILURE_PENALTY = PROVIDER_TIMEOUT  # Seconds a failed call is assumed to cost, however fast it failed
+
+# Shared provider pool, created on first use
+_provider_pool = None
+
+# Metrics; CURRENCY_METRICS=0 leaves every instrumented function unwrapped
+METRICS_ENABLED = os.environ.get("CURRENCY_METRICS", "1") != "0"
+METRICS_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+METRIC_HELP = {
+    "currency_api_request_seconds": "Latency of each API request attempt by endpoint",
+    "currency_api_errors_total": "API requests that failed or returned an HTTP error",
+    "currency_api_timeouts_total": "API requests that timed out",
+    "currency_api_retries_total": "API requests retried after a failure",
+    "currency_api_coalesced_total": "API calls answered by an identical request already in flight",
+    "currency_api_throttled_total": "API requests delayed by the process-wide rate limit",
+    "currency_api_throttle_seconds_total": "Time API requests spent waiting for the process-wide rate limit",
+    "currency_api_short_circuits_total": "API requests skipped because the circuit breaker was open",
+    "currency_breaker_open": "Whether the circuit breaker for an API is open (1) or closed (0)",
+    "currency_faults_injected_total": "Faults injected into replayed API responses, by kind",
+    "currency_symbol_fetch_seconds": "Time spent fetching rates for individual currency symbols",
+    "currency_symbol_fetch_calls_total": "Requests made while fetching individual currency symbols",
+    "currency_cache_lookups_total": "Rate snapshot loads by cache outcome",
+    "currency_conversions_total": "Amounts converted by kind",
+    "currency_errors_total": "Handled exceptions by location and type",
+    "currency_startup_phase_seconds": "Duration of each startup phase in the last run",
+    "currency_service_request_seconds": "Time the conversion service spent handling each request",
+    "currency_provider_seconds": "Time each rate provider took to answer a snapshot fetch",
+    "currency_provider_requests_total": "Snapshot fetches by provider and outcome",
+    "currency_shared_generation": "Generation of the rate snapshot last published to shared memory",
+    "currency_provider_hedges_total": "Snapshot fetches raced against a second provider because the first was slow",
+    "currency_uptime_seconds": "Seconds since the process started",
+    "currency_cache_hit_ratio": "Share of snapshot loads answered by a fresh or revalidated cache",
+    "currency_conversions_per_second": "Average conversions per second since start",
+}
+
+class NoColor:
+    """Stand-in for colorama's Fore, Back and Style where every color is an empty string"""
+    
+    def __getattr__(self, name):
+        return ""
+
+NO_COLOR = NoColor()
+
+def disable_color():
+    """Render without colors from now on, without ever importing colorama"""
+    globals().update(Fore=NO_COLOR, Back=NO_COLOR, Style=NO_COLOR)
+    render_header.cache_clear()
+    render_help.cache_clear()
+    _screen_cache.clear()
+
+class Frame:
+    """One screen of output, built in memory and written to the terminal with a single write"""
+    
+    def __init__(self, clear=True):
+        self.clear = clear
+        self.parts = []
+    
+    def add(self, text):
+        """Append prerendered text, such as a cached banner"""
+        self.parts.append(text)
+        return self
+    
+    def line(self, text=""):
+        """Append a line, resetting colors at its end like colorama's autoreset does for print"""
+        self.parts.append(text + Style.RESET_ALL + "\n")
+        return self
+    
+    def render(self):
+        return "".join(self.parts)
+    
+    def show(self, stream=None):
+        """Write the whole frame at once, clearing the screen first when writing to a terminal"""
+        stream = stream or sys.stdout
+        text = self.render()
+        if self.clear and stream.isatty():
+            text = CLEAR_SEQUENCE + text
+        stream.write(text)
+        stream.flush()
+
+def clear_screen():
+    """Clear the terminal screen with ANSI escapes instead of spawning a shell"""
+    Frame().show()
+
+@functools.lru_cache(maxsize=None)
+def render_header(show_dollar=True):
+    """Render the application header with optional dollar bill ASCII art"""
+    frame = Frame(clear=False)
+    
+    # Dollar Bill ASCII Art Banner with green color
+    if show_dollar:
+        frame.line(Fore.GREEN + r"""
+||====================================================================||
+||//$\\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\//$\\||
+||(100)==================| FEDERAL RESERVE NOTE |================(100)||
+||\\$//        ~         '------========--------'                \\$//||
+||<< /        /$\              // ____ \\                         \ >>||
+||>>|  12    //L\\            // ///..) \\         L38036133B   12 |<<||
+||<<|        \\ //           || <||  >\  ||                        |>>||
+||>>|         \$/            ||  $$ --/  ||        One Hundred     |<<||
+||<<|      L38036133B        *\\  |\_/  //* series                 |>>||
+||>>|  12                     *\\/___\_//*   1989                  |<<||
+||<<\      Treasurer     ______/Franklin\________     Secretary 12 />>||
+||//$\                 ~|UNITED STATES OF AMERICA|~               /$\\||
+||(100)===================  ONE HUNDRED DOLLARS =================(100)||
+||\\$//\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\/\\$//||
+||====================================================================||""")
+    
+    # Application title
+    frame.line(Fore.CYAN + Back.BLACK + Style.BRIGHT + "\n" + "=" * 60)
+    frame.line(Fore.CYAN + Back.BLACK + Style.BRIGHT + "                 CURRENCY CONVERTER v1.0                 ")
+    frame.line(Fore.CYAN + Back.BLACK + Style.BRIGHT + "=" * 60 + "\n")
+    return frame.render()
+
+def print_header(show_dollar=True):
+    """Print the application header with optional dollar bill ASCII art"""
+    Frame().add(render_header(show_dollar)).show()
+
+class Metrics:
+    """Process-wide counters, gauges and latency histograms, exported as Prometheus text or JSON"""
+    
+    def __init__(self, buckets=METRICS_BUCKETS):
+        self.buckets = buckets
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._gauges = {}
+        self._histograms = {}  # key -> [per-bucket counts..., +Inf count], sum
+    
+    def inc(self, name, value=1, **labels):
+        self.add((name, tuple(sorted(labels.items()))), value)
+    
+    def add(self, key, value=1):
+        """Increment a counter by its prebuilt (name, labels) key, for instrumented hot paths"""
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+    
+    def set(self, name, value, **labels):
+        with self._lock:
+            self._gauges[(name, tuple(sorted(labels.items())))] = value
+    
+    def observe(self, name, seconds, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            entry = self._histograms.get(key)
+            if entry is None:
+                entry = self._histograms[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][bisect.bisect_left(self.buckets, seconds)] += 1
+            entry[1] += seconds
+    
+    def total(self, name, **labels):
+        """Sum a counter over every label set that matches the given labels"""
+        wanted = set(labels.items())
+        with self._lock:
+            return sum(value for (key, key_labels), value in self._counters.items()
+                       if key == name and wanted <= set(key_labels))
+    
+    def derived(self):
+        """Return the ratios and rates computed from the raw counters"""
+        lookups = self.total("currency_cache_lookups_total")
+        hits = self.total("currency_cache_lookups_total", result="hit") + self.total("currency_cache_lookups_total", result="revalidated")
+        uptime = max(time.time() - self.started, 1e-9)
+        return {
+            "currency_uptime_seconds": uptime,
+            "currency_cache_hit_ratio": hits / lookups if lookups else 0.0,
+            "currency_conversions_per_second": self.total("currency_conversions_total") / uptime,
+        }
+    
+    def prometheus(self):
+        """Render every metric in the Prometheus text exposition format"""
+        with self._lock:
+            counters = sorted(self._counters.items())
+            gauges = sorted(self._gauges.items())
+            histograms = sorted((key, (list(counts), total)) for key, (counts, total) in self._histograms.items())
+        
+        lines = []
+        typed = set()
+        
+        def header(name, kind):
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# HELP {name} {METRIC_HELP.get(name, name)}")
+                lines.append(f"# TYPE {name} {kind}")
+        
+        for (name, labels), value in counters:
+            header(name, "counter")
+            lines.append(f"{name}{format_labels(labels)} {value:g}")
+        for (name, labels), value in gauges:
+            header(name, "gauge")
+            lines.append(f"{name}{format_labels(labels)} {value:g}")
+        for name, value in self.derived().items():
+            header(name, "gauge")
+            lines.append(f"{name} {value:g}")
+        for (name, labels), (counts, total) in histograms:
+            header(name, "histogram")
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float('inf') else f"{bound:g}"
+                lines.append(f"{name}_bucket{format_labels(labels + (('le', le),))} {cumulative}")
+            lines.append(f"{name}_sum{format_labels(labels)} {total:g}")
+            lines.append(f"{name}_count{format_labels(labels)} {cumulative}")
+        return "\n".join(lines) + "\n"
+    
+    def as_dict(self):
+        """Return every metric as plain JSON-serializable data keyed by Prometheus-style series names"""
+        with self._lock:
+            counters = {name + format_labels(labels): value for (name, labels), value in sorted(self._counters.items())}
+            gauges = {name + format_labels(labels): value for (name, labels), value in sorted(self._gauges.items())}
+            histograms = {}
+            for (name, labels), (counts, total) in sorted(self._histograms.items()):
+                count = sum(counts)
+                histograms[name + format_labels(labels)] = {
+                    "count": count,
+                    "sum": total,
+                    "mean": total / count if count else 0.0,
+                    "buckets": {("+Inf" if i == len(self.buckets) else f"{self.buckets[i]:g}"): n for i, n in enumerate(counts)},
+                }
+        return {"counters": counters, "gauges": gauges, "histograms": histograms, "derived": self.derived()}
+    
+    def dump(self, path):
+        """Atomically write the metrics to path, as Prometheus text for .prom files and JSON otherwise"""
+        if path.endswith(".prom"):
+            data = self.prometheus().encode('utf-8')
+        else:
+            data = json.dumps(self.as_dict(), indent=2).encode('utf-8')
+        atomic_write(path, data)
+
+def format_labels(labels):
+    """Format label pairs as a Prometheus {name="value"} suffix"""
+    if not labels:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in labels)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(labels, escaped)) + "}"
+
+def timed(name, **labels):
+    """Record each call's duration in a histogram; leaves func untouched when metrics are off"""
+    def decorate(func):
+        if not METRICS_ENABLED:
+            return func
+        
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                METRICS.observe(name, time.perf_counter() - start, **labels)
+        return wrapper
+    return decorate
+
+def counted(name, size=None, **labels):
+    """Count calls, or size(result) items per call; leaves func untouched when metrics are off"""
+    key = (name, tuple(sorted(labels.items())))
+    
+    def decorate(func):
+        if not METRICS_ENABLED:
+            return func
+        
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            result = func(*args, **kwargs)
+            METRICS.add(key, size(result) if size else 1)
+            return result
+        return wrapper
+    return decorate
+
+def record_error(where, error):
+    """Count an exception that is handled and not re-raised"""
+    if METRICS_ENABLED:
+        METRICS.inc("currency_errors_total", where=where, type=type(error).__name__)
+
+# Process-wide metrics registry
+METRICS = Metrics()
+
+class SingleFlight:
+    """Let concurrent callers making the same call share one execution and its result"""
+    
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+    
+    def do(self, key, func, *args):
+        """Return (result, shared): run func(*args) unless a call with this key is in flight, else wait for it"""
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+        if not leader:
+            return future.result(), True
+        
+        try:
+            future.set_result(func(*args))
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            # Later callers start a fresh call rather than reusing a finished result
+            with self._lock:
+                del self._calls[key]
+        return future.result(), False
+
+def get_api_bucket():
+    """Return the token bucket every API request in the process draws from, or None when unlimited"""
+    global _api_bucket
+    if _api_bucket is None and API_RATE_LIMIT > 0:
+        with _import_lock:
+            if _api_bucket is None:
+                _api_bucket = TokenBucket(API_RATE_LIMIT, API_RATE_BURST)
+    return _api_bucket
+
+class Cassette:
+    """API responses recorded to a JSON file, matched on replay by method, path and query"""
+    
+    def __init__(self, path):
+        self.path = path
+        self.interactions = []
+        self._played = {}
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                document = json.load(f)
+            if document.get('version') != CASSETTE_VERSION:
+                raise ValueError(f"{path} is not a version {CASSETTE_VERSION} API cassette")
+            self.interactions = document['interactions']
+    
+    @staticmethod
+    def key(method, url):
+        """Match on the path and sorted query only, so a cassette replays against any base URL"""
+        parts = urlsplit(url)
+        return method, parts.path, "&".join(sorted(parts.query.split("&"))) if parts.query else ""
+    
+    def record(self, request, response, elapsed):
+        """Append one live response and rewrite the cassette"""
+        method, path, query = self.key(request.method, request.url)
+        interaction = {
+            "method": method, "path": path, "query": query, "status": response.status_code,
+            "headers": {name: value for name, value in response.headers.items() if name.lower() in CASSETTE_HEADERS},
+            "body": response.content.decode('utf-8', errors='replace'), "elapsed": round(elapsed, 4),
+        }
+        with self._lock:
+            self.interactions.append(interaction)
+            document = json.dumps({"version": CASSETTE_VERSION, "interactions": self.interactions}, indent=1)
+            atomic_write(self.path, document.encode('utf-8'))
+    
+    def play(self, request):
+        """Return the next recorded interaction for a request, cycling through repeats, or None"""
+        key = self.key(request.method, request.url)
+        matches = [item for item in self.interactions if (item['method'], item['path'], item['query']) == key]
+        if not matches:
+            return None
+        with self._lock:
+            turn = self._played.get(key, 0)
+            self._played[key] = turn + 1
+        return matches[turn % len(matches)]
+
+def parse_faults(spec):
+    """Parse 'latency=0.5,jitter=0.2,error=0.1,status=0.1,truncate=0.1,seed=1' into a fault plan"""
+    faults = dict(latency=0.0, jitter=0.0, error=0.0, status=0.0, truncate=0.0, seed=None)
+    for item in filter(None, (part.strip() for part in (spec or "").split(","))):
+        name, _, value = item.partition("=")
+        if name not in faults:
+            raise ValueError(f"Unknown fault {name!r}; expected one of {', '.join(faults)}")
+        faults[name] = int(value) if name == "seed" else float(value)
+    return faults
+
+class CassetteRecorder:
+    """Transport adapter that sends requests for real and records every response to a cassette"""
+    
+    def __init__(self, adapter, cassette):
+        self.adapter = adapter
+        self.cassette = cassette
+    
+    def send(self, request, **kwargs):
+        start = time.perf_counter()
+        response = self.adapter.send(request, **kwargs)
+        self.cassette.record(request, response, time.perf_counter() - start)
+        return response
+    
+    def close(self):
+        self.adapter.close()
+
+class CassettePlayer:
+    """Transport adapter that answers from a cassette without touching the network, injecting faults on request"""
+    
+    def __init__(self, cassette, faults=None):
+        self.cassette = cassette
+        self.faults = faults or parse_faults("")
+        self.random = random.Random(self.faults['seed'])
+    
+    def inject(self, kind):
+        if METRICS_ENABLED:
+            METRICS.inc("currency_faults_injected_total", kind=kind)
+    
+    def send(self, request, timeout=None, **kwargs):
+        faults = self.faults
+        delay = faults['latency'] + self.random.uniform(0, faults['jitter'])
+        limit = timeout[-1] if isinstance(timeout, tuple) else timeout
+        if delay:
+            self.inject("latency")
+            if limit is not None and delay >= limit:
+                time.sleep(limit)
+                raise requests.Timeout(f"Injected timeout: no response within {limit:g}s", request=request)
+            time.sleep(delay)
+        if self.random.random() < faults['error']:
+            self.inject("error")
+            raise requests.ConnectionError("Injected connection failure", request=request)
+        
+        interaction = self.cassette.play(request)
+        if interaction is None:
+            raise requests.ConnectionError(f"No recorded response for {request.method} {urlsplit(request.url).path}", request=request)
+        status, body = interaction['status'], interaction['body'].encode('utf-8')
+        headers = dict(interaction['headers'])
+        etag = headers.get('ETag') or headers.get('etag')
+        if etag and request.headers.get('If-None-Match') == etag:
+            status, body = 304, b""
+        if self.random.random() < faults['status']:
+            self.inject("status")
+            status, body = 503, b'{"error": "Injected failure"}'
+        if body and self.random.random() < faults['truncate']:
+            self.inject("truncate")
+            body = body[:len(body) // 2]
+        
+        response = requests.Response()
+        response.status_code = status
+        response.reason = HTTP_REASONS.get(status, "")
+        response.headers = requests.structures.CaseInsensitiveDict(headers)
+        response.headers['Content-Length'] = str(len(body))
+        response._content = body
+        response.encoding = 'utf-8'
+        response.url = request.url
+        response.request = request
+        return response
+    
+    def close(self):
+        pass
+
+def configure_cassette(path, mode="replay", faults=""):
+    """Record all API traffic to path, or replay it from path with injected faults, for clients created afterwards"""
+    global _api_cassette
+    _api_cassette = (Cassette(path), mode, parse_faults(faults)) if path else None
+
+def api_transport(adapter):
+    """Return the transport adapter API sessions should mount: live, recording or replaying"""
+    if _api_cassette is None:
+        return adapter
+    cassette, mode, faults = _api_cassette
+    return CassetteRecorder(adapter, cassette) if mode == "record" else CassettePlayer(cassette, faults)
+
+class CircuitBreaker:
+    """Consecutive API failure count, persisted across runs, that skips the network for a cool-down once tripped
+    
+    After threshold failed requests in a row the breaker opens, and requests fail
+    immediately so callers go straight to cached or stored rates. Once the
+    cool-down has passed, a single request probes the API again: success closes
+    the breaker, failure opens it for another cool-down.
+    """
+    
+    def __init__(self, key, path=None, threshold=BREAKER_THRESHOLD, cooldown=BREAKER_COOLDOWN):
+        self.key = key
+        self.path = path or BREAKER_FILE
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+        state = self.load().get(key, {})
+        self.failures = state.get('failures', 0)
+        self.opened_at = state.get('opened_at')
+    
+    def load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            record_error("circuit_breaker", e)
+            return {}
+    
+    def save(self):
+        """Merge this breaker's state into the shared file; breakers for other APIs are kept"""
+        states = self.load()
+        states[self.key] = {"failures": self.failures, "opened_at": self.opened_at}
+        try:
+            atomic_write(self.path, json.dumps(states).encode('utf-8'))
+        except OSError as e:
+            record_error("circuit_breaker", e)
+    
+    def allow(self):
+        """Tell whether a request may go out; after the cool-down, one probe is let through"""
+        if self.cooldown <= 0 or self.opened_at is None:
+            return True
+        with self._lock:
+            if time.time() - self.opened_at < self.cooldown:
+                return False
+            self.opened_at = time.time()  # Half-open: this probe decides, everyone else keeps waiting
+        return True
+    
+    def retry_at(self):
+        return (self.opened_at or 0) + self.cooldown
+    
+    def record_success(self):
+        if self.failures or self.opened_at is not None:
+            with self._lock:
+                self.failures, self.opened_at = 0, None
+                self.save()
+            if METRICS_ENABLED:
+                METRICS.set("currency_breaker_open", 0, api=self.key)
+    
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.threshold and self.cooldown > 0:
+                self.opened_at = time.time()
+            self.save()
+        if METRICS_ENABLED and self.opened_at is not None:
+            METRICS.set("currency_breaker_open", 1, api=self.key)
+
+def get_circuit_breaker(base_url):
+    """Return the process-wide breaker guarding one API base URL"""
+    with _import_lock:
+        if base_url not in _breakers:
+            _breakers[base_url] = CircuitBreaker(base_url)
+        return _breakers[base_url]
+
+class BaseApiClient:
+    """Retry policy plus the request, retry, coalescing, throttling and latency counters shared by the API clients"""
+    
+    RETRY_STATUSES = (429, 500, 502, 503, 504)
+    
+    def __init__(self, base_url=None, timeouts=None, max_retries=API_MAX_RETRIES, backoff_base=API_BACKOFF_BASE, backoff_max=API_BACKOFF_MAX):
+        self.base_url = (base_url or API_BASE_URL).rstrip("/")
+        self.timeouts = dict(API_TIMEOUTS, **(timeouts or {}))
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        
+        # Replayed failures must not trip the breaker that guards the real API
+        replaying = _api_cassette is not None and _api_cassette[1] == "replay"
+        self.breaker = get_circuit_breaker(f"replay:{self.base_url}" if replaying else self.base_url)
+        
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._retries = 0
+        self._errors = 0
+        self._coalesced = 0
+        self._throttled = 0
+        self._latency = {}  # path -> [count, total seconds, max seconds]
+    
+    def backoff(self, attempt):
+        """Return the jittered exponential delay before retry number attempt"""
+        delay = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        return random.uniform(delay / 2, delay)
+    
+    def short_circuit(self, path):
+        """Return the error a request fails with while the breaker is open"""
+        if METRICS_ENABLED:
+            METRICS.inc("currency_api_short_circuits_total", endpoint=path)
+        retry_at = datetime.fromtimestamp(self.breaker.retry_at()).strftime('%H:%M:%S')
+        return requests.ConnectionError(f"{self.base_url} keeps failing; not trying again until {retry_at}")
+    
+    def record_coalesced(self, path):
+        """Record a request answered by an identical one already in flight"""
+        with self._lock:
+            self._coalesced += 1
+        if METRICS_ENABLED:
+            METRICS.inc("currency_api_coalesced_total", endpoint=path)
+    
+    def record_retry(self, path):
+        with self._lock:
+            self._retries += 1
+        if METRICS_ENABLED:
+            METRICS.inc("currency_api_retries_total", endpoint=path)
+    
+    def record_throttle(self, path, waited):
+        """Record a request held back by the process-wide rate limit"""
+        with self._lock:
+            self._throttled += 1
+        if METRICS_ENABLED:
+            METRICS.inc("currency_api_throttled_total", endpoint=path)
+            METRICS.inc("currency_api_throttle_seconds_total", waited, endpoint=path)
+    
+    def record(self, path, elapsed, error=False, timeout=False):
+        """Record the latency and outcome of one request"""
+        if METRICS_ENABLED:
+            METRICS.observe("currency_api_request_seconds", elapsed, endpoint=path)
+            if error:
+                METRICS.inc("currency_api_errors_total", endpoint=path)
+            if timeout:
+                METRICS.inc("currency_api_timeouts_total", endpoint=path)
+        with self._lock:
+            self._requests += 1
+            if error:
+                self._errors += 1
+            entry = self._latency.setdefault(path, [0, 0.0, 0.0])
+            entry[0] += 1
+            entry[1] += elapsed
+            entry[2] = max(entry[2], elapsed)
+    
+    def connections_opened(self):
+        return 0
+    
+    def stats(self):
+        """Return request, retry, coalescing, throttling, connection reuse and per-endpoint latency counters"""
+        opened = self.connections_opened()
+        with self._lock:
+            return {
+                "requests": self._requests,
+                "retries": self._retries,
+                "errors": self._errors,
+                "coalesced": self._coalesced,
+                "throttled": self._throttled,
+                "connections_opened": opened,
+                "connections_reused": max(0, self._requests - opened),
+                "latency": {
+                    path: {"count": count, "avg": total / count, "max": peak}
+                    for path, (count, total, peak) in self._latency.items()
+                },
+            }
+
+class ApiClient(BaseApiClient):
+    """Pooled HTTP client for the VATcomply API with retries, backoff, request coalescing and latency counters"""
+    
+    def __init__(self, base_url=None, pool_connections=API_POOL_CONNECTIONS, pool_maxsize=API_POOL_MAXSIZE,
+                 timeouts=None, max_retries=API_MAX_RETRIES, backoff_base=API_BACKOFF_BASE, backoff_max=API_BACKOFF_MAX):
+        super().__init__(base_url, timeouts, max_retries, backoff_base, backoff_max)
+        self.adapter = requests.adapters.HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+        self.session = requests.Session()
+        transport = api_transport(self.adapter)
+        self.session.mount("http://", transport)
+        self.session.mount("https://", transport)
+        self.session.headers["Accept-Encoding"] = "gzip, deflate"
+        
+        self._flights = SingleFlight()
+        self._pools = []
+    
+    def get(self, path, params=None, headers=None, timeout=None):
+        """GET an API path; concurrent identical GETs share one request and its response"""
+        key = (path, json.dumps(params, sort_keys=True, default=str), json.dumps(headers, sort_keys=True, default=str))
+        response, shared = self._flights.do(key, self.request, path, params, headers, timeout)
+        if shared:
+            self.record_coalesced(path)
+        return response
+    
+    def request(self, path, params=None, headers=None, timeout=None):
+        """GET an API path, retrying connection errors and 429/5xx responses with backoff"""
+        url = f"{self.base_url}{path}"
+        timeout = timeout or self.timeouts.get(path, API_DEFAULT_TIMEOUT)
+        self.track_pool(url)
+        bucket = get_api_bucket()
+        
+        # The breaker is asked once per request; its retries belong to the same request
+        if not self.breaker.allow():
+            raise self.short_circuit(path)
+        attempt = 0
+        while True:
+            waited = bucket.acquire() if bucket else 0.0
+            if waited:
+                self.record_throttle(path, waited)
+            start = time.perf_counter()
+            try:
+                response = self.session.get(url, params=params, headers=headers, timeout=timeout)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                self.record(path, time.perf_counter() - start, error=True, timeout=isinstance(e, requests.Timeout))
+                if attempt >= self.max_retries:
+                    self.breaker.record_failure()
+                    raise
+            else:
+                self.record(path, time.perf_counter() - start, error=response.status_code >= 400)
+                if response.status_code not in self.RETRY_STATUSES or attempt >= self.max_retries:
+                    if response.status_code >= 500:
+                        self.breaker.record_failure()
+                    else:
+                        self.breaker.record_success()
+                    return response
+            
+            self.record_retry(path)
+            time.sleep(self.backoff(attempt))
+            attempt += 1
+    
+    def get_json(self, path, params=None, timeout=None):
+        """GET an API path and decode its JSON body, raising for HTTP errors"""
+        response = self.get(path, params=params, timeout=timeout)
+        response.raise_for_status()
+        return response.json()
+    
+    def track_pool(self, url):
+        """Remember the connection pool serving url so its handshakes can be counted"""
+        pool = self.adapter.poolmanager.connection_from_url(url)
+        with self._lock:
+            if pool not in self._pools:
+                self._pools.append(pool)
+    
+    def connections_opened(self):
+        with self._lock:
+            return sum(pool.num_connections for pool in self._pools)
+    
+    def close(self):
+        """Close all pooled connections"""
+        self.session.close()
+
+def get_api_client():
+    """Return the shared API client used by every VATcomply call"""
+    global _api_client
+    if _api_client is None:
+        _api_client = ApiClient()
+    return _api_client
+
+class AsyncResponse(namedtuple("AsyncResponse", "status_code headers content url")):
+    """One response read by AsyncApiClient, with header names in lower case"""
+    __slots__ = ()
+    
+    def json(self):
+        return json.loads(self.content)
+    
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            reason = HTTP_REASONS.get(self.status_code, "Error")
+            raise requests.HTTPError(f"{self.status_code} {reason} for url: {self.url}", response=self)
+
+def api_ssl_context():
+    """Return an SSL context trusting the same CAs as requests: REQUESTS_CA_BUNDLE or CURL_CA_BUNDLE, else certifi"""
+    bundle = os.environ.get("REQUESTS_CA_BUNDLE") or os.environ.get("CURL_CA_BUNDLE")
+    if bundle and os.path.isdir(bundle):
+        return ssl.create_default_context(capath=bundle)
+    if not bundle:
+        try:
+            import certifi
+            bundle = certifi.where()
+        except ImportError:
+            pass  # The system store, which also honours SSL_CERT_FILE
+    return ssl.create_default_context(cafile=bundle)
+
+class AsyncApiClient(BaseApiClient):
+    """Non-blocking VATcomply client on asyncio streams, sharing the retry policy, breaker and rate limit of ApiClient
+    
+    Connections are kept alive between requests and belong to the event loop
+    that opened them, and redirects within the API's origin are followed on
+    them. Requests that need what only requests provides (recorded or replayed
+    cassettes, an HTTP(S)_PROXY, a redirect to another host) run through a
+    requests-based ApiClient on a worker thread instead.
+    """
+    
+    REDIRECT_STATUSES = (301, 302, 303, 307, 308)
+    
+    def __init__(self, base_url=None, max_connections=API_POOL_MAXSIZE, timeouts=None, max_retries=API_MAX_RETRIES,
+                 backoff_base=API_BACKOFF_BASE, backoff_max=API_BACKOFF_MAX):
+        super().__init__(base_url, timeouts, max_retries, backoff_base, backoff_max)
+        parts = urlsplit(self.base_url)
+        self.host = parts.hostname
+        self.port = parts.port or (443 if parts.scheme == "https" else 80)
+        self.authority = parts.netloc
+        self.origin = f"{parts.scheme}://{parts.netloc}"
+        self.root = parts.path
+        self.ssl = api_ssl_context() if parts.scheme == "https" else None
+        self.proxy = requests.utils.select_proxy(self.base_url, requests.utils.get_environ_proxies(self.base_url))
+        
+        self._slots = asyncio.Semaphore(max_connections)
+        self._idle = []  # (reader, writer) pairs the server left open
+        self._flights = {}  # request key -> [task, number of callers awaiting it]
+        self._opened = 0
+        self._delegate = None
+    
+    async def get(self, path, params=None, headers=None, timeout=None):
+        """GET an API path; concurrent identical GETs share one request, cancelled once nobody awaits it"""
+        key = (path, json.dumps(params, sort_keys=True, default=str), json.dumps(headers, sort_keys=True, default=str))
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = self._flights[key] = [asyncio.ensure_future(self.request(path, params, headers, timeout)), 0]
+            flight[0].add_done_callback(lambda task: self.land(key, flight))
+        else:
+            self.record_coalesced(path)
+        
+        flight[1] += 1
+        try:
+            return await asyncio.shield(flight[0])
+        finally:
+            flight[1] -= 1
+            if not flight[1] and not flight[0].done():
+                self.land(key, flight)
+                flight[0].cancel()
+    
+    def land(self, key, flight):
+        """Stop offering a finished or abandoned request to new callers"""
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+    
+    def delegate(self):
+        """Return the requests-based client for this API, the shared one when the base URL matches"""
+        shared = get_api_client()
+        if shared.base_url == self.base_url:
+            return shared
+        if self._delegate is None:
+            self._delegate = ApiClient(self.base_url, timeouts=self.timeouts, max_retries=self.max_retries,
+                                       backoff_base=self.backoff_base, backoff_max=self.backoff_max)
+        return self._delegate
+    
+    async def delegated(self, func, *args):
+        """Run a blocking requests call on a worker thread and wrap its response like one read here"""
+        response = await asyncio.wrap_future(run_in_background(func, *args))
+        return AsyncResponse(response.status_code, {name.lower(): value for name, value in response.headers.items()},
+                             response.content, response.url)
+    
+    def request_head(self, target, headers=None):
+        """Encode the request line and headers of a GET for target"""
+        lines = [f"GET {target} HTTP/1.1", f"Host: {self.authority}", "Accept: application/json",
+                 "Accept-Encoding: gzip, deflate", "User-Agent: Currency-Converter"]
+        lines += [f"{name}: {value}" for name, value in (headers or {}).items()]
+        return ("\r\n".join(lines) + "\r\n\r\n").encode('latin-1')
+    
+    async def request(self, path, params=None, headers=None, timeout=None):
+        """GET an API path, following redirects and retrying connection errors, timeouts and 429/5xx with non-blocking backoff"""
+        timeout = timeout or self.timeouts.get(path, API_DEFAULT_TIMEOUT)
+        if _api_cassette is not None or self.proxy:
+            return await self.delegated(self.delegate().request, path, params, headers, timeout)
+        
+        target = self.root + path + (f"?{urlencode(params)}" if params else "")
+        head = self.request_head(target, headers)
+        bucket = get_api_bucket()
+        
+        # The breaker is asked once per request; its retries belong to the same request
+        if not self.breaker.allow():
+            raise self.short_circuit(path)
+        attempt = redirects = 0
+        while True:
+            waited = await bucket.acquire_async() if bucket else 0.0
+            if waited:
+                self.record_throttle(path, waited)
+            start = time.perf_counter()
+            try:
+                status, response_headers, body = await asyncio.wait_for(self.send(head), timeout)
+            except (OSError, EOFError, ValueError, zlib.error, asyncio.LimitOverrunError, asyncio.TimeoutError) as e:
+                timed_out = isinstance(e, asyncio.TimeoutError)
+                self.record(path, time.perf_counter() - start, error=True, timeout=timed_out)
+                if attempt >= self.max_retries:
+                    self.breaker.record_failure()
+                    if timed_out:
+                        raise requests.Timeout(f"GET {self.origin}{target}: no response within {timeout:g}s") from e
+                    raise requests.ConnectionError(f"GET {self.origin}{target} failed: {e or type(e).__name__}") from e
+            else:
+                self.record(path, time.perf_counter() - start, error=status >= 400)
+                if status in self.REDIRECT_STATUSES and 'location' in response_headers:
+                    redirects += 1
+                    if redirects > API_MAX_REDIRECTS:
+                        raise requests.TooManyRedirects(f"GET {self.origin}{target}: exceeded {API_MAX_REDIRECTS} redirects")
+                    url = urljoin(self.origin + target, response_headers['location'])
+                    parts = urlsplit(url)
+                    if f"{parts.scheme}://{parts.netloc}" != self.origin:
+                        # Another host isn't on these connections; requests follows the rest of the chain
+                        self.breaker.record_success()
+                        return await self.delegated(functools.partial(self.delegate().session.get, url,
+                                                                      headers=headers, timeout=timeout))
+                    target = parts.path + (f"?{parts.query}" if parts.query else "")
+                    head = self.request_head(target, headers)
+                    continue
+                if status not in self.RETRY_STATUSES or attempt >= self.max_retries:
+                    if status >= 500:
+                        self.breaker.record_failure()
+                    else:
+                        self.breaker.record_success()
+                    return AsyncResponse(status, response_headers, body, self.origin + target)
+            
+            self.record_retry(path)
+            await asyncio.sleep(self.backoff(attempt))
+            attempt += 1
+    
+    async def get_json(self, path, params=None, timeout=None):
+        """GET an API path and decode its JSON body, raising for HTTP errors"""
+        response = await self.get(path, params=params, timeout=timeout)
+        response.raise_for_status()
+        return response.json()
+    
+    async def send(self, head):
+        """Send one request over an idle keep-alive connection, or a new one, and read the whole response"""
+        async with self._slots:
+            # An idle connection the server has since closed fails at once; move on to the next
+            while self._idle:
+                try:
+                    return await self.exchange(self._idle.pop(), head)
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    continue
+            connection = await asyncio.open_connection(self.host, self.port, ssl=self.ssl)
+            with self._lock:
+                self._opened += 1
+            return await self.exchange(connection, head)
+    
+    async def exchange(self, connection, head):
+        """Write one request and read its response, keeping the connection if the server allows"""
+        reader, writer = connection
+        try:
+            writer.write(head)
+            await writer.drain()
+            status_line, *lines = (await reader.readuntil(b"\r\n\r\n")).decode('latin-1').split("\r\n")
+            status = int(status_line.split(" ", 2)[1])
+            headers = {}
+            for line in lines:
+                name, sep, value = line.partition(":")
+                if sep:
+                    headers[name.strip().lower()] = value.strip()
+            
+            keep = headers.get('connection', '').lower() != 'close'
+            if status in (204, 304):
+                body = b""
+            elif 'chunked' in headers.get('transfer-encoding', '').lower():
+                body = await self.read_chunked(reader)
+            elif 'content-length' in headers:
+                body = await reader.readexactly(int(headers['content-length']))
+            else:
+                body, keep = await reader.read(), False
+        except BaseException:
+            writer.close()
+            raise
+        
+        if keep:
+            self._idle.append(connection)
+        else:
+            writer.close()
+        encoding = headers.get('content-encoding', '').lower()
+        if encoding == 'gzip':
+            body = gzip.decompress(body)
+        elif encoding == 'deflate':
+            body = zlib.decompress(body)
+        return status, headers, body
+    
+    @staticmethod
+    async def read_chunked(reader):
+        chunks = []
+        while True:
+            size = int((await reader.readline()).split(b";")[0], 16)
+            if not size:
+                break
+            chunks.append(await reader.readexactly(size))
+            await reader.readexactly(2)
+        
+        # Skip any trailers up to the blank line that ends the message
+        while (await reader.readline()) not in (b"\r\n", b""):
+            pass
+        return b"".join(chunks)
+    
+    def connections_opened(self):
+        with self._lock:
+            return self._opened
+    
+    def close(self):
+        """Close all idle connections"""
+        while self._idle:
+            self._idle.pop()[1].close()
+
+def get_async_client():
+    """Return the async API client shared by every coroutine on the running event loop"""
+    loop = asyncio.get_running_loop()
+    for finished in [other for other in list(_async_clients) if other.is_closed()]:
+        _async_clients.pop(finished, None)
+    client = _async_clients.get(loop)
+    if client is None:
+        client = _async_clients[loop] = AsyncApiClient()
+    return client
+
+def get_exchange_rates(client=None):
+    """Fetch current exchange rates from VATcomply API"""
+    client = client or get_api_client()
+    try:
+        print(Fore.YELLOW + "Connecting to VATcomply API...")
+        data = client.get_json("/rates")
+        
+        # Extract rates and date
+        rates = data.get('rates', {})
+        # Add the base currency (EUR), which may be missing from its own rates
+        rates.setdefault(data.get('base', 'EUR'), 1.0)
+        date = data.get('date')
+        
+        # Debug output
+        print(Fore.YELLOW + f"API returned {len(rates)} currencies")
+        
+        # Check if we're getting expected number of currencies
+        if len(rates) < 50:
+            print(Fore.YELLOW + "Fetching additional currencies...")
+            
+            # Get all available currencies from the currencies endpoint
+            currencies_data = client.get_json("/currencies")
+            
+            # For currencies not in rates but available in the API, add them with estimates
+            base_currency = data.get('base', 'EUR')
+            missing = [code for code in currencies_data if code not in rates and code != base_currency]
+            
+            # Get the missing currency rates concurrently
+            extra_rates, stats = fetch_symbol_rates(base_currency, missing, client)
+            rates.update(extra_rates)
+            print(Fore.YELLOW + f"Fetched {len(extra_rates)} additional rates in {stats['calls']} calls ({stats['elapsed']:.2f}s)")
+        
+        return True, rates, date
+    except (requests.RequestException, ValueError, KeyError) as e:
+        record_error("get_exchange_rates", e)
+        return False, str(e), None
+
+@timed("currency_symbol_fetch_seconds")
+def fetch_symbol_rates(base_currency, codes, client=None, max_workers=SYMBOL_FETCH_WORKERS, timeout=5):
+    """Fetch rates for many currency codes, batching first and then querying misses concurrently"""
+    client = client or get_api_client()
+    codes = list(dict.fromkeys(codes))
+    rates = {}
+    calls = 0
+    start = time.perf_counter()
+    
+    def fetch(symbols):
+        response = client.get("/rates", params={"base": base_currency, "symbols": ",".join(symbols)}, timeout=timeout)
+        if response.status_code != 200:
+            return {}
+        return response.json().get('rates', {})
+    
+    if codes:
+        # One multi-symbol request usually answers most of the codes
+        calls += 1
+        try:
+            rates.update((code, rate) for code, rate in fetch(codes).items() if code in codes)
+        except (requests.RequestException, ValueError, AttributeError) as e:
+            record_error("fetch_symbol_rates", e)
+        
+        # Fall back to single-symbol calls for whatever the batch missed
+        missing = [code for code in codes if code not in rates]
+        if missing:
+            calls += len(missing)
+            with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(missing)))) as pool:
+                futures = {pool.submit(fetch, [code]): code for code in missing}
+                for future in as_completed(futures):
+                    code = futures[future]
+                    try:
+                        result = future.result()
+                    except (requests.RequestException, ValueError, AttributeError) as e:
+                        record_error("fetch_symbol_rates", e)
+                        continue  # Skip if we can't get this currency
+                    if code in result:
+                        rates[code] = result[code]
+    
+    if METRICS_ENABLED:
+        METRICS.inc("currency_symbol_fetch_calls_total", calls)
+    return rates, {"calls": calls, "elapsed": time.perf_counter() - start}
+
+def get_user_location(client=None):
+    """Get user's location to suggest local currency"""
+    client = client or get_api_client()
+    try:
+        data = client.get_json("/geolocate")
+        country = data.get('country', {})
+        country_name = country.get('name', 'Unknown')
+        currency_code = country.get('currency', 'USD')
+        return True, currency_code, country_name
+    except (requests.RequestException, ValueError, KeyError) as e:
+        record_error("get_user_location", e)
+        return False, 'USD', 'Unknown'
+
+def get_fallback_rates():
+    """Return static fallback exchange rates if API fails"""
+    return {
+        # Major currencies
+        "USD": 1.00,    # US Dollar
+        "EUR": 0.94,    # Euro
+        "GBP": 0.82,    # British Pound
+        "JPY": 149.30,  # Japanese Yen
+        "CNY": 7.23,    # Chinese Yuan
+        "AUD": 1.55,    # Australian Dollar
+        "CAD": 1.38,    # Canadian Dollar
+        "CHF": 0.89,    # Swiss Franc
+        "HKD": 7.82,    # Hong Kong Dollar
+        "SGD": 1.36,    # Singapore Dollar
+        
+        # Europe
+        "SEK": 10.71,   # Swedish Krona
+        "NOK": 10.80,   # Norwegian Krone
+        "DKK": 7.01,    # Danish Krone
+        "PLN": 4.03,    # Polish Zloty
+        "CZK": 23.45,   # Czech Koruna
+        "HUF": 358.80,  # Hungarian Forint
+        "RON": 4.68,    # Romanian Leu
+        "BGN": 1.84,    # Bulgarian Lev
+        "ISK": 138.50,  # Icelandic Krona
+        "RUB": 92.50,   # Russian Ruble
+        
+        # Americas
+        "MXN": 17.03,   # Mexican Peso
+        "BRL": 5.15,    # Brazilian Real
+        "ARS": 870.0,   # Argentine Peso
+        "COP": 3950.0,  # Colombian Peso
+        "CLP": 927.0,   # Chilean Peso
+        "PEN": 3.70,    # Peruvian Sol
+        
+        # Asia
+        "INR": 83.39,   # Indian Rupee
+        "KRW": 1345.0,  # South Korean Won
+        "IDR": 15680.0, # Indonesian Rupiah
+        "MYR": 4.72,    # Malaysian Ringgit
+        "THB": 36.14,   # Thai Baht
+        "PHP": 56.70,   # Philippine Peso
+        "PKR": 278.50,  # Pakistani Rupee
+        "BDT": 109.50,  # Bangladeshi Taka
+        "VND": 24890.0, # Vietnamese Dong
+        "ILS": 3.70,    # Israeli Shekel
+        
+        # Africa & Middle East
+        "ZAR": 18.94,   # South African Rand
+        "EGP": 46.80,   # Egyptian Pound
+        "NGN": 1420.0,  # Nigerian Naira
+        "KES": 129.50,  # Kenyan Shilling
+        "SAR": 3.75,    # Saudi Riyal
+        "AED": 3.67,    # UAE Dirham
+        "QAR": 3.64,    # Qatari Riyal
+        "TRY": 32.17,   # Turkish Lira
+        
+        # Oceania
+        "NZD": 1.67,    # New Zealand Dollar
+        "FJD": 2.27,    # Fijian Dollar
+    }
+
+def get_fallback_currency_names():
+    """Return static currency names for searching when the API's currency list is unavailable"""
+    return {
+        "USD": "US Dollar",
+        "EUR": "Euro",
+        "GBP": "British Pound",
+        "JPY": "Japanese Yen",
+        "CNY": "Chinese Yuan",
+        "AUD": "Australian Dollar",
+        "CAD": "Canadian Dollar",
+        "CHF": "Swiss Franc",
+        "HKD": "Hong Kong Dollar",
+        "SGD": "Singapore Dollar",
+        "SEK": "Swedish Krona",
+        "NOK": "Norwegian Krone",
+        "DKK": "Danish Krone",
+        "PLN": "Polish Zloty",
+        "CZK": "Czech Koruna",
+        "HUF": "Hungarian Forint",
+        "RON": "Romanian Leu",
+        "BGN": "Bulgarian Lev",
+        "ISK": "Icelandic Krona",
+        "RUB": "Russian Ruble",
+        "MXN": "Mexican Peso",
+        "BRL": "Brazilian Real",
+        "ARS": "Argentine Peso",
+        "COP": "Colombian Peso",
+        "CLP": "Chilean Peso",
+        "PEN": "Peruvian Sol",
+        "INR": "Indian Rupee",
+        "KRW": "South Korean Won",
+        "IDR": "Indonesian Rupiah",
+        "MYR": "Malaysian Ringgit",
+        "THB": "Thai Baht",
+        "PHP": "Philippine Peso",
+        "PKR": "Pakistani Rupee",
+        "BDT": "Bangladeshi Taka",
+        "VND": "Vietnamese Dong",
+        "ILS": "Israeli Shekel",
+        "ZAR": "South African Rand",
+        "EGP": "Egyptian Pound",
+        "NGN": "Nigerian Naira",
+        "KES": "Kenyan Shilling",
+        "SAR": "Saudi Riyal",
+        "AED": "UAE Dirham",
+        "QAR": "Qatari Riyal",
+        "TRY": "Turkish Lira",
+        "NZD": "New Zealand Dollar",
+        "FJD": "Fijian Dollar",
+    }
+
+def get_currency_info(client=None):
+    """Get full currency information from the API"""
+    client = client or get_api_client()
+    try:
+        currencies = client.get_json("/currencies")
+        return True, currencies
+    except (requests.RequestException, ValueError, KeyError) as e:
+        record_error("get_currency_info", e)
+        return False, str(e)
+
+def get_all_currency_symbols():
+    """Return a comprehensive dictionary of currency symbols"""
+    return {
+        # Major currencies
+        "USD": "$",
+        "EUR": "€",
+        "GBP": "£",
+        "JPY": "¥",
+        "CNY": "¥",
+        "AUD": "A$",
+        "CAD": "C$",
+        "CHF": "Fr",
+        "HKD": "HK$",
+        "SGD": "S$",
+        
+        # Europe
+        "SEK": "kr",
+        "NOK": "kr",
+        "DKK": "kr",
+        "PLN": "zł",
+        "CZK": "Kč",
+        "HUF": "Ft",
+        "RON": "lei",
+        "BGN": "лв",
+        "ISK": "kr",
+        "RUB": "₽",
+        "UAH": "₴",
+        "HRK": "kn",
+        "RSD": "din",
+        "MKD": "ден",
+        "ALL": "L",
+        "MDL": "L",
+        "BAM": "KM",
+        
+        # Americas
+        "MXN": "$",
+        "BRL": "R$",
+        "ARS": "$",
+        "COP": "$",
+        "CLP": "$",
+        "PEN": "S/",
+        "UYU": "$",
+        "BOB": "Bs",
+        "VES": "Bs",
+        "PYG": "₲",
+        "GTQ": "Q",
+        "HNL": "L",
+        "NIO": "C$",
+        "CRC": "₡",
+        "PAB": "B/",
+        "DOP": "RD$",
+        "JMD": "J$",
+        "TTD": "TT$",
+        "BMD": "$",
+        "BBD": "$",
+        
+        # Asia
+        "INR": "₹",
+        "KRW": "₩",
+        "IDR": "Rp",
+        "MYR": "RM",
+        "THB": "฿",
+        "PHP": "₱",
+        "PKR": "₨",
+        "BDT": "৳",
+        "VND": "₫",
+        "ILS": "₪",
+        "TWD": "NT$",
+        "LKR": "Rs",
+        "NPR": "₨",
+        "MMK": "K",
+        "KHR": "៛",
+        "MNT": "₮",
+        "KZT": "₸",
+        "UZS": "so'm",
+        "KGS": "сом",
+        
+        # Africa & Middle East
+        "ZAR": "R",
+        "EGP": "E£",
+        "NGN": "₦",
+        "KES": "KSh",
+        "SAR": "﷼",
+        "AED": "د.إ",
+        "QAR": "﷼",
+        "TRY": "₺",
+        "MAD": "د.م.",
+        "TND": "د.ت",
+        "GHS": "₵",
+        "UGX": "USh",
+        "TZS": "TSh",
+        "ETB": "Br",
+        "ZMW": "ZK",
+        "BHD": ".د.ب",
+        "KWD": "د.ك",
+        "IQD": "ع.د",
+        "JOD": "د.ا",
+        "OMR": "ر.ع.",
+        
+        # Oceania
+        "NZD": "NZ$",
+        "FJD": "FJ$",
+        "PGK": "K",
+        "SBD": "SI$",
+        "WST": "WS$",
+        "TOP": "T$",
+        "VUV": "VT",
+        
+        # Cryptocurrencies
+        "BTC": "₿",
+        "ETH": "Ξ",
+        "LTC": "Ł",
+        "XRP": "XRP",
+        "BCH": "BCH",
+        "XMR": "ɱ",
+        "USDT": "₮",
+        "USDC": "USDC",
+        "DAI": "DAI",
+    }
+
+def categorize_currencies(currencies_dict, rates):
+    """Categorize currencies into regions based on ISO codes and available data"""
+    # Define regions with their known currencies
+    regions = {
+        "Major Currencies": ["USD", "EUR", "GBP", "JPY", "CNY", "AUD", "CAD", "CHF", "HKD", "SGD"],
+        "Europe": ["SEK", "NOK", "DKK", "PLN", "CZK", "HUF", "RON", "BGN", "ISK", "RUB", "UAH", "HRK", 
+                  "RSD", "MKD", "ALL", "MDL", "BAM", "BYN"],
+        "Americas": ["MXN", "BRL", "ARS", "COP", "CLP", "PEN", "UYU", "BOB", "VES", "PYG", "GTQ", 
+                    "HNL", "NIO", "CRC", "PAB", "DOP", "JMD", "TTD", "BMD", "BBD"],
+        "Asia": ["INR", "KRW", "IDR", "MYR", "THB", "PHP", "PKR", "BDT", "VND", "ILS", "TWD", "LKR", 
+                "NPR", "MMK", "KHR", "MNT", "KZT", "UZS", "KGS", "TJS", "AFN", "MVR"],
+        "Africa & Middle East": ["ZAR", "EGP", "NGN", "KES", "SAR", "AED", "QAR", "TRY", "MAD", "TND", 
+                               "GHS", "UGX", "TZS", "ETB", "ZMW", "BHD", "KWD", "IQD", "JOD", "OMR", 
+                               "LBP", "DZD", "LYD", "SDG", "XOF", "XAF"],
+        "Oceania": ["NZD", "FJD", "PGK", "SBD", "WST", "TOP", "VUV"],
+        "Cryptocurrencies": ["BTC", "ETH", "LTC", "XRP", "BCH", "XMR", "USDT", "USDC", "DAI"]
+    }
+    
+    # Create a flattened set of all known categorized currencies
+    all_categorized = set()
+    for currencies in regions.values():
+        all_categorized.update(currencies)
+    
+    # Get the list of available currencies from rates
+    available_currencies = set(rates.keys())
+    
+    # Create a "Others" region for uncategorized currencies
+    others = available_currencies - all_categorized
+    if others:
+        regions["Others"] = sorted(list(others))
+    
+    # Filter regions to only include available currencies
+    filtered_regions = {}
+    for region, currencies in regions.items():
+        available = [c for c in currencies if c in available_currencies]
+        if available:
+            filtered_regions[region] = available
+    
+    return filtered_regions
+
+def display_main_menu(user_currency=None, country=None):
+    """Display the main menu of the application"""
+    frame = Frame().add(render_header(False))
+    
+    location_info = f" - Location: {country} [{user_currency}]" if user_currency else ""
+    frame.line(Fore.YELLOW + Style.BRIGHT + f"MAIN MENU{location_info}\n")
+    
+    # Menu options
+    frame.line(Fore.WHITE + " 1. " + Fore.CYAN + "Convert Currency")
+    frame.line(Fore.WHITE + " 2. " + Fore.CYAN + "View All Available Currencies")
+    frame.line(Fore.WHITE + " 3. " + Fore.CYAN + "Check Exchange Rate")
+    frame.line(Fore.WHITE + " 4. " + Fore.CYAN + "Help")
+    frame.line(Fore.WHITE + " 0. " + Fore.RED + "Exit")
+    
+    frame.line(Fore.CYAN + "\n" + "=" * 60)
+    frame.show()
+    
+    # Get user choice
+    while True:
+        try:
+            choice = input(Fore.YELLOW + "\nEnter your choice (0-4): " + Style.BRIGHT)
+            if choice in ['0', '1', '2', '3', '4']:
+                return choice
+            print(Fore.RED + "Invalid option. Please enter a number between 0 and 4.")
+        except Exception as e:
+            record_error("display_main_menu", e)
+            print(Fore.RED + "Invalid input. Please try again.")
+
+def render_currencies(rates, symbols, regions):
+    """Render the currency list screen body, reusing the last render while the same rate set is shown"""
+    # LiveRates hands out immutable mappings, so identity is enough to know nothing changed
+    cached = _screen_cache.get('currencies')
+    if cached and cached[0] is rates and cached[1] is symbols and cached[2] is regions:
+        return cached[3]
+    
+    frame = Frame(clear=False)
+    frame.line(Fore.YELLOW + Style.BRIGHT + "🌍 AVAILABLE CURRENCIES\n")
+    
+    # Display currencies by region with different colors for each region
+    region_colors = [Fore.CYAN, Fore.GREEN, Fore.MAGENTA, Fore.RED, Fore.YELLOW, Fore.BLUE, Fore.WHITE]
+    
+    # Display number of currencies at the top
+    frame.line(Fore.WHITE + f"Total currencies available: {Fore.GREEN}{len(rates)}")
+    frame.line(Fore.WHITE + f"All currencies: {Fore.CYAN}{', '.join(sorted(rates.keys()))}")
+    frame.line()
+    
+    for i, (region, currencies) in enumerate(regions.items()):
+        color = region_colors[i % len(region_colors)]
+        frame.line(f"{color}{Style.BRIGHT}{region} ({len(currencies)}):{Style.RESET_ALL}")
+        
+        # Display in columns with consistent formatting
+        currency_display = [f"{code} {symbols.get(code, '')}" for code in currencies]
+        for j in range(0, len(currency_display), 6):
+            row = currency_display[j:j+6]
+            frame.line("  " + "  ".join(f"{color}{c:<10}" for c in row))
+        frame.line()
+    
+    text = frame.render()
+    _screen_cache['currencies'] = (rates, symbols, regions, text)
+    return text
+
+def display_currencies(rates, symbols, regions):
+    """Display available currencies with colors by region"""
+    Frame().add(render_header(False)).add(render_currencies(rates, symbols, regions)).show()
+    
+    # Wait for user input before returning to main menu
+    input(Fore.YELLOW + "\nPress Enter to return to the main menu...")
+
+def resolve_currency(text, snapshot, search=None):
+    """Resolve typed input to a supported code, accepting a name, symbol or near miss when it is unambiguous"""
+    code = text.strip().upper()
+    if code in snapshot or search is None:
+        return code, []
+    matches = [match for match in search.search(text) if match in snapshot]
+    if len(matches) == 1:
+        return matches[0], []
+    return None, matches[:5]
+
+def report_unsupported(text, suggestions, search=None):
+    """Print the unsupported-currency error with the closest matches, if any"""
+    print(f"\n{Fore.RED}❌ Error: {text.strip().upper()} is not supported.")
+    if suggestions:
+        print(Fore.YELLOW + "Did you mean: " + Fore.WHITE + ", ".join(search.describe(code) for code in suggestions))
+
+@contextlib.contextmanager
+def currency_completion(search):
+    """Complete currency codes from codes, names and symbols with Tab while prompting, where readline exists"""
+    try:
+        import readline
+    except ImportError:
+        yield
+        return
+    
+    matches = []
+    
+    def complete(text, state):
+        if state == 0:
+            matches[:] = search.search(text) if search and text else []
+        return matches[state] if state < len(matches) else None
+    
+    previous_completer, previous_delims = readline.get_completer(), readline.get_completer_delims()
+    readline.set_completer(complete)
+    readline.set_completer_delims(" ,\t\n")
+    readline.parse_and_bind("tab: complete")
+    try:
+        yield
+    finally:
+        readline.set_completer(previous_completer)
+        readline.set_completer_delims(previous_delims)
+
+def check_exchange_rate(snapshot, symbols, default_currency, search=None):
+    """Check exchange rate between two currencies"""
+    frame = Frame().add(render_header(False))
+    frame.line(Fore.YELLOW + Style.BRIGHT + "💱 EXCHANGE RATE CHECKER\n")
+    
+    frame.line(Fore.CYAN + "Enter the currency codes to check the exchange rate between them.")
+    frame.line(Fore.CYAN + "Available currencies: " + Fore.WHITE + ", ".join(snapshot.codes))
+    frame.line(Fore.WHITE + "Tip: names and symbols work too (e.g. yen, ¥, swiss); press Tab to complete")
+    frame.show()
+    
+    with currency_completion(search):
+        # Get base currency
+        base_input = input(f"\n{Fore.CYAN}Base currency {Fore.YELLOW}(default: {default_currency}): {Style.BRIGHT}") or default_currency
+        base_currency, suggestions = resolve_currency(base_input, snapshot, search)
+        if base_currency not in snapshot:
+            report_unsupported(base_input, suggestions, search)
+            input(Fore.YELLOW + "\nPress Enter to return to the main menu...")
+            return
+        
+        # Get target currencies (comma-separated)
+        target_input = input(f"{Fore.CYAN}Target currency/currencies (comma separated): {Style.BRIGHT}")
+    target_currencies = [c.strip() for c in target_input.split(",")]
+    
+    results = Frame(clear=False)
+    results.line(f"\n{Fore.YELLOW}Exchange rates for {Fore.GREEN}{Style.BRIGHT}1 {base_currency} {symbols.get(base_currency, '')}:")
+    
+    # Every target is a lookup in the precomputed row for the base currency
+    base_row = snapshot.row(base_currency)
+    for target_text in target_currencies:
+        target, suggestions = resolve_currency(target_text, snapshot, search)
+        if target not in snapshot:
+            hint = f" (did you mean {', '.join(suggestions)}?)" if suggestions else ""
+            results.line(f"{Fore.RED}❌ {target_text.upper()}: Not supported{hint}")
+            continue
+        
+        rate = base_row[snapshot.index[target]]
+        if rate != rate:
+            results.line(f"{Fore.RED}❌ {target}: {snapshot.unavailable_reason(base_currency, target)}")
+            continue
+        stored = f"{Style.DIM} (via stored rates)" if snapshot.uses_stored_rates(base_currency, target) else ""
+        results.line(f"{Fore.WHITE}→ {Fore.GREEN}{rate:.4f} {target} {symbols.get(target, '')}{stored}")
+    results.show()
+    
+    input(Fore.YELLOW + "\nPress Enter to return to the main menu...")
+
+@functools.lru_cache(maxsize=None)
+def render_help():
+    """Render the static help screen body"""
+    frame = Frame(clear=False)
+    frame.line(Fore.YELLOW + Style.BRIGHT + "ℹ️ HELP INFORMATION\n")
+    
+    frame.line(Fore.CYAN + "ABOUT THIS APPLICATION")
+    frame.line(Fore.WHITE + "This Currency Converter allows you to convert between 50+ currencies using")
+    frame.line(Fore.WHITE + "real-time exchange rates fetched from the VATcomply API.")
+    
+    frame.line(Fore.CYAN + "\nFEATURES")
+    frame.line(Fore.WHITE + "• Convert between many world currencies")
+    frame.line(Fore.WHITE + "• View up-to-date exchange rates")
+    frame.line(Fore.WHITE + "• Automatic location detection")
+    frame.line(Fore.WHITE + "• Colorful and easy-to-use interface")
+    
+    frame.line(Fore.CYAN + "\nHOW TO USE")
+    frame.line(Fore.WHITE + "1. From the main menu, select the option you want")
+    frame.line(Fore.WHITE + "2. For currency conversion, enter the source currency, amount, and target currency")
+    frame.line(Fore.WHITE + "3. For checking rates, specify which currencies you want to compare")
+    
+    frame.line(Fore.CYAN + "\nCURRENCY CODES")
+    frame.line(Fore.WHITE + "Use standard 3-letter currency codes (e.g., USD, EUR, GBP, JPY)")
+    
+    frame.line(Fore.CYAN + "\nDATA SOURCE")
+    frame.line(Fore.WHITE + "Exchange rates are provided by VATcomply API (https://www.vatcomply.com)")
+    return frame.render()
+
+def show_help():
+    """Display help information"""
+    Frame().add(render_header(False)).add(render_help()).show()
+    input(Fore.YELLOW + "\nPress Enter to return to the main menu...")
+
+def convert_currency(snapshot, symbols, suggested_currency, search=None):
+    """Handle currency conversion workflow"""
+    frame = Frame().add(render_header())
+    frame.line(Fore.YELLOW + Style.BRIGHT + "💱 CURRENCY CONVERSION\n")
+    
+    # Help text
+    frame.line(Fore.WHITE + "Tip: Enter the 3-letter currency code (e.g., USD, EUR, JPY), or a name or symbol; Tab completes")
+    frame.show()
+    
+    with currency_completion(search):
+        # Get source currency with suggestion based on location
+        suggestion = f"(default: {suggested_currency})" if suggested_currency else "(default: USD)"
+        source_input = input(Fore.CYAN + "Enter source currency " + Fore.YELLOW + f"{suggestion}: " + Style.BRIGHT) or suggested_currency or "USD"
+        source_currency, suggestions = resolve_currency(source_input, snapshot, search)
+    
+    if source_currency not in snapshot:
+        report_unsupported(source_input, suggestions, search)
+        input(Fore.YELLOW + "\nPress Enter to return to the main menu...")
+        return
+    
+    try:
+        amount_prompt = f"Enter amount in {source_currency} {symbols.get(source_currency, '')}: "
+        amount = float(input(Fore.CYAN + amount_prompt + Style.BRIGHT))
+        if not math.isfinite(amount):
+            raise ValueError(amount)
+        if amount < 0:
+            print(f"\n{Fore.RED}❌ Error: Amount cannot be negative.")
+            input(Fore.YELLOW + "\nPress Enter to return to the main menu...")
+            return
+    except ValueError:
+        print(f"\n{Fore.RED}❌ Error: Please enter a valid number.")
+        input(Fore.YELLOW + "\nPress Enter to return to the main menu...")
+        return
+    
+    # Get target currency
+    with currency_completion(search):
+        target_input = input(Fore.CYAN + "Enter target currency: " + Style.BRIGHT)
+        target_currency, suggestions = resolve_currency(target_input, snapshot, search)
+    if target_currency not in snapshot:
+        report_unsupported(target_input, suggestions, search)
+        input(Fore.YELLOW + "\nPress Enter to return to the main menu...")
+        return
+    
+    # Cross rates are precomputed against the snapshot's real base (EUR for VATcomply)
+    try:
+        converted_amount = convert(snapshot, amount, source_currency, target_currency)
+    except ValueError as e:
+        print(f"\n{Fore.RED}❌ Cannot convert {source_currency} to {target_currency}: {e}.")
+        input(Fore.YELLOW + "\nPress Enter to return to the main menu...")
+        return
+    
+    # Display result with colors and formatting
+    display_conversion_result(source_currency, amount, target_currency, converted_amount, snapshot, symbols)
+    
+    input(Fore.YELLOW + "\nPress Enter to return to the main menu...")
+
+def display_conversion_result(source_currency, amount, target_currency, converted_amount, snapshot, symbols):
+    """Display the conversion result with formatting and colors"""
+    frame = Frame(clear=False)
+    frame.line(Fore.CYAN + "\n" + "=" * 60)
+    
+    # Result box with blue background
+    frame.line(Fore.WHITE + Back.BLUE + """
+    ╔═══════════════════════════════════════════════════════╗
+    ║                   CONVERSION RESULT                    ║
+    ╚═══════════════════════════════════════════════════════╝
+    """ + Style.RESET_ALL)
+    
+    source_symbol = symbols.get(source_currency, '')
+    target_symbol = symbols.get(target_currency, '')
+    
+    # Result with bright green color for the amounts
+    frame.line(Fore.WHITE + f"      {Fore.GREEN}{Style.BRIGHT}{amount:.2f} {source_currency} {source_symbol}{Fore.WHITE} = "
+               f"{Fore.GREEN}{Style.BRIGHT}{converted_amount:.2f} {target_currency} {target_symbol}")
+    frame.line(Fore.WHITE + f"      Rate: 1 {source_currency} = {Fore.YELLOW}{snapshot.rate(source_currency, target_currency):.4f} {target_currency}")
+    if snapshot.uses_stored_rates(source_currency, target_currency):
+        route = " → ".join(snapshot.route(source_currency, target_currency))
+        frame.line(Fore.WHITE + Style.DIM + f"      Via stored rates: {route}")
+    
+    frame.line(Fore.CYAN + "\n" + "=" * 60)
+    frame.show()
+
+def require_numpy():
+    """Import NumPy on demand so the interactive converter runs without it"""
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError("Batch conversion requires NumPy (pip install numpy)") from None
+    return numpy
+
+def rate_quotes(rates, cost, base=None):
+    """Turn a code -> rate dict into (base, code, rate, cost) quotes, skipping placeholder and missing rates"""
+    if base is None:
+        ones = [code for code in ("EUR", "USD") + tuple(sorted(rates)) if rates.get(code) == 1.0]
+        base = ones[0] if ones else None
+    if base is None:
+        return []
+    return [(base, code, rate, cost) for code, rate in rates.items()
+            if code != base and isinstance(rate, (int, float)) and 0 < rate < float('inf')]
+
+class ConversionGraph:
+    """All-pairs cheapest conversion paths over quoted rates, found once with a vectorized Floyd–Warshall
+    
+    Each quote is an edge in both directions carrying its log rate and a cost, so
+    live quotes can be preferred over stored ones. Relaxing through every currency
+    k at once leaves matrix[i, j] as the rate along the cheapest path, NaN where no
+    path exists, and via[i, j] as the intermediate currency that path goes through.
+    """
+    
+    def __init__(self, codes, quotes):
+        np = require_numpy()
+        self.codes = tuple(codes)
+        self.index = {code: i for i, code in enumerate(self.codes)}
+        count = len(self.codes)
+        cost = np.full((count, count), np.inf)
+        np.fill_diagonal(cost, 0.0)
+        log_rate = np.zeros((count, count))
+        
+        for source, target, rate, weight in quotes:
+            i, j = self.index.get(source), self.index.get(target)
+            if i is None or j is None or weight >= cost[i, j]:
+                continue
+            cost[i, j] = cost[j, i] = weight
+            log_rate[i, j] = np.log(rate)
+            log_rate[j, i] = -log_rate[i, j]
+        
+        via = np.full((count, count), -1, dtype=np.int32)
+        for k in range(count):
+            # A currency with no quotes can't be an intermediate, which skips most placeholders
+            if np.count_nonzero(np.isfinite(cost[:, k])) < 2:
+                continue
+            through = cost[:, k, np.newaxis] + cost[np.newaxis, k, :]
+            better = through < cost
+            if better.any():
+                cost[better] = through[better]
+                log_rate[better] = (log_rate[:, k, np.newaxis] + log_rate[np.newaxis, k, :])[better]
+                via[better] = k
+        
+        self.cost = cost
+        self.via = via
+        self.matrix = np.where(np.isfinite(cost), np.exp(log_rate), np.nan)
+        for array in (self.cost, self.via, self.matrix):
+            array.flags.writeable = False
+    
+    def route(self, source, target):
+        """Return the currencies the cheapest source -> target path passes through, or None if unreachable"""
+        i, j = self.index[source], self.index[target]
+        if self.cost[i, j] == float('inf'):
+            return None
+        
+        def expand(i, j):
+            k = int(self.via[i, j])
+            return [i, j] if k < 0 else expand(i, k)[:-1] + expand(k, j)
+        return [self.codes[k] for k in expand(i, j)] if i != j else [source]
+    
+    @classmethod
+    def from_arrays(cls, codes, cost, matrix, via):
+        """Rebuild a graph from the arrays an earlier one found, such as views of a shared segment"""
+        graph = cls.__new__(cls)
+        graph.codes = tuple(codes)
+        graph.index = {code: i for i, code in enumerate(graph.codes)}
+        graph.cost, graph.matrix, graph.via = cost, matrix, via
+        return graph
+
+# Target-minor-per-source-minor rates as fractions, padded with an unusable border row and column so
+# unknown (-1) indices land on it; the int64 copies feed the vectorized path
+MinorRates = namedtuple("MinorRates", "numerators denominators usable fast_numerators fast_denominators fast_limits")
+
+class RateSnapshot:
+    """Rates normalized to their real base once, with a precomputed N×N cross-rate matrix"""
+    
+    def __init__(self, rates, base=None, date=None, fallback=None):
+        np = require_numpy()
+        self.date = date
+        self.codes = tuple(sorted(rates))
+        self.index = {code: i for i, code in enumerate(self.codes)}
+        
+        # Without an explicit base, the base is the currency quoted at exactly 1.0
+        if base is None:
+            ones = [code for code in ("EUR", "USD") + self.codes if rates.get(code) == 1.0]
+            base = ones[0] if ones else None
+        self.base = base
+        
+        # Missing and placeholder rates become NaN so they can never divide by zero
+        vector = np.array([rates[code] or np.nan for code in self.codes], dtype=np.float64)
+        if base in self.index:
+            vector /= vector[self.index[base]]
+        
+        # matrix[i, j] is the number of codes[j] units bought by one unit of codes[i]
+        self.graph = None
+        if fallback and base in self.index and not np.isfinite(vector).all():
+            # Currencies without a live quote are reached through stored rates, at a higher cost per hop
+            quotes = rate_quotes(rates, ROUTE_LIVE_COST, base) + rate_quotes(fallback, ROUTE_STORED_COST)
+            self.graph = ConversionGraph(self.codes, quotes)
+            
+            # Live pairs keep their exact direct cross rates; only the gaps take rates from the graph
+            live = np.isfinite(vector)
+            direct = vector[np.newaxis, :] / vector[:, np.newaxis]
+            self.matrix = np.where(live[:, np.newaxis] & live[np.newaxis, :], direct, self.graph.matrix)
+            vector = np.where(live, vector, self.graph.matrix[self.index[base]])
+        else:
+            self.matrix = vector[np.newaxis, :] / vector[:, np.newaxis]
+        self.vector = vector
+        self.vector.flags.writeable = False
+        self.matrix.flags.writeable = False
+        self._minor_rates = None
+    
+    @classmethod
+    def from_payload(cls, payload):
+        """Build a snapshot from a VATcomply /rates payload, adding the base currency itself"""
+        base = payload.get('base', 'EUR')
+        rates = dict(payload.get('rates', {}))
+        rates.setdefault(base, 1.0)
+        return cls(rates, base, payload.get('date'))
+    
+    def __contains__(self, code):
+        return code in self.index
+    
+    def __len__(self):
+        return len(self.codes)
+    
+    def rate(self, source, target):
+        """Return how many target units one source unit buys"""
+        return float(self.matrix[self.index[source], self.index[target]])
+    
+    def row(self, source):
+        """Return a read-only view of one source currency against every code, without copying"""
+        return self.matrix[self.index[source]]
+    
+    def has_rate(self, code):
+        """Tell whether any live or stored rate connects code to the base"""
+        return bool(self.vector[self.index[code]] == self.vector[self.index[code]])
+    
+    def route(self, source, target):
+        """Return the currencies a source -> target conversion passes through, or None if no rates connect them"""
+        if self.graph is not None:
+            return self.graph.route(source, target)
+        if self.rate(source, target) != self.rate(source, target):
+            return None
+        return list(dict.fromkeys([source, self.base or source, target]))
+    
+    def uses_stored_rates(self, source, target):
+        """Tell whether the source -> target rate depends on a stored fallback quote"""
+        if self.graph is None:
+            return False
+        cost = self.graph.cost[self.index[source], self.index[target]]
+        return ROUTE_STORED_COST <= cost < float('inf')
+    
+    def unavailable_reason(self, source, target):
+        """Explain why no rate connects source and target"""
+        missing = [code for code in dict.fromkeys((source, target)) if not self.has_rate(code)]
+        if missing:
+            return f"{' and '.join(missing)} {'has' if len(missing) == 1 else 'have'} no live or stored exchange rate"
+        return f"No chain of known rates connects {source} to {target}"
+    
+    @counted("currency_conversions_total", kind="single")
+    def convert(self, amount, source, target):
+        """Convert an amount between two currencies"""
+        return amount * self.rate(source, target)
+    
+    def as_dict(self):
+        """Return the normalized rates as a plain code -> rate dict"""
+        return dict(zip(self.codes, self.vector.tolist()))
+    
+    def minor_rates(self):
+        """Return the minor-unit cross rates as MinorRates, built once per snapshot
+        
+        Pairs of quoted rates are exact fractions. A rate derived by division (a
+        rebased or routed rate) carries every digit of its float64, so it becomes
+        the closest fraction whose numerator × denominator fits int64: within
+        about 1e-18 of the float, finer than the float itself.
+        """
+        if self._minor_rates is None:
+            np = require_numpy()
+            n = len(self.codes)
+            
+            # Each rate is read back as the decimal it was quoted as (the float's shortest repr), so
+            # source -> target is exactly (units_s * scaled_t) / (scaled_s * units_t)
+            scaled = np.zeros(n + 1, dtype=object)
+            units = np.zeros(n + 1, dtype=object)
+            for i, (code, rate) in enumerate(zip(self.codes, self.vector.tolist())):
+                if math.isfinite(rate) and rate > 0:
+                    quote = Fraction(decimal.Decimal(repr(rate)))
+                    scaled[i] = quote.numerator * 10 ** currency_exponent(code)
+                    units[i] = quote.denominator
+            numerators = np.multiply.outer(units, scaled)
+            denominators = np.multiply.outer(scaled, units)
+            usable = (denominators != 0).astype(bool)
+            common = np.frompyfunc(math.gcd, 2, 1)(numerators, denominators)
+            common[~usable] = 1
+            numerators //= common
+            denominators //= common
+            for i, j in np.argwhere(usable & (numerators * denominators > INT64_MAX).astype(bool)).tolist():
+                numerators[i, j], denominators[i, j] = limit_fraction(numerators[i, j], denominators[i, j], INT64_MAX)
+            
+            # Only a rate above INT64_MAX itself can still be too wide; such a pair has no usable rate
+            usable &= (numerators * denominators <= INT64_MAX).astype(bool)
+            fast_numerators = np.where(usable, numerators, 0).astype(np.int64)
+            fast_denominators = np.where(usable, denominators, 1).astype(np.int64)
+            fast_limits = np.where(usable, INT64_MAX // np.maximum(fast_numerators, 1), -1).astype(np.int64)
+            for array in (numerators, denominators, usable, fast_numerators, fast_denominators, fast_limits):
+                array.flags.writeable = False
+            self._minor_rates = MinorRates(numerators, denominators, usable, fast_numerators, fast_denominators, fast_limits)
+        return self._minor_rates
+
+def currency_exponent(code):
+    """Return the ISO 4217 minor unit exponent of a currency (2 unless listed otherwise)"""
+    return CURRENCY_EXPONENTS.get(code, 2)
+
+def to_minor_units(amount, code):
+    """Turn a decimal amount (string, int or Decimal) into integer minor units, rounding half-even"""
+    exponent = currency_exponent(code)
+    return int(decimal.Decimal(str(amount)).scaleb(exponent).quantize(decimal.Decimal(1), rounding=decimal.ROUND_HALF_EVEN))
+
+def format_minor_units(minor, code):
+    """Format integer minor units as a decimal string with the currency's exponent"""
+    exponent = currency_exponent(code)
+    return str(decimal.Decimal(int(minor)).scaleb(-exponent))
+
+def limit_fraction(numerator, denominator, bound):
+    """Return the fraction closest to numerator / denominator whose numerator × denominator is at most bound"""
+    rate = Fraction(numerator, denominator)
+    # Denominators up to sqrt(bound / rate) keep the product near bound
+    max_denominator = max(1, math.isqrt(bound * denominator // max(numerator, 1)))
+    while True:
+        limited = rate.limit_denominator(max_denominator)
+        if limited.numerator * limited.denominator <= bound or max_denominator == 1:
+            return limited.numerator, limited.denominator
+        max_denominator //= 2
+
+def round_quotient(whole, remainder, denominator, rounding):
+    """Round whole + remainder / denominator (0 <= remainder < denominator) with half-even or half-up rules"""
+    # Comparing the remainder with what is left of the denominator avoids doubling it past int64
+    rest = denominator - remainder
+    if rounding == "half-up":
+        return whole + (remainder >= rest)
+    if rounding == "half-even":
+        # An odd whole part tips an exact half upwards, to the even neighbour
+        return whole + ((remainder > rest) | ((remainder == rest) & ((whole & 1) == 1)))
+    raise ValueError(f"Unknown rounding mode: {rounding} (use 'half-even' or 'half-up')")
+
+def convert_minor_exact(amount, numerator, denominator, rounding):
+    """Convert minor units by an integer fraction with Python ints; halves round on the magnitude"""
+    whole, remainder = divmod(abs(int(amount)) * int(numerator), int(denominator))
+    result = int(round_quotient(whole, remainder, int(denominator), rounding))
+    return -result if amount < 0 else result
+
+@counted("currency_conversions_total", kind="minor")
+def convert_minor(amount, source, target, snapshot, rounding="half-even"):
+    """Convert integer minor units exactly using the snapshot's integer rate fractions"""
+    rates = snapshot.minor_rates()
+    pair = snapshot.index[source], snapshot.index[target]
+    if not rates.usable[pair]:
+        raise ValueError(f"No rate available for {source}/{target}")
+    return convert_minor_exact(amount, rates.numerators[pair], rates.denominators[pair], rounding)
+
+@counted("currency_conversions_total", size=lambda result: result[0].size, kind="minor_batch")
+def convert_minor_batch(amounts, from_codes, to_codes, snapshot, rounding="half-even", out=None):
+    """Convert int64 minor-unit arrays exactly; returns the results and a mask of rows with a rate and an int64 result"""
+    np = require_numpy()
+    amounts = np.asarray(amounts, dtype=np.int64)
+    from_idx = intern_currency_codes(from_codes, snapshot.index)
+    to_idx = intern_currency_codes(to_codes, snapshot.index)
+    
+    # Unknown (-1) indices wrap onto the unusable border of the (n + 1) x (n + 1) rate matrices
+    rates = snapshot.minor_rates()
+    n = len(snapshot.codes)
+    shape = np.broadcast(amounts, from_idx, to_idx).shape
+    amounts = np.broadcast_to(amounts, shape)
+    pairs = np.broadcast_to(from_idx * (n + 1) + to_idx, shape)
+    valid = rates.usable.ravel()[pairs]
+    numerators, denominators, limits = (rates.fast_numerators.ravel(), rates.fast_denominators.ravel(),
+                                        rates.fast_limits.ravel())
+    if out is None:
+        out = np.empty(shape, dtype=np.int64)
+    
+    # Work through cache-sized blocks so the integer passes stay in L2
+    flat_amounts, flat_pairs, flat_out, flat_valid = amounts.ravel(), pairs.ravel(), out.reshape(-1), valid.reshape(-1)
+    for start in range(0, flat_amounts.size, MINOR_BATCH_BLOCK):
+        block = slice(start, start + MINOR_BATCH_BLOCK)
+        block_pairs = flat_pairs[block]
+        numerator, denominator = numerators[block_pairs], denominators[block_pairs]
+        
+        # |a| * numerator is exact in int64 up to the pair's limit (abs of the int64 minimum stays negative)
+        magnitude = np.abs(flat_amounts[block])
+        fast = (magnitude >= 0) & (magnitude <= limits[block_pairs])
+        product = np.where(fast, magnitude, 0) * numerator
+        whole = product // denominator
+        result = round_quotient(whole, product - whole * denominator, denominator, rounding)
+        
+        # Past the limit, splitting |a| = q * denominator + r keeps every step in int64: r * numerator
+        # stays below numerator * denominator, and q under the limit leaves room for the rounded result
+        split = np.flatnonzero(~fast & (magnitude > 0) & flat_valid[block])
+        if split.size:
+            split_numerator, split_denominator = numerator[split], denominator[split]
+            quotient, rest = np.divmod(magnitude[split], split_denominator)
+            part, remainder = np.divmod(rest * split_numerator, split_denominator)
+            fits = quotient < limits[block_pairs[split]]
+            whole = np.where(fits, quotient, 0) * split_numerator + part
+            result[split] = round_quotient(whole, remainder, split_denominator, rounding)
+            fast[split] = fits
+        np.negative(result, out=result, where=flat_amounts[block] < 0)
+        flat_out[block] = result
+        
+        # Results at the edge of int64 are worked out on Python ints in object arrays; beyond it they are invalid
+        slow = np.flatnonzero(~fast & flat_valid[block])
+        if slow.size:
+            slow_pairs = block_pairs[slow]
+            slow_denominators = rates.denominators.ravel()[slow_pairs]
+            signed = flat_amounts[block][slow].astype(object)
+            product = np.abs(signed) * rates.numerators.ravel()[slow_pairs]
+            whole = product // slow_denominators
+            remainder = product - whole * slow_denominators
+            result = round_quotient(whole, remainder, slow_denominators, rounding)
+            result = np.where(signed < 0, -result, result)
+            fits = ((result >= -INT64_MAX - 1) & (result <= INT64_MAX)).astype(bool)
+            flat_out[start + slow] = np.where(fits, result, 0).astype(np.int64)
+            flat_valid[start + slow] = fits
+    return out, valid
+
+def build_rate_table(rates, fallback=None):
+    """Build a code->index map and a float64 rate array; missing and placeholder rates become NaN
+    
+    With fallback, currencies without a live rate are filled in through the same
+    stored-rate graph RateSnapshot uses, so batches convert every pair the menu can.
+    """
+    np = require_numpy()
+    if fallback:
+        snapshot = RateSnapshot(rates, fallback=fallback)
+        return dict(snapshot.index), snapshot.vector
+    codes = sorted(rates)
+    index = {code: i for i, code in enumerate(codes)}
+    table = np.array([rates[code] or np.nan for code in codes], dtype=np.float64)
+    return index, table
+
+def currency_code_keys(codes):
+    """Pack codes of up to 8 ASCII characters into case-folded uint64 keys, or None if they don't fit"""
+    np = require_numpy()
+    codes = np.ascontiguousarray(codes)
+    unicode = codes.dtype.kind == "U"
+    chars = codes.view(np.uint32 if unicode else np.uint8).reshape(codes.shape + (-1,))
+    if chars.shape[-1] > 8 or (unicode and chars.size and chars.max() > 127):
+        return None
+    packed = np.zeros(codes.shape + (8,), dtype=np.uint8)
+    packed[..., :chars.shape[-1]] = chars
+    
+    # Clearing bit 0x20 upper-cases letters; other characters fold consistently on both sides
+    keys = packed.view(np.uint64)[..., 0]
+    keys &= np.uint64(0xDFDFDFDFDFDFDFDF)
+    return keys
+
+@functools.lru_cache(maxsize=8)
+def currency_code_hash(index_items):
+    """Find a collision-free modulus for the known code keys and build its lookup tables"""
+    np = require_numpy()
+    codes = [code for code, _ in index_items if len(code) <= 8]
+    keys = currency_code_keys(np.array(codes, dtype="U8"))
+    modulus = max(1, len(keys))
+    while np.unique(keys % np.uint64(modulus)).size < len(keys):
+        modulus += 1
+    slots = (keys % np.uint64(modulus)).astype(np.int64)
+    slot_keys = np.zeros(modulus, dtype=np.uint64)
+    slot_idx = np.full(modulus, -1, dtype=np.int64)
+    slot_keys[slots] = keys
+    slot_idx[slots] = [i for code, i in index_items if len(code) <= 8]
+    return np.uint64(modulus), slot_keys, slot_idx
+
+@functools.lru_cache(maxsize=8)
+def currency_code_table(index_items):
+    """Map every case spelling of the known 7-bit codes of up to 3 characters to its index, in one dense table"""
+    np = require_numpy()
+    table = np.full(1 << 21, -1, dtype=np.int16)
+    for code, i in index_items:
+        if len(code) <= 3 and code.isascii():
+            # Each character takes 7 bits; every upper/lower-case combination of the letters gets the entry
+            for spelling in itertools.product(*({char.upper(), char.lower()} for char in code)):
+                table[sum(ord(char) << (14 - 7 * k) for k, char in enumerate(spelling))] = i
+    return table
+
+def intern_currency_codes(codes, index):
+    """Turn a code, a sequence of codes or an index array into an int64 index array (-1 if unknown)"""
+    np = require_numpy()
+    if isinstance(codes, str):
+        return np.array(index.get(codes.upper(), -1), dtype=np.int64)
+    codes = np.asarray(codes)
+    if codes.dtype.kind in "iu":
+        return codes.astype(np.int64, copy=False)
+    
+    # ISO-style codes of up to 3 characters index the dense table directly, one gather per row
+    if codes.dtype.kind in "US" and len(index) < 1 << 15:
+        chars = np.ascontiguousarray(codes).view(np.uint32 if codes.dtype.kind == "U" else np.uint8)
+        chars = chars.reshape(codes.shape + (-1,))
+        if chars.shape[-1] <= 3 and not (chars.size and chars.max() > 127):
+            chars = chars.astype(np.uint32, copy=False)
+            keys = np.zeros(codes.shape, dtype=np.uint32)
+            for k in range(chars.shape[-1]):
+                keys |= chars[..., k] << np.uint32(14 - 7 * k)
+            return np.take(currency_code_table(tuple(sorted(index.items()))), keys).astype(np.int64)
+    
+    keys = currency_code_keys(codes) if codes.dtype.kind in "US" else None
+    if keys is None:
+        return np.array([index.get(str(code).upper(), -1) for code in codes.ravel().tolist()], dtype=np.int64).reshape(codes.shape)
+    
+    # Hash the packed keys into a small table, so no Python object is created per row
+    modulus, slot_keys, slot_idx = currency_code_hash(tuple(sorted(index.items())))
+    slots = keys % modulus
+    return np.where(slot_keys[slots] == keys, slot_idx[slots], -1)
+
+@counted("currency_conversions_total", size=lambda result: result.size, kind="batch")
+def convert_batch(amounts, from_codes, to_codes, rates, out=None):
+    """Convert arrays of amounts between currencies in one vectorized pass; unknown pairs give NaN"""
+    np = require_numpy()
+    if isinstance(rates, RateSnapshot):
+        index, table = rates.index, rates.vector
+    else:
+        index, table = rates if isinstance(rates, tuple) else build_rate_table(rates)
+    amounts = np.asarray(amounts, dtype=np.float64)
+    
+    # Unknown codes intern to -1, which indexes a trailing NaN slot instead of raising
+    padded = np.append(table, np.nan)
+    from_idx = intern_currency_codes(from_codes, index)
+    to_idx = intern_currency_codes(to_codes, index)
+    
+    # Same cross rate as RateSnapshot: amount * rate[target] / rate[source]
+    if out is None:
+        out = np.empty(np.broadcast(amounts, from_idx, to_idx).shape, dtype=np.float64)
+    np.divide(padded[to_idx], padded[from_idx], out=out)
+    with np.errstate(over='ignore'):
+        # Huge amounts overflow to inf, which callers reject along with NaN
+        np.multiply(out, amounts, out=out)
+    return out
+
+class Portfolio:
+    """Positions held as arrays and valued in several report currencies at once
+    
+    Each position is converted to the snapshot's base, and those base values are
+    summed per held currency. Every report total is then the base total times one
+    rate. When a new snapshot arrives, update() recomputes only the held currencies
+    whose rate moved, so the cost scales with the number of changed rates rather
+    than the number of positions. The valuation is replaced with one reference
+    swap, so readers on other threads never see a mix of two snapshots.
+    """
+    
+    def __init__(self, amounts, codes, report_currencies):
+        np = require_numpy()
+        self.amounts = np.asarray(amounts, dtype=np.float64)
+        held, positions = np.unique(np.char.upper(np.asarray(codes, dtype=str)), return_inverse=True)
+        self.codes = tuple(held.tolist())
+        self.positions = positions.ravel()
+        self.holdings = np.bincount(self.positions, weights=self.amounts, minlength=len(self.codes))
+        self.report_currencies = tuple(code.upper() for code in report_currencies)
+        
+        # (snapshot, base rate of each held currency or NaN, base value held in each currency)
+        self.state = None
+        self._interned = None  # (snapshot codes, held index, report index) reused while the codes don't change
+    
+    @property
+    def snapshot(self):
+        return self.state[0] if self.state else None
+    
+    def intern(self, snapshot):
+        """Return the snapshot indices of the held and report currencies (-1 if unknown)"""
+        interned = self._interned
+        if interned is None or interned[0] != snapshot.codes:
+            interned = self._interned = (snapshot.codes, intern_currency_codes(list(self.codes), snapshot.index),
+                                         intern_currency_codes(list(self.report_currencies), snapshot.index))
+        return interned[1:]
+    
+    @staticmethod
+    def base_rates(snapshot, index):
+        """Look up base rates by snapshot index, giving NaN for unknown currencies"""
+        np = require_numpy()
+        return np.append(snapshot.vector, np.nan)[index]
+    
+    def revalue(self, live):
+        """Value every position against a snapshot from scratch; returns the number of currencies valued"""
+        np = require_numpy()
+        snapshot = getattr(live, 'snapshot', live)
+        held, _ = self.intern(snapshot)
+        rates = self.base_rates(snapshot, held)
+        contributions = np.bincount(self.positions, weights=self.amounts / rates[self.positions], minlength=len(self.codes))
+        self.state = (snapshot, rates, contributions)
+        return len(self.codes)
+    
+    def update(self, live):
+        """Move to a new snapshot, recomputing only currencies whose rate changed; returns how many were"""
+        np = require_numpy()
+        snapshot = getattr(live, 'snapshot', live)
+        if self.state is None or snapshot.base != self.state[0].base:
+            return self.revalue(snapshot)
+        
+        _, old_rates, contributions = self.state
+        held, _ = self.intern(snapshot)
+        rates = self.base_rates(snapshot, held)
+        changed = np.flatnonzero((rates != old_rates) & ~(np.isnan(rates) & np.isnan(old_rates)))
+        contributions = contributions.copy()
+        contributions[changed] = self.holdings[changed] / rates[changed]
+        self.state = (snapshot, rates, contributions)
+        return len(changed)
+    
+    def unvalued(self):
+        """Return the held currencies the current snapshot has no rate for"""
+        return [code for code, rate in zip(self.codes, self.state[1].tolist()) if rate != rate]
+    
+    def report_rates(self, snapshot):
+        _, report = self.intern(snapshot)
+        return self.base_rates(snapshot, report)
+    
+    def totals(self):
+        """Return the whole portfolio's value in each report currency, leaving out unvalued holdings"""
+        np = require_numpy()
+        snapshot, _, contributions = self.state
+        totals = np.nansum(contributions) * self.report_rates(snapshot)
+        return dict(zip(self.report_currencies, totals.tolist()))
+    
+    def breakdown(self):
+        """Return the value of each held currency (rows) in each report currency (columns)"""
+        np = require_numpy()
+        snapshot, _, contributions = self.state
+        return np.outer(contributions, self.report_rates(snapshot))
+    
+    def valuations(self):
+        """Return every position's value (rows) in each report currency (columns) in one vectorized pass"""
+        np = require_numpy()
+        snapshot, rates, _ = self.state
+        return np.outer(self.amounts / rates[self.positions], self.report_rates(snapshot))
+
+def fan_out(live, code):
+    """Return (codes, values) for what one unit of code buys in every currency with a rate, highest first"""
+    np = require_numpy()
+    snapshot = getattr(live, 'snapshot', live)
+    row = snapshot.row(code)
+    order = np.argsort(-row, kind='stable')
+    order = order[~np.isnan(row[order])]
+    return [snapshot.codes[i] for i in order.tolist()], row[order]
+
+def detect_record_format(path, requested=None):
+    """Pick csv or jsonl from an explicit choice or the file extension"""
+    if requested:
+        return requested
+    if path and path.lower().endswith((".jsonl", ".ndjson", ".json")):
+        return "jsonl"
+    return "csv"
+
+def parse_record_chunk(lines, record_format):
+    """Parse a chunk of input lines into amount/from/to columns plus the lines and rows they came from"""
+    np = require_numpy()
+    rows = list(csv.reader(lines, skipinitialspace=True)) if record_format == "csv" else None
+    
+    # Fast path: a clean CSV chunk is parsed column by column
+    if rows and min(map(len, rows)) >= 3:
+        try:
+            amounts, sources, targets = list(zip(*rows))[:3]
+            return np.array(amounts).astype(np.float64), sources, targets, list(zip(lines, rows)), []
+        except ValueError:
+            pass  # Some amount is malformed; sort the rows out one by one
+    
+    amounts, sources, targets, records, rejects = [], [], [], [], []
+    for line, row in zip(lines, rows or lines):
+        try:
+            if record_format == "csv":
+                amount, source, target = row[0], row[1], row[2]
+            else:
+                row = json.loads(line)
+                amount, source, target = row['amount'], row['from'], row['to']
+            amount = float(amount)
+            source = str(source).strip().upper()
+            target = str(target).strip().upper()
+        except (ValueError, OverflowError, IndexError, KeyError, TypeError):
+            if line.strip():
+                rejects.append((line.rstrip("\r\n"), "malformed record"))
+            continue
+        amounts.append(amount)
+        sources.append(source)
+        targets.append(target)
+        records.append((line, row))
+    return np.array(amounts, dtype=np.float64), sources, targets, records, rejects
+
+def stream_convert(infile, outfile, rates, record_format="csv", chunk_size=PIPELINE_CHUNK_SIZE,
+                   rejects_file=None, precision=2):
+    """Convert amount,from,to records chunk by chunk so memory stays flat for any input size
+    
+    rates is a code -> rate dict, routed through the stored fallback rates like the
+    menu, or a prebuilt (index, table) pair from build_rate_table.
+    """
+    np = require_numpy()
+    table = rates if isinstance(rates, tuple) else build_rate_table(rates, get_fallback_rates())
+    stats = {"rows": 0, "converted": 0, "rejected": 0}
+    start = time.perf_counter()
+    rejects_writer = csv.writer(rejects_file, lineterminator="\n") if rejects_file else None
+    first_chunk = True
+    
+    while True:
+        lines = list(itertools.islice(infile, chunk_size))
+        if not lines:
+            break
+        
+        # A CSV header is passed through with an extra column
+        if first_chunk and record_format == "csv" and lines[0].lower().startswith("amount"):
+            outfile.write(lines[0].rstrip("\r\n") + ",converted\n")
+            lines = lines[1:]
+        first_chunk = False
+        
+        amounts, sources, targets, records, rejects = parse_record_chunk(lines, record_format)
+        stats['rows'] += len(records) + len(rejects)
+        converted = convert_batch(amounts, sources, targets, table)
+        valid = np.isfinite(converted)
+        
+        output = []
+        for (line, row), amount, value, ok, source, target in zip(records, amounts.tolist(), converted.tolist(),
+                                                                  valid.tolist(), sources, targets):
+            line = line.rstrip("\r\n")
+            if not math.isfinite(amount):
+                rejects.append((line, "invalid amount"))
+            elif value != value:
+                rejects.append((line, f"unsupported pair {source}/{target}"))
+            elif not ok:
+                rejects.append((line, "result out of range"))
+            elif record_format == "csv":
+                output.append(f"{line},{value:.{precision}f}\n")
+            else:
+                row['converted'] = round(value, precision)
+                output.append(json.dumps(row, separators=(',', ':')) + "\n")
+        outfile.write("".join(output))
+        
+        stats['converted'] += len(output)
+        stats['rejected'] += len(rejects)
+        if rejects_writer:
+            rejects_writer.writerows(rejects)
+    
+    stats['elapsed'] = time.perf_counter() - start
+    return stats
+
+def plan_shards(path, workers, max_shard_size=PIPELINE_SHARD_SIZE):
+    """Split a file into (start, end) byte ranges that each begin and end on a line boundary"""
+    size = os.path.getsize(path)
+    count = max(workers * PIPELINE_SHARDS_PER_WORKER, -(-size // max_shard_size))
+    bounds = [0]
+    with open(path, "rb") as f:
+        for i in range(1, count):
+            target = max(size * i // count, bounds[-1])
+            if target >= size:
+                break
+            # Move the cut to just past the next newline, so no record straddles two shards
+            f.seek(target)
+            f.readline()
+            position = f.tell()
+            if bounds[-1] < position < size:
+                bounds.append(position)
+    bounds.append(size)
+    return list(zip(bounds, bounds[1:]))
+
+def init_shard_worker(table, record_format, chunk_size, precision):
+    """Receive the rate table once per worker process, instead of with every shard"""
+    _shard_worker.update(table=table, record_format=record_format, chunk_size=chunk_size, precision=precision)
+
+def convert_shard(path, start, end, part_path=None):
+    """Convert one byte range of a file, returning its output (unless written to part_path), rejects and stats"""
+    with open(path, "rb") as f:
+        f.seek(start)
+        data = f.read(end - start)
+    infile = io.TextIOWrapper(io.BytesIO(data), encoding="utf-8", newline="")
+    outfile = open(part_path, "w", newline="", encoding="utf-8") if part_path else io.StringIO()
+    rejects_file = io.StringIO()
+    try:
+        stats = stream_convert(infile, outfile, _shard_worker['table'], _shard_worker['record_format'],
+                               _shard_worker['chunk_size'], rejects_file, _shard_worker['precision'])
+        output = None if part_path else outfile.getvalue()
+    finally:
+        outfile.close()
+    return output, rejects_file.getvalue(), stats
+
+def sharded_convert(path, outfile, rates, workers, record_format="csv", chunk_size=PIPELINE_CHUNK_SIZE,
+                    rejects_file=None, precision=2, part_prefix=None, max_shard_size=PIPELINE_SHARD_SIZE):
+    """Convert a file in line-aligned shards on a process pool, merging output in the original order
+    
+    With part_prefix, each shard is written to its own numbered file instead and
+    outfile is left untouched. At most two shards per worker are in flight, so
+    memory stays bounded however large the file is.
+    """
+    start = time.perf_counter()
+    shards = plan_shards(path, workers, max_shard_size)
+    stats = {"rows": 0, "converted": 0, "rejected": 0, "shards": len(shards), "workers": workers}
+    table = build_rate_table(rates, get_fallback_rates())
+    
+    with process_pool.ProcessPoolExecutor(workers, initializer=init_shard_worker,
+                                          initargs=(table, record_format, chunk_size, precision)) as executor:
+        pending = deque()
+        shard_iter = iter(enumerate(shards))
+        while True:
+            # Keep a bounded window of shards queued, and take their results strictly in submission order
+            for i, (shard_start, shard_end) in itertools.islice(shard_iter, 2 * workers - len(pending)):
+                part_path = f"{part_prefix}.part{i:05d}" if part_prefix else None
+                pending.append(executor.submit(convert_shard, path, shard_start, shard_end, part_path))
+            if not pending:
+                break
+            output, rejects, shard_stats = pending.popleft().result()
+            if output:
+                outfile.write(output)
+            if rejects_file and rejects:
+                rejects_file.write(rejects)
+            for key in ("rows", "converted", "rejected"):
+                stats[key] += shard_stats[key]
+    
+    # Conversions ran in the workers, so they are counted here once their results are in
+    if METRICS_ENABLED:
+        METRICS.inc("currency_conversions_total", stats['converted'], kind="batch")
+    stats['elapsed'] = time.perf_counter() - start
+    return stats
+
+def run_pipeline(args):
+    """Run the non-interactive conversion pipeline over a file or stdin"""
+    success, rates, date, source = load_rates_snapshot()
+    if not success:
+        rates, date, source = get_fallback_rates(), None, "stored fallback rates"
+    print(Fore.YELLOW + f"Using rates as of {date} ({source})", file=sys.stderr)
+    
+    record_format = detect_record_format(args.input, args.format)
+    sharded = args.workers > 1 and args.input not in (None, "-")
+    if args.split and (not sharded or args.output in (None, "-")):
+        print(Fore.RED + "--split needs --workers above 1, an input file and an --output path to number the parts after", file=sys.stderr)
+        return 2
+    
+    infile = sys.stdin if args.input in (None, "-") or sharded else open(args.input, newline="", encoding="utf-8")
+    outfile = sys.stdout if args.output in (None, "-") or args.split else open(args.output, "w", newline="", encoding="utf-8")
+    rejects_file = open(args.rejects, "w", newline="", encoding="utf-8") if args.rejects else None
+    try:
+        if sharded:
+            stats = sharded_convert(args.input, outfile, rates, args.workers, record_format, args.chunk_size,
+                                    rejects_file, args.precision, args.output if args.split else None)
+        else:
+            stats = stream_convert(infile, outfile, rates, record_format, args.chunk_size, rejects_file, args.precision)
+    finally:
+        for f in (infile, outfile, rejects_file):
+            if f not in (None, sys.stdin, sys.stdout):
+                f.close()
+    
+    rate = stats['rows'] / stats['elapsed'] if stats['elapsed'] else 0.0
+    print(Fore.GREEN + f"✓ {stats['converted']} of {stats['rows']} rows converted, {stats['rejected']} rejected "
+          f"in {stats['elapsed']:.2f}s ({rate:,.0f} rows/s)", file=sys.stderr)
+    if sharded:
+        print(Fore.WHITE + f"  {stats['shards']} shards on {stats['workers']} workers", file=sys.stderr)
+    return 0 if stats['rejected'] == 0 else 1
+
+def date_ordinal(day):
+    """Turn a date, datetime or YYYY-MM-DD string into a proleptic Gregorian ordinal"""
+    if isinstance(day, str):
+        day = datetime.strptime(day, "%Y-%m-%d")
+    return day.toordinal()
+
+class HistoricalRateStore:
+    """Memory-mapped file with one row per day and one float64 column per currency
+    
+    The file is a fixed header (magic, version, currency count, base code and the
+    column codes) followed by rows of [day ordinal, rate per currency] relative to
+    the base. Rows are kept in date order and new days are appended in place, so
+    lookups are binary searches over a mapped array and never parse JSON.
+    """
+    
+    HEADER = struct.Struct("<8sII8s")
+    
+    def __init__(self, path=None, codes=None, base="EUR"):
+        self.path = path or HISTORY_FILE
+        if not os.path.exists(self.path) or os.path.getsize(self.path) == 0:
+            codes = sorted(set(codes or set(get_all_currency_symbols()) | set(get_fallback_rates())) | {base})
+            self.create(codes, base)
+        
+        with open(self.path, "rb") as f:
+            magic, version, count, base_code = self.HEADER.unpack(f.read(self.HEADER.size))
+            if magic != HISTORY_MAGIC or version != HISTORY_VERSION:
+                raise ValueError(f"{self.path} is not a version {HISTORY_VERSION} rate history file")
+            self.codes = tuple(f.read(8).rstrip(b"\0").decode("ascii") for _ in range(count))
+        self.base = base_code.rstrip(b"\0").decode("ascii")
+        self.index = {code: i for i, code in enumerate(self.codes)}
+        self.header_size = self.data_offset(count)
+        self.row_size = 8 * (count + 1)
+        self._mmap = None
+        self.remap()
+    
+    @staticmethod
+    def data_offset(count):
+        """Return the byte offset of the first row, aligned to 8 bytes"""
+        size = HistoricalRateStore.HEADER.size + 8 * count
+        return (size + 7) // 8 * 8
+    
+    def create(self, codes, base):
+        """Write an empty store with the given currency columns"""
+        directory = os.path.dirname(self.path) or "."
+        os.makedirs(directory, exist_ok=True)
+        header = self.HEADER.pack(HISTORY_MAGIC, HISTORY_VERSION, len(codes), base.encode("ascii"))
+        header += b"".join(code.encode("ascii")[:8].ljust(8, b"\0") for code in codes)
+        with open(self.path, "wb") as f:
+            f.write(header.ljust(self.data_offset(len(codes)), b"\0"))
+    
+    def release(self):
+        """Drop the mapped views and close the map so the file can be resized or replaced"""
+        self.data = self.days = None
+        if self._mmap is not None:
+            try:
+                self._mmap.close()
+            except BufferError:
+                pass  # A caller still holds a view; the map is freed once that view goes away
+            self._mmap = None
+    
+    def remap(self):
+        """Map the current file contents; a torn trailing row from a crashed append is ignored"""
+        np = require_numpy()
+        self.release()
+        size = os.path.getsize(self.path)
+        rows = max(0, size - self.header_size) // self.row_size
+        if rows:
+            with open(self.path, "rb") as f:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self.data = np.frombuffer(self._mmap, dtype="<f8", count=rows * (len(self.codes) + 1),
+                                      offset=self.header_size).reshape(rows, len(self.codes) + 1)
+        else:
+            self.data = np.empty((0, len(self.codes) + 1), dtype="<f8")
+        self.days = self.data[:, 0]
+    
+    def __len__(self):
+        return len(self.data)
+    
+    def __contains__(self, day):
+        ordinal = date_ordinal(day)
+        pos = self.days.searchsorted(ordinal)
+        return pos < len(self.days) and self.days[pos] == ordinal
+    
+    def last_date(self):
+        """Return the most recent stored day, or None for an empty store"""
+        return datetime.fromordinal(int(self.days[-1])).date() if len(self) else None
+    
+    def append_days(self, days):
+        """Add (day, rates, base) records not stored yet; later days are appended in a single write"""
+        np = require_numpy()
+        rows = {}
+        for day, rates, base in days:
+            ordinal = date_ordinal(day)
+            if ordinal in rows or day in self:
+                continue
+            row = np.full(len(self.codes) + 1, np.nan)
+            row[0] = ordinal
+            
+            # Rebase onto the store's base currency before writing
+            rates = dict(rates)
+            rates.setdefault(base, 1.0)
+            divisor = rates.get(self.base) or np.nan
+            for code, rate in rates.items():
+                if code in self.index and rate:
+                    row[self.index[code] + 1] = rate / divisor
+            rows[ordinal] = row
+        if not rows:
+            return 0
+        
+        block = np.stack([rows[ordinal] for ordinal in sorted(rows)]).astype("<f8")
+        if len(self) and block[0, 0] < self.days[-1]:
+            # Earlier days have to be merged in, which rewrites the file
+            self.rewrite(np.concatenate([self.data, block]))
+        else:
+            # Start right after the last whole row, dropping any torn write
+            end = self.header_size + len(self) * self.row_size
+            self.release()
+            with open(self.path, "r+b") as f:
+                f.seek(end)
+                f.truncate()
+                f.write(block.tobytes())
+            self.remap()
+        return len(rows)
+    
+    def rewrite(self, data):
+        """Atomically replace all rows with data, sorted by day"""
+        np = require_numpy()
+        data = data[np.argsort(data[:, 0], kind="stable")]
+        with open(self.path, "rb") as f:
+            header = f.read(self.header_size)
+        payload = header + data.astype("<f8").tobytes()
+        self.release()
+        atomic_write(self.path, payload)
+        self.remap()
+    
+    def row_index(self, ordinals):
+        """Return the row of the latest stored day on or before each ordinal (-1 if none)"""
+        return self.days.searchsorted(ordinals, side="right") - 1
+    
+    def rate(self, source, target, day):
+        """Return the source/target rate on a day, using the latest earlier day for gaps"""
+        row = int(self.row_index(date_ordinal(day)))
+        if row < 0:
+            raise KeyError(f"No rates stored on or before {day}")
+        values = self.data[row]
+        return float(values[self.index[target] + 1] / values[self.index[source] + 1])
+    
+    def column(self, code, start=None, end=None):
+        """Return (days, rates) of one currency against the base between two dates, as zero-copy views"""
+        lo = 0 if start is None else int(self.days.searchsorted(date_ordinal(start)))
+        hi = len(self) if end is None else int(self.days.searchsorted(date_ordinal(end), side="right"))
+        return self.days[lo:hi], self.data[lo:hi, self.index[code] + 1]
+    
+    def series(self, source, target, start=None, end=None):
+        """Return (days, rates) for a pair between two dates; views when one side is the base"""
+        days, target_rates = self.column(target, start, end)
+        if source == self.base:
+            return days, target_rates
+        _, source_rates = self.column(source, start, end)
+        return days, target_rates / source_rates
+    
+    @counted("currency_conversions_total", size=lambda result: result.size, kind="dated")
+    def convert_dated(self, amounts, from_codes, to_codes, days):
+        """Convert a batch of dated transactions at each day's historical rate (NaN if unknown)"""
+        np = require_numpy()
+        if len(self) == 0:
+            return np.full(np.shape(amounts), np.nan)
+        days = np.asarray(days)
+        if days.dtype.kind not in "iu":
+            days = np.asarray(days, dtype="datetime64[D]").astype(np.int64) + EPOCH_ORDINAL
+        
+        rows = self.row_index(days)
+        from_idx = intern_currency_codes(from_codes, self.index)
+        to_idx = intern_currency_codes(to_codes, self.index)
+        
+        # Days before the first row and unknown codes (-1) read the mapped rows through a clamped index,
+        # then are masked to NaN, so the store is never copied; rate columns start after the day column
+        known = (rows >= 0) & (from_idx >= 0) & (to_idx >= 0)
+        rows = np.maximum(rows, 0)
+        converted = (np.asarray(amounts, dtype=np.float64) * self.data[rows, np.maximum(to_idx, 0) + 1]
+                     / self.data[rows, np.maximum(from_idx, 0) + 1])
+        return np.where(known, converted, np.nan)
+
+class TokenBucket:
+    """Thread-safe token bucket that makes callers wait so requests stay under a rate limit"""
+    
+    def __init__(self, rate, burst=None):
+        self.rate = float(rate)
+        self.capacity = float(burst or max(1.0, self.rate))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def take(self):
+        """Take one token if one is available; returns 0, or the seconds until the next one"""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0.0
+            return (1 - self.tokens) / self.rate
+    
+    def acquire(self):
+        """Take one token, sleeping until one is available; returns the seconds spent waiting"""
+        waited = 0.0
+        while True:
+            delay = self.take()
+            if not delay:
+                return waited
+            time.sleep(delay)
+            waited += delay
+    
+    async def acquire_async(self):
+        """Take one token without blocking the event loop; returns the seconds spent waiting"""
+        waited = 0.0
+        while True:
+            delay = self.take()
+            if not delay:
+                return waited
+            await asyncio.sleep(delay)
+            waited += delay
+
+def load_backfill_checkpoint(path):
+    """Return the set of day ordinals a previous backfill already completed"""
+    try:
+        with open(path, encoding='utf-8') as f:
+            return set(json.load(f).get('done', []))
+    except (OSError, ValueError):
+        return set()
+
+def save_backfill_checkpoint(path, done):
+    """Persist the completed day ordinals of a backfill"""
+    atomic_write(path, json.dumps({"version": 1, "done": sorted(done)}, separators=(',', ':')).encode('utf-8'))
+
+def backfill_history(start, end, store=None, client=None, workers=BACKFILL_WORKERS, rate_limit=BACKFILL_RATE_LIMIT,
+                     checkpoint_path=None, flush_days=BACKFILL_FLUSH_DAYS, progress=None):
+    """Fetch every day of a date range from /rates?date= into the historical store, resumably"""
+    store = HistoricalRateStore() if store is None else store
+    client = client or get_api_client()
+    checkpoint_path = checkpoint_path or store.path + ".checkpoint"
+    start, end = datetime.fromordinal(date_ordinal(start)).date(), datetime.fromordinal(date_ordinal(end)).date()
+    
+    # Days already stored or finished by an interrupted run are skipped
+    done = load_backfill_checkpoint(checkpoint_path)
+    days = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+    pending = [day for day in days if day.toordinal() not in done and day not in store]
+    stats = {"days": len(days), "skipped": len(days) - len(pending), "fetched": 0, "stored": 0, "failed": 0}
+    started = time.perf_counter()
+    
+    bucket = TokenBucket(rate_limit)
+    results = {}
+    buffer = []
+    
+    def fetch(day):
+        bucket.acquire()
+        return client.get_json("/rates", params={"date": day.isoformat()})
+    
+    def flush():
+        # Weekends and holidays come back dated to the previous business day
+        records, completed = [], []
+        for day, payload in buffer:
+            if not payload:
+                continue
+            if not isinstance(payload, dict) or not payload.get('date'):
+                stats['failed'] += 1  # Malformed response, retried on the next run
+                continue
+            records.append((payload['date'], payload.get('rates', {}), payload.get('base', 'EUR')))
+            completed.append(day.toordinal())
+        stats['stored'] += store.append_days(records)
+        done.update(completed)
+        save_backfill_checkpoint(checkpoint_path, done)
+        buffer.clear()
+        if progress:
+            progress(stats)
+    
+    pool = ThreadPoolExecutor(max_workers=max(1, workers))
+    futures = {pool.submit(fetch, day): day for day in pending}
+    flushed = 0
+    try:
+        for future in as_completed(futures):
+            day = futures[future]
+            try:
+                results[day] = future.result()
+                stats['fetched'] += 1
+            except (requests.RequestException, ValueError):
+                results[day] = None  # Retried on the next run
+                stats['failed'] += 1
+            
+            # Days are written in date order, so the store only ever appends
+            while flushed < len(pending) and pending[flushed] in results:
+                buffer.append((pending[flushed], results.pop(pending[flushed])))
+                flushed += 1
+            if len(buffer) >= flush_days:
+                flush()
+    finally:
+        for future in futures:
+            future.cancel()
+        pool.shutdown(wait=True)
+        if buffer:
+            flush()
+    
+    stats['elapsed'] = time.perf_counter() - started
+    return stats
+
+def run_backfill(args):
+    """Run the historical backfill command"""
+    store = HistoricalRateStore(args.store) if args.store else HistoricalRateStore()
+    end = args.end or datetime.now().date().isoformat()
+    print(Fore.YELLOW + f"Backfilling {args.start} to {end} into {store.path}...")
+    
+    def progress(stats):
+        print(Fore.WHITE + f"  {stats['fetched'] + stats['failed']}/{stats['days'] - stats['skipped']} fetched, {stats['stored']} days stored")
+    
+    stats = backfill_history(args.start, end, store, workers=args.workers, rate_limit=args.rate, progress=progress)
+    print(Fore.GREEN + f"✓ {stats['stored']} days stored, {stats['skipped']} already present, {stats['failed']} failed "
+          f"in {stats['elapsed']:.1f}s")
+    return 0 if stats['failed'] == 0 else 1
+
+def load_service_rates():
+    """Load LiveRates for non-interactive modes, quietly falling back to stored rates"""
+    success, rates, date, source = load_rates_snapshot()
+    if not success:
+        rates, date, source = get_fallback_rates(), None, "stored fallback rates"
+    return build_live_rates(rates, date, source)
+
+def parse_amount(value):
+    """Read a JSON amount as a float; integers too large for one become NaN and are rejected as invalid"""
+    try:
+        return float(value)
+    except OverflowError:
+        return float('nan')
+
+class ConversionService:
+    """Long-running asyncio HTTP/1.1 service answering /convert, /rate and /rates from memory"""
+    
+    def __init__(self, snapshot):
+        self.snapshot = snapshot
+        self._rates_cache = {}
+    
+    def json_response(self, status, payload):
+        return status, json.dumps(payload, separators=(',', ':'), allow_nan=False).encode('utf-8'), "application/json"
+    
+    def error(self, status, message):
+        return self.json_response(status, {"error": message})
+    
+    def dispatch(self, method, target, body):
+        """Answer one request; returns (status, body bytes, content type)"""
+        path, _, query = target.partition("?")
+        params = {key: values[-1] for key, values in parse_qs(query).items()}
+        snapshot = self.snapshot
+        
+        if path == "/convert" and method == "GET":
+            return self.convert_many(snapshot, [params], single=True)
+        if path == "/convert" and method == "POST":
+            try:
+                items = json.loads(body or b"null")
+            except ValueError:
+                return self.error(400, "Body must be JSON")
+            if isinstance(items, dict):
+                items = items.get('conversions', [items])
+            if not isinstance(items, list) or not all(isinstance(item, dict) for item in items):
+                return self.error(400, "Body must be a conversion object or a list of them")
+            return self.convert_many(snapshot, items, single=False)
+        if path == "/rate" and method == "GET":
+            source = params.get('from', '').upper()
+            target_code = params.get('to', '').upper()
+            if source not in snapshot or target_code not in snapshot:
+                return self.error(400, f"Unsupported pair {source}/{target_code}")
+            rate = snapshot.rate(source, target_code)
+            if rate != rate:
+                return self.error(422, snapshot.unavailable_reason(source, target_code))
+            return self.json_response(200, {"from": source, "to": target_code, "rate": rate, "date": snapshot.date})
+        if path == "/rates" and method == "GET":
+            return self.rates_response(snapshot, params.get('base', snapshot.base or 'EUR').upper())
+        if path == "/metrics" and method == "GET":
+            return 200, METRICS.prometheus().encode('utf-8'), PROMETHEUS_CONTENT_TYPE
+        if path in SERVICE_PATHS:
+            return self.error(405, f"{method} is not allowed on {path}")
+        return self.error(404, f"Unknown path {path}")
+    
+    def convert_many(self, snapshot, items, single):
+        """Convert one or many {amount, from, to} items in a single vectorized pass"""
+        try:
+            amounts = [parse_amount(item.get('amount', 1)) for item in items]
+        except (TypeError, ValueError):
+            return self.error(400, "Every amount must be a number")
+        sources = [str(item.get('from', '')).upper() for item in items]
+        targets = [str(item.get('to', '')).upper() for item in items]
+        if len(items) <= SERVICE_SCALAR_ITEMS:
+            # Small requests are cheaper as matrix lookups than a batch round trip through NumPy
+            converted = [snapshot.convert(amount, source, target) if source in snapshot and target in snapshot else float('nan')
+                         for amount, source, target in zip(amounts, sources, targets)]
+        else:
+            converted = convert_batch(amounts, sources, targets, snapshot).tolist()
+        
+        results = []
+        for amount, source, target, value in zip(amounts, sources, targets, converted):
+            if not math.isfinite(amount):
+                results.append({"from": source, "to": target, "error": "Invalid amount, must be a finite number"})
+            elif value != value:
+                known = source in snapshot and target in snapshot
+                reason = snapshot.unavailable_reason(source, target) if known else f"Unsupported pair {source}/{target}"
+                results.append({"from": source, "to": target, "error": reason})
+            elif not math.isfinite(value):
+                results.append({"from": source, "to": target, "error": "Result is out of range"})
+            else:
+                results.append({"amount": amount, "from": source, "to": target, "result": value})
+        if single:
+            return self.json_response(400 if 'error' in results[0] else 200, dict(results[0], date=snapshot.date))
+        return self.json_response(200, {"date": snapshot.date, "results": results})
+    
+    def rates_response(self, snapshot, base):
+        """Return every rate against base; encoded once per snapshot and base"""
+        key = (snapshot, base)
+        if key not in self._rates_cache:
+            if base not in snapshot:
+                return self.error(400, f"Unsupported base {base}")
+            row = snapshot.row(base).tolist()
+            rates = {code: rate for code, rate in zip(snapshot.codes, row) if rate == rate}
+            if len(self._rates_cache) > 256:
+                self._rates_cache.clear()
+            self._rates_cache[key] = self.json_response(200, {"base": base, "date": snapshot.date, "rates": rates})
+        return self._rates_cache[key]
+    
+    @staticmethod
+    def parse_head(head):
+        """Split a request head into method, target, version and lower-cased headers, raising ValueError if malformed"""
+        lines = head.decode('latin-1').split("\r\n")
+        method, target, version = lines[0].split(" ", 2)
+        if not method or not target.startswith("/") or not version.startswith("HTTP/"):
+            raise ValueError(f"Malformed request line {lines[0]!r}")
+        headers = dict((name.strip().lower(), value.strip()) for name, _, value in
+                       (line.partition(":") for line in lines[1:] if line))
+        length = int(headers.get('content-length') or 0)
+        if length < 0:
+            raise ValueError(f"Negative Content-Length {length}")
+        return method, target, version, headers, length
+    
+    @staticmethod
+    def close_with(writer, status):
+        """Answer with an empty status-only response and ask the client to close"""
+        writer.write(f"HTTP/1.1 {status} {HTTP_REASONS[status]}\r\nContent-Length: 0\r\nConnection: close\r\n\r\n".encode('latin-1'))
+    
+    async def handle_connection(self, reader, writer):
+        """Serve requests on one keep-alive connection until the client closes it"""
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                try:
+                    method, target, version, headers, length = self.parse_head(head)
+                except ValueError:
+                    self.close_with(writer, 400)
+                    break
+                if length > SERVICE_MAX_BODY:
+                    self.close_with(writer, 413)
+                    break
+                body = await reader.readexactly(length) if length else b""
+                
+                start = time.perf_counter()
+                try:
+                    status, payload, content_type = self.dispatch(method, target, body)
+                except Exception as e:
+                    # A bug in one request must still get an answer rather than a silently dropped connection
+                    record_error("conversion_service", e)
+                    self.close_with(writer, 500)
+                    break
+                elapsed = time.perf_counter() - start
+                if METRICS_ENABLED:
+                    path = target.partition("?")[0]
+                    METRICS.observe("currency_service_request_seconds", elapsed, path=path if path in SERVICE_PATHS else "other", status=status)
+                
+                connection = headers.get('connection', '').lower()
+                keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+                writer.write((f"HTTP/1.1 {status} {HTTP_REASONS.get(status, 'OK')}\r\n"
+                              f"Content-Type: {content_type}\r\nContent-Length: {len(payload)}\r\n"
+                              f"Server-Timing: app;dur={elapsed * 1000:.4f}\r\n"
+                              f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n").encode('latin-1') + payload)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+            pass  # Client went away or sent an oversized head
+        finally:
+            writer.close()
+    
+    async def start(self, host="127.0.0.1", port=SERVICE_PORT, reuse_port=False):
+        """Start listening and return the asyncio server"""
+        return await asyncio.start_server(self.handle_connection, host, port, reuse_port=reuse_port or None)
+    
+    async def follow_shared(self, interval=SHARED_POLL_INTERVAL):
+        """Keep serving the newest shared snapshot, checking for a new generation every interval"""
+        while True:
+            await asyncio.sleep(interval)
+            self.snapshot = self.snapshot.latest()
+
+def run_service_worker(name, host, port):
+    """Serve one worker process from the published shared snapshot, without fetching or parsing any rates"""
+    service = ConversionService(SharedRateSnapshot(name))
+    
+    async def serve():
+        server = await service.start(host, port, reuse_port=True)
+        follower = asyncio.create_task(service.follow_shared())
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            follower.cancel()
+    
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+def run_service_workers(args, live):
+    """Publish rates to shared memory and serve them from several worker processes on one port"""
+    with SharedRatePublisher(args.shared_name) as publisher:
+        publisher.publish(live)
+        workers = [multiprocessing.Process(target=run_service_worker, args=(args.shared_name, args.host, args.port), daemon=True)
+                   for _ in range(args.workers)]
+        for worker in workers:
+            worker.start()
+        
+        # Workers start before the refresh thread does; new rates reach them through the shared segment
+        refresher = RateRefresher(live, args.refresh, on_publish=publisher.publish).start()
+        print(Fore.GREEN + f"✓ Serving {len(live.snapshot)} currencies as of {live.date} ({live.source}) "
+              f"on http://{args.host}:{args.port} with {args.workers} workers")
+        try:
+            for worker in workers:
+                worker.join()
+        except KeyboardInterrupt:
+            print(Fore.YELLOW + "\nService stopped.")
+        finally:
+            refresher.stop()
+            for worker in workers:
+                worker.join(1)
+                if worker.is_alive():
+                    worker.terminate()
+    return 0
+
+def run_service(args):
+    """Run the HTTP conversion service until interrupted, swapping in refreshed rates as they arrive"""
+    live = load_service_rates()
+    if args.workers > 1:
+        return run_service_workers(args, live)
+    snapshot = live.snapshot
+    service = ConversionService(snapshot)
+    refresher = RateRefresher(live, args.refresh, on_publish=lambda live: setattr(service, 'snapshot', live.snapshot)).start()
+    
+    async def serve():
+        server = await service.start(args.host, args.port)
+        print(Fore.GREEN + f"✓ Serving {len(snapshot)} currencies as of {snapshot.date} ({live.source}) on http://{args.host}:{args.port}")
+        async with server:
+            await server.serve_forever()
+    
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        print(Fore.YELLOW + "\nService stopped.")
+    finally:
+        refresher.stop()
+    return 0
+
+def percentile(sorted_values, fraction):
+    """Return the value at a fraction of a sorted list (nearest rank)"""
+    if not sorted_values:
+        return float('nan')
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+async def load_test(host, port, path="/convert?amount=100&from=EUR&to=JPY", connections=32, requests_total=20000, method="GET", body=b""):
+    """Drive the service over keep-alive connections and collect client and server latencies"""
+    client_latencies = []
+    server_latencies = []
+    errors = 0
+    request = (f"{method} {path} HTTP/1.1\r\nHost: {host}\r\nContent-Length: {len(body)}\r\n\r\n").encode('latin-1') + body
+    
+    async def worker(count):
+        nonlocal errors
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            for _ in range(count):
+                start = time.perf_counter()
+                writer.write(request)
+                head = (await reader.readuntil(b"\r\n\r\n")).decode('latin-1')
+                length = int(head.split("Content-Length: ", 1)[1].split("\r\n", 1)[0])
+                await reader.readexactly(length)
+                client_latencies.append(time.perf_counter() - start)
+                if not head.startswith("HTTP/1.1 200"):
+                    errors += 1
+                if "Server-Timing: app;dur=" in head:
+                    server_latencies.append(float(head.split("Server-Timing: app;dur=", 1)[1].split("\r\n", 1)[0]) / 1000)
+        finally:
+            writer.close()
+    
+    per_connection, extra = divmod(requests_total, connections)
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(per_connection + (i < extra)) for i in range(connections)))
+    elapsed = time.perf_counter() - start
+    
+    client_latencies.sort()
+    server_latencies.sort()
+    return {
+        "requests": len(client_latencies),
+        "errors": errors,
+        "elapsed": elapsed,
+        "rps": len(client_latencies) / elapsed if elapsed else 0.0,
+        "client_p50_us": percentile(client_latencies, 0.50) * 1e6,
+        "client_p99_us": percentile(client_latencies, 0.99) * 1e6,
+        "server_p50_us": percentile(server_latencies, 0.50) * 1e6,
+        "server_p99_us": percentile(server_latencies, 0.99) * 1e6,
+    }
+
+def run_loadtest(args):
+    """Load test a running service, or an in-process one when no port is given"""
+    async def run():
+        server = None
+        host, port = args.host, args.port
+        if port is None:
+            server = await ConversionService(load_service_rates().snapshot).start(host, 0)
+            port = server.sockets[0].getsockname()[1]
+        try:
+            return await load_test(host, port, args.path, args.connections, args.requests)
+        finally:
+            if server:
+                server.close()
+                await server.wait_closed()
+    
+    stats = asyncio.run(run())
+    print(Fore.GREEN + f"✓ {stats['requests']} requests ({stats['errors']} errors) in {stats['elapsed']:.2f}s, {stats['rps']:,.0f} req/s")
+    print(Fore.WHITE + f"  client latency p50 {stats['client_p50_us']:,.0f}µs  p99 {stats['client_p99_us']:,.0f}µs")
+    print(Fore.WHITE + f"  server latency p50 {stats['server_p50_us']:,.1f}µs  p99 {stats['server_p99_us']:,.1f}µs")
+    return 0 if stats['errors'] == 0 else 1
+
+def bench_payloads(path=None):
+    """Return the recorded /rates, /currencies and /geolocate payloads served by the benchmark stub"""
+    if path:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    
+    # Without a recording, derive a stable EUR-based payload from the stored fallback rates
+    fallback = get_fallback_rates()
+    symbols = get_all_currency_symbols()
+    names = get_fallback_currency_names()
+    return {
+        "/rates": {"base": "EUR", "date": BENCH_DATE, "rates": {code: rate / fallback['EUR'] for code, rate in fallback.items()}},
+        "/currencies": {code: {"name": names.get(code, code), "symbol": symbols.get(code, code)} for code in fallback},
+        "/geolocate": {"country": {"name": "Germany", "currency": "EUR"}},
+    }
+
+def record_bench_payloads(path, client=None):
+    """Record live API responses for the benchmark stub to replay"""
+    client = client or get_api_client()
+    payloads = {endpoint: client.get_json(endpoint) for endpoint in ("/rates", "/currencies", "/geolocate")}
+    atomic_write(path, json.dumps(payloads, indent=2, sort_keys=True).encode('utf-8'))
+    return payloads
+
+@functools.lru_cache(maxsize=None)
+def bench_stub_handler():
+    """Build the stub API request handler class, importing http.server only when benchmarking"""
+    from http.server import BaseHTTPRequestHandler
+    
+    class BenchStubHandler(BaseHTTPRequestHandler):
+        """Serve recorded payloads like the VATcomply API, including symbol filtering and ETags"""
+        protocol_version = "HTTP/1.1"
+        
+        def log_message(self, format, *args):
+            pass
+        
+        def do_GET(self):
+            path, _, query = self.path.partition("?")
+            payload = self.server.payloads.get(path)
+            if payload is None:
+                self.send_response(404)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            
+            symbols = parse_qs(query).get('symbols')
+            if path == "/rates" and symbols:
+                wanted = set(symbols[0].split(","))
+                payload = dict(payload, rates={code: rate for code, rate in payload['rates'].items() if code in wanted})
+            
+            body = json.dumps(payload).encode('utf-8')
+            etag = f'"{zlib.crc32(body):08x}"'
+            if self.headers.get('If-None-Match') == etag:
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("ETag", etag)
+            self.end_headers()
+            self.wfile.write(body)
+    
+    return BenchStubHandler
+
+def start_stub_server(payloads):
+    """Start the benchmark stub API on a free local port and return (server, base_url)"""
+    from http.server import ThreadingHTTPServer
+    server = ThreadingHTTPServer(("127.0.0.1", 0), bench_stub_handler())
+    server.daemon_threads = True
+    server.payloads = payloads
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+@contextlib.contextmanager
+def null_terminal(answers=("",)):
+    """Send all output, including child processes like clear, to /dev/null and answer input() prompts"""
+    replies = itertools.cycle(answers)
+    sys.stdout.flush()
+    saved_fd, saved_stdout, saved_input = os.dup(1), sys.stdout, builtins.input
+    devnull = open(os.devnull, 'w')
+    os.dup2(devnull.fileno(), 1)
+    sys.stdout = devnull
+    builtins.input = lambda prompt="": next(replies)
+    try:
+        yield
+    finally:
+        sys.stdout.flush()
+        os.dup2(saved_fd, 1)
+        os.close(saved_fd)
+        sys.stdout, builtins.input = saved_stdout, saved_input
+        devnull.close()
+
+def time_benchmark(func, repeat=5, answers=None):
+    """Time func per call with timeit, returning median and best seconds per call"""
+    timer = timeit.Timer(func)
+    if answers is None:
+        number, _ = timer.autorange()
+        times = timer.repeat(repeat, number)
+    else:
+        with null_terminal(answers):
+            number, _ = timer.autorange()
+            times = timer.repeat(repeat, number)
+    per_call = [elapsed / number for elapsed in times]
+    return {"median": statistics.median(per_call), "min": min(per_call), "loops": number, "repeat": repeat}
+
+def time_startup(url, warm, repeat=5):
+    """Time a full interactive startup and exit in a fresh process against the stub API"""
+    times = []
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache_file = os.path.join(cache_dir, os.path.basename(CACHE_FILE))
+        env = dict(os.environ, CURRENCY_API_URL=url, CURRENCY_CACHE_DIR=cache_dir)
+        command = [sys.executable, os.path.abspath(__file__), "--fast", "--refresh", "0"]
+        if warm:
+            subprocess.run(command, input="0\n", env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, text=True)
+        for _ in range(repeat):
+            if not warm and os.path.exists(cache_file):
+                os.remove(cache_file)
+            start = time.perf_counter()
+            subprocess.run(command, input="0\n", env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, text=True)
+            times.append(time.perf_counter() - start)
+    return {"median": statistics.median(times), "min": min(times), "loops": 1, "repeat": repeat}
+
+# Amounts and currency pairs for one batch size
+BenchBatch = namedtuple("BenchBatch", "amounts minor_amounts from_index to_index from_codes to_codes")
+
+def build_benchmarks(payloads, cleanup, sizes=BENCH_SIZES):
+    """Return (name, setup, answers) benchmark cases; setup() returns the function to time, cases with answers run behind a null terminal
+    
+    Only the payload's snapshot is built up front. Batch arrays, portfolios and
+    the shared memory segment are built by the setup of the cases that need
+    them, so a filtered run pays only for what it times. The segment is unlinked
+    through cleanup, an ExitStack the caller closes when the run ends or fails.
+    """
+    np = require_numpy()
+    rates_payload = payloads["/rates"]
+    rates = snapshot_rates({"base": rates_payload.get('base', 'EUR'), "rates": rates_payload['rates'],
+                            "currencies": sorted(payloads["/currencies"])})
+    date = rates_payload.get('date')
+    symbols = get_all_currency_symbols()
+    snapshot = RateSnapshot(rates, date=date)
+    regions = categorize_currencies({}, rates)
+    names = dict(get_fallback_currency_names(), **currency_names(payloads["/currencies"]))
+    rated = [code for code in snapshot.codes if snapshot.vector[snapshot.index[code]] > 0]
+    
+    def ready(func):
+        return lambda: func
+    
+    @functools.lru_cache(maxsize=None)
+    def search():
+        return CurrencySearch(snapshot.codes, names, symbols, regions)
+    
+    @functools.lru_cache(maxsize=None)
+    def batch(size):
+        # Batches draw from currencies that actually have rates, with a fixed seed per size for reproducibility
+        generator = np.random.default_rng([42, size])
+        rated_index = np.array([snapshot.index[code] for code in rated])
+        from_index = rated_index[generator.integers(0, len(rated), size)]
+        to_index = rated_index[generator.integers(0, len(rated), size)]
+        return BenchBatch(generator.uniform(0, 10000, size), generator.integers(0, 10 ** 9, size, dtype=np.int64), from_index,
+                          to_index, np.array(snapshot.codes)[from_index], np.array(snapshot.codes)[to_index])
+    
+    def loop(size):
+        data = batch(size)
+        return functools.partial(bench_scalar_loop, data.amounts.tolist(), data.from_codes.tolist(), data.to_codes.tolist(), rates)
+    
+    def float_batch(size, codes=False):
+        data = batch(size)
+        if codes:
+            return functools.partial(convert_batch, data.amounts, data.from_codes, data.to_codes, snapshot, np.empty(size))
+        return functools.partial(convert_batch, data.amounts, data.from_index, data.to_index, snapshot, np.empty(size))
+    
+    def minor_batch(size, rebased=False):
+        # Rebasing divides every rate by the new base's, so each minor-unit fraction is a limited one
+        rates_used = RateSnapshot(rates, base="USD", date=date, fallback=get_fallback_rates()) if rebased else snapshot
+        data = batch(size)
+        return functools.partial(convert_minor_batch, data.minor_amounts, data.from_index, data.to_index, rates_used,
+                                 "half-even", np.empty(size, dtype=np.int64))
+    
+    def revalue(size):
+        return functools.partial(Portfolio(batch(size).amounts, batch(size).from_codes, BENCH_REPORT_CURRENCIES).revalue, snapshot)
+    
+    def update(size):
+        moved = [code for code in rated if code != snapshot.base][:BENCH_MOVED_RATES]
+        moved_snapshot = RateSnapshot(dict(rates, **{code: rates[code] * 1.001 for code in moved}), date=date)
+        portfolio = Portfolio(batch(size).amounts, batch(size).from_codes, BENCH_REPORT_CURRENCIES)
+        portfolio.revalue(snapshot)
+        return functools.partial(bench_portfolio_update, portfolio, itertools.cycle((moved_snapshot, snapshot)))
+    
+    def graph():
+        quotes = rate_quotes(rates, ROUTE_LIVE_COST) + rate_quotes(get_fallback_rates(), ROUTE_STORED_COST)
+        return lambda: ConversionGraph(snapshot.codes, quotes)
+    
+    def shared_attach():
+        # A private shared segment, so attaching is measured against a full build.live_rates
+        publisher = SharedRatePublisher(f"{SHARED_RATES_NAME}-bench-{os.getpid()}")
+        cleanup.callback(publisher.close)
+        publisher.publish(build_live_rates(rates, date, None, symbols, names))
+        return lambda: SharedRateSnapshot(publisher.name)
+    
+    cases = [
+        ("convert.single.snapshot", ready(lambda: snapshot.convert(100.0, "EUR", "JPY")), None),
+        ("convert.single.minor", ready(lambda: convert_minor(10000, "EUR", "JPY", snapshot)), None),
+        ("convert.single.interactive", ready(lambda: convert_currency(snapshot, symbols, "USD")), ("EUR", "100", "JPY", "")),
+        ("convert.fan_out", ready(lambda: fan_out(snapshot, "USD")), None),
+    ]
+    for size in sizes:
+        cases += [
+            (f"convert.batch.loop.{size}", functools.partial(loop, size), None),
+            (f"convert.batch.float.{size}", functools.partial(float_batch, size), None),
+            (f"convert.batch.codes.{size}", functools.partial(float_batch, size, codes=True), None),
+            (f"convert.batch.minor.{size}", functools.partial(minor_batch, size), None),
+            (f"convert.batch.minor.rebased.{size}", functools.partial(minor_batch, size, rebased=True), None),
+            (f"portfolio.revalue.{size}", functools.partial(revalue, size), None),
+            (f"portfolio.update.{size}", functools.partial(update, size), None),
+        ]
+    
+    cases += [
+        ("build.snapshot", ready(lambda: RateSnapshot(rates, date=date)), None),
+        ("build.regions", ready(lambda: categorize_currencies({}, rates)), None),
+        ("build.graph", graph, None),
+        ("build.minor_rates", ready(lambda: RateSnapshot(rates, base="USD", date=date).minor_rates()), None),
+        ("build.live_rates", ready(lambda: build_live_rates(rates, date, None, symbols, names)), None),
+        ("build.search", ready(lambda: CurrencySearch(snapshot.codes, names, symbols, regions)), None),
+        ("shared.attach", shared_attach, None),
+        ("search.prefix", lambda: functools.partial(search().search, "sw"), None),
+        ("search.fuzzy", lambda: functools.partial(search().search, "japnese"), None),
+        ("render.menu", ready(lambda: display_main_menu("EUR", "Germany")), ("0",)),
+        ("render.currencies", ready(lambda: display_currencies(rates, symbols, regions)), ("",)),
+        ("render.conversion", ready(lambda: display_conversion_result("EUR", 100.0, "JPY", snapshot.convert(100.0, "EUR", "JPY"), snapshot, symbols)), ("",)),
+    ]
+    
+    # Sharded pipeline scaling over one generated file, from a single worker up to every core
+    workers = sorted({1, os.cpu_count() or 1} | {2 ** i for i in range(1, (os.cpu_count() or 1).bit_length())})
+    for count in workers:
+        cases.append((f"pipe.sharded.{count}", ready(functools.partial(bench_sharded_pipeline, rates, rated, count)), None))
+    return cases
+
+@functools.lru_cache(maxsize=1)
+def bench_pipeline_file(codes, rows=BENCH_PIPELINE_ROWS):
+    """Write a reproducible amount,from,to CSV for the pipeline benchmarks, removed at exit"""
+    np = require_numpy()
+    generator = np.random.default_rng(42)
+    amounts = generator.uniform(0, 10000, rows).round(2)
+    pairs = np.array(codes)[generator.integers(0, len(codes), (rows, 2))]
+    f = tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False, newline="", encoding="utf-8")
+    with f:
+        f.write("".join(f"{amount:.2f},{source},{target}\n" for amount, (source, target) in zip(amounts.tolist(), pairs.tolist())))
+    atexit.register(os.remove, f.name)
+    return f.name
+
+def bench_scalar_loop(amounts, from_codes, to_codes, rates):
+    """Convert row by row with plain dict lookups, the baseline the vectorized batches are measured against"""
+    return [amount * rates[target] / rates[source] for amount, source, target in zip(amounts, from_codes, to_codes)]
+
+def bench_portfolio_update(portfolio, snapshots):
+    """Move a portfolio to the next of two alternating snapshots, so every call sees changed rates"""
+    return portfolio.update(next(snapshots))
+
+def bench_sharded_pipeline(rates, codes, workers):
+    """Run the sharded pipeline over the benchmark file, discarding the output"""
+    with open(os.devnull, "w") as devnull:
+        return sharded_convert(bench_pipeline_file(tuple(codes)), devnull, rates, workers)
+
+def run_benchmarks(payloads, url=None, sizes=BENCH_SIZES, repeat=5, name_filter=None, startup=True):
+    """Run every benchmark case and return a results document"""
+    results = {}
+    with contextlib.ExitStack() as cleanup:
+        for name, setup, answers in build_benchmarks(payloads, cleanup, sizes):
+            if name_filter and name_filter not in name:
+                continue
+            results[name] = time_benchmark(setup(), repeat, answers)
+            print(Fore.WHITE + f"  {name:<36} {format_duration(results[name]['median']):>10}", file=sys.stderr)
+    
+    if startup and url:
+        for name, warm in (("startup.cold", False), ("startup.warm", True)):
+            if name_filter and name_filter not in name:
+                continue
+            results[name] = time_startup(url, warm, repeat)
+            print(Fore.WHITE + f"  {name:<36} {format_duration(results[name]['median']):>10}", file=sys.stderr)
+    
+    return {
+        "version": BENCH_VERSION,
+        "created": datetime.now().isoformat(timespec='seconds'),
+        "python": sys.version.split()[0],
+        "platform": sys.platform,
+        "benchmarks": results,
+    }
+
+def format_duration(seconds):
+    """Format seconds with a unit suited to its size"""
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("µs", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.2f}{unit}"
+    return f"{seconds / 1e-9:.0f}ns"
+
+def compare_benchmarks(baseline, current, threshold=BENCH_THRESHOLD):
+    """Return (name, baseline median, current median, change, regressed) for benchmarks in both runs"""
+    rows = []
+    for name, result in current['benchmarks'].items():
+        if name not in baseline['benchmarks']:
+            continue
+        old = baseline['benchmarks'][name]['median']
+        new = result['median']
+        change = (new - old) / old if old else 0.0
+        rows.append((name, old, new, change, change > threshold))
+    return rows
+
+def run_bench(args):
+    """Run the benchmark suite, optionally saving a baseline or comparing against one"""
+    if args.record:
+        record_bench_payloads(args.record)
+        print(Fore.GREEN + f"✓ Recorded API payloads to {args.record}")
+        return 0
+    
+    if args.results:
+        with open(args.results, 'r', encoding='utf-8') as f:
+            current = json.load(f)
+    else:
+        payloads = bench_payloads(args.payloads)
+        server, url = start_stub_server(payloads)
+        try:
+            sizes = tuple(int(size) for size in args.sizes.split(",")) if args.sizes else BENCH_SIZES
+            current = run_benchmarks(payloads, url, sizes, 3 if args.quick else 5, args.filter, not args.no_startup)
+        finally:
+            server.shutdown()
+    
+    if args.save:
+        atomic_write(args.save, json.dumps(current, indent=2, sort_keys=True).encode('utf-8'))
+        print(Fore.GREEN + f"✓ Saved {len(current['benchmarks'])} results to {args.save}")
+    
+    if not args.compare:
+        return 0
+    with open(args.compare, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    
+    rows = compare_benchmarks(baseline, current, args.threshold)
+    print(Fore.CYAN + Style.BRIGHT + f"\n{'Benchmark':<36} {'Baseline':>10} {'Current':>10} {'Change':>8}")
+    for name, old, new, change, regressed in rows:
+        color = Fore.RED if regressed else Fore.GREEN if change < -args.threshold else Fore.WHITE
+        flag = "  REGRESSION" if regressed else ""
+        print(color + f"{name:<36} {format_duration(old):>10} {format_duration(new):>10} {change:>+8.1%}{flag}")
+    
+    regressions = sum(1 for row in rows if row[4])
+    if regressions:
+        print(Fore.RED + f"\n✗ {regressions} benchmark(s) slower than the baseline by more than {args.threshold:.0%}")
+        return 1
+    print(Fore.GREEN + f"\n✓ No regressions beyond {args.threshold:.0%}")
+    return 0
+
+def validator_headers(validators):
+    """Turn stored ETag/Last-Modified validators into conditional request headers"""
+    headers = {}
+    if validators.get('etag'):
+        headers['If-None-Match'] = validators['etag']
+    if validators.get('last_modified'):
+        headers['If-Modified-Since'] = validators['last_modified']
+    return headers
+
+def conditional_get(path, validators=None, client=None):
+    """GET an API path with ETag/If-Modified-Since validators, returning None on 304 Not Modified"""
+    validators = validators or {}
+    response = (client or get_api_client()).get(path, headers=validator_headers(validators))
+    if response.status_code == 304:
+        return None, validators
+    response.raise_for_status()
+    return response.json(), {"etag": response.headers.get('ETag'), "last_modified": response.headers.get('Last-Modified')}
+
+def fetch_rate_snapshot(cached=None, client=None):
+    """Fetch rates, date and currency list as a snapshot, revalidating a cached one if given"""
+    try:
+        validators = cached.get('validators', {}) if cached else {}
+        
+        # Rates and the currency list are revalidated independently
+        rates = conditional_get("/rates", validators.get('rates'), client)
+        currencies = conditional_get("/currencies", validators.get('currencies'), client)
+        return True, merge_snapshot(cached, rates, currencies)
+    except (requests.RequestException, ValueError, KeyError, AttributeError, TypeError) as e:
+        record_error("fetch_rate_snapshot", e)
+        return False, str(e)
+
+def merge_snapshot(cached, rates, currencies):
+    """Build a snapshot from (payload, validators) answers for /rates and /currencies, reusing cached parts on 304"""
+    (rates_data, rates_validators), (currencies_data, currencies_validators) = rates, currencies
+    if (rates_data is None or currencies_data is None) and not cached:
+        raise ValueError("Server answered 304 without a cached snapshot")
+    
+    return {
+        "base": rates_data.get('base', 'EUR') if rates_data is not None else cached['base'],
+        "date": rates_data.get('date') if rates_data is not None else cached['date'],
+        "rates": rates_data.get('rates', {}) if rates_data is not None else cached['rates'],
+        "currencies": sorted(currencies_data) if currencies_data is not None else cached['currencies'],
+        "names": currency_names(currencies_data) if currencies_data is not None else cached.get('names', {}),
+        "validators": {"rates": rates_validators, "currencies": currencies_validators},
+        "fetched_at": time.time(),
+        "revalidated": rates_data is None and currencies_data is None,
+    }
+
+def currency_names(currencies_data):
+    """Extract code -> full name from a /currencies payload"""
+    return {code: info['name'] for code, info in currencies_data.items() if isinstance(info, dict) and info.get('name')}
+
+def load_currency_names(path=None):
+    """Return currency names from the cached snapshot, filled in with the stored fallback names"""
+    names = get_fallback_currency_names()
+    cached = load_cached_snapshot(path)
+    if cached:
+        names.update(cached.get('names', {}))
+    return names
+
+def snapshot_rates(snapshot):
+    """Build the application rates dict from a snapshot, with placeholders for unrated currencies"""
+    rates = dict(snapshot['rates'])
+    rates.setdefault(snapshot['base'], 1.0)  # Add the base currency itself
+    
+    # Create empty rates for currencies that don't have exchange rates yet
+    for code in snapshot['currencies']:
+        if code not in rates:
+            rates[code] = 0.0  # Placeholder
+    return rates
+
+def load_cached_snapshot(path=None):
+    """Load the on-disk rate snapshot, returning None if it is missing or unreadable"""
+    try:
+        with gzip.open(path or CACHE_FILE, 'rt', encoding='utf-8') as f:
+            snapshot = json.load(f)
+        if snapshot.get('version') != CACHE_VERSION:
+            return None
+        return snapshot
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, EOFError) as e:
+        record_error("load_cached_snapshot", e)
+        return None
+
+def atomic_write(path, data):
+    """Write bytes through a temp file and rename, so readers see the old or the new file, never half"""
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix="." + os.path.basename(path) + "-", dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+def save_cached_snapshot(snapshot, path=None):
+    """Atomically write the rate snapshot so concurrent readers never see a partial file"""
+    payload = dict(snapshot, version=CACHE_VERSION)
+    payload.pop('revalidated', None)
+    try:
+        atomic_write(path or CACHE_FILE, gzip.compress(json.dumps(payload, separators=(',', ':')).encode('utf-8')))
+        return True
+    except OSError:
+        return False  # Caching is best effort
+
+class VatcomplyProvider:
+    """Rate provider backed by a VATcomply-compatible HTTP API, revalidating with ETags"""
+    
+    def __init__(self, base_url=None, client=None, name=None):
+        self.base_url = (base_url or API_BASE_URL).rstrip("/")
+        self._client = client
+        self.name = name or self.base_url
+    
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = get_api_client() if self.base_url == API_BASE_URL.rstrip("/") else ApiClient(self.base_url)
+        return self._client
+    
+    def fetch_snapshot(self, cached=None):
+        return fetch_rate_snapshot(cached, self.client)
+
+class FileProvider:
+    """Rate provider that replays recorded /rates and /currencies payloads from a JSON file"""
+    
+    def __init__(self, path, name=None, latency=0.0):
+        self.path = path
+        self.name = name or f"file:{path}"
+        self.latency = latency  # Simulated response time, for exercising hedging
+    
+    def fetch_snapshot(self, cached=None):
+        if self.latency:
+            time.sleep(self.latency)
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                payloads = json.load(f)
+            rates_data, currencies_data = payloads["/rates"], payloads["/currencies"]
+            return True, {
+                "base": rates_data.get('base', 'EUR'),
+                "date": rates_data.get('date'),
+                "rates": rates_data.get('rates', {}),
+                "currencies": sorted(currencies_data),
+                "names": currency_names(currencies_data),
+                "validators": {"rates": None, "currencies": None},
+                "fetched_at": time.time(),
+                "revalidated": False,
+            }
+        except (OSError, ValueError, KeyError, AttributeError) as e:
+            return False, str(e)
+
+def provider_from_spec(spec):
+    """Build a provider from 'vatcomply', an http(s) URL, or 'file:PATH' / a path to recorded payloads"""
+    if spec == "vatcomply":
+        return VatcomplyProvider()
+    if spec.startswith(("http://", "https://")):
+        return VatcomplyProvider(spec)
+    return FileProvider(spec[len("file:"):] if spec.startswith("file:") else spec)
+
+class ProviderHealth:
+    """Rolling latency and failure record for one provider"""
+    
+    def __init__(self, window=PROVIDER_HEALTH_WINDOW):
+        self.latencies = deque(maxlen=window)
+        self.failures = deque(maxlen=window)
+        self._lock = threading.Lock()
+    
+    def record(self, elapsed, success):
+        with self._lock:
+            self.latencies.append(elapsed)
+            self.failures.append(not success)
+    
+    def percentile(self, fraction):
+        """Return a latency percentile, or None until enough calls have been seen"""
+        with self._lock:
+            if len(self.latencies) < PROVIDER_MIN_SAMPLES:
+                return None
+            return percentile(sorted(self.latencies), fraction)
+    
+    def failure_rate(self):
+        with self._lock:
+            return sum(self.failures) / len(self.failures) if self.failures else 0.0
+    
+    def score(self):
+        """Return the expected cost of asking this provider: median latency plus a fixed penalty per recent failure"""
+        median = self.percentile(0.5)
+        return (PROVIDER_HEDGE_DEFAULT if median is None else median) + PROVIDER_FAILURE_PENALTY * self.failure_rate()
+
+class ProviderPool:
+    """Fetch snapshots from the healthiest provider, hedging with the next one when it is slow to answer"""
+    
+    def __init__(self, providers, hedge_percentile=PROVIDER_HEDGE_PERCENTILE, timeout=PROVIDER_TIMEOUT):
+        self.providers = list(providers)
+        self.hedge_percentile = hedge_percentile
+        self.timeout = timeout
+        self.health = {provider.name: ProviderHealth() for provider in self.providers}
+    
+    def ranked(self):
+        """Return providers from healthiest to least healthy; unmeasured ones keep their configured order"""
+        return sorted(self.providers, key=lambda provider: self.health[provider.name].score())
+    
+    def hedge_delay(self, provider):
+        """Return how long to wait for provider before racing the next one"""
+        delay = self.health[provider.name].percentile(self.hedge_percentile)
+        delay = PROVIDER_HEDGE_DEFAULT if delay is None else delay
+        return min(PROVIDER_HEDGE_MAX, max(PROVIDER_HEDGE_MIN, delay))
+    
+    def timed_fetch(self, provider, cached):
+        """Fetch from one provider and record how long it took and whether it worked"""
+        start = time.perf_counter()
+        try:
+            success, result = provider.fetch_snapshot(cached)
+        except Exception as e:
+            record_error("provider", e)
+            success, result = False, str(e)
+        elapsed = time.perf_counter() - start
+        self.health[provider.name].record(elapsed, success)
+        if METRICS_ENABLED:
+            METRICS.observe("currency_provider_seconds", elapsed, provider=provider.name)
+            METRICS.inc("currency_provider_requests_total", provider=provider.name, outcome="ok" if success else "error")
+        return success, result
+    
+    def fetch_snapshot(self, cached=None):
+        """Return (success, snapshot or error) from whichever provider answers successfully first"""
+        ranked = self.ranked()
+        pending = {}
+        errors = []
+        deadline = time.perf_counter() + self.timeout
+        hedge_at = None
+        
+        def launch():
+            nonlocal hedge_at
+            provider = ranked[len(pending) + len(errors)]
+            pending[run_in_background(self.timed_fetch, provider, cached)] = provider
+            hedge_at = time.perf_counter() + self.hedge_delay(provider)
+        
+        launch()
+        while pending:
+            now = time.perf_counter()
+            can_hedge = len(pending) + len(errors) < len(ranked)
+            wake = min(deadline, hedge_at) if can_hedge else deadline
+            done, _ = wait_futures(list(pending), timeout=max(0, wake - now), return_when=FIRST_COMPLETED)
+            
+            for future in done:
+                provider = pending.pop(future)
+                success, result = future.result()
+                if success:
+                    result['provider'] = provider.name
+                    return True, result
+                errors.append(f"{provider.name}: {result}")
+            
+            if time.perf_counter() >= deadline:
+                break
+            if can_hedge and (not pending or time.perf_counter() >= hedge_at):
+                # Fail over at once after an error; otherwise the slow request gets a hedge
+                if pending and METRICS_ENABLED:
+                    METRICS.inc("currency_provider_hedges_total")
+                launch()
+        
+        errors.extend(f"{provider.name}: no answer within {self.timeout:g}s" for provider in pending.values())
+        return False, "; ".join(errors)
+    
+    def stats(self):
+        """Return each provider's health, healthiest first"""
+        return [{
+            "provider": provider.name,
+            "p50": self.health[provider.name].percentile(0.5),
+            "p95": self.health[provider.name].percentile(0.95),
+            "failure_rate": self.health[provider.name].failure_rate(),
+            "score": self.health[provider.name].score(),
+        } for provider in self.ranked()]
+
+def get_provider_pool():
+    """Return the shared provider pool, configured from CURRENCY_PROVIDERS or VATcomply alone"""
+    global _provider_pool
+    if _provider_pool is None:
+        specs = [spec.strip() for spec in os.environ.get("CURRENCY_PROVIDERS", "").split(",") if spec.strip()]
+        configure_providers(specs or ["vatcomply"])
+    return _provider_pool
+
+def configure_providers(specs):
+    """Replace the shared provider pool with one built from provider specs, in priority order"""
+    global _provider_pool
+    _provider_pool = ProviderPool([provider_from_spec(spec) for spec in specs])
+    return _provider_pool
+
+def run_providers(args):
+    """Probe the configured providers and print their measured health"""
+    pool = get_provider_pool()
+    wins = {}
+    for _ in range(args.rounds):
+        success, result = pool.fetch_snapshot()
+        if success:
+            wins[result['provider']] = wins.get(result['provider'], 0) + 1
+        else:
+            print(Fore.RED + f"✗ {result}")
+    
+    def ms(seconds):
+        return "-" if seconds is None else f"{seconds * 1000:,.0f}ms"
+    
+    print(Fore.CYAN + Style.BRIGHT + f"{'Provider':<40} {'Wins':>5} {'p50':>8} {'p95':>8} {'Errors':>7}")
+    for row in pool.stats():
+        print(Fore.WHITE + f"{row['provider']:<40} {wins.get(row['provider'], 0):>5} {ms(row['p50']):>8} "
+              f"{ms(row['p95']):>8} {row['failure_rate']:>7.0%}")
+    return 0 if wins else 1
+
+def load_rates_snapshot(ttl=None, path=None, client=None):
+    """Load rates from the local cache when fresh, otherwise revalidate or refetch from the providers"""
+    ttl = CACHE_TTL if ttl is None else ttl
+    cached = load_cached_snapshot(path)
+    if cached and time.time() - cached.get('fetched_at', 0) < ttl:
+        if METRICS_ENABLED:
+            METRICS.inc("currency_cache_lookups_total", result="hit")
+        return True, snapshot_rates(cached), cached['date'], "cache"
+    
+    # An explicit client pins the request to that API; otherwise the provider pool picks and hedges
+    if client is not None:
+        success, snapshot = fetch_rate_snapshot(cached, client)
+    else:
+        success, snapshot = get_provider_pool().fetch_snapshot(cached)
+    if success:
+        save_cached_snapshot(snapshot, path)
+        if METRICS_ENABLED:
+            METRICS.inc("currency_cache_lookups_total", result="revalidated" if snapshot['revalidated'] else "miss")
+        source = "revalidated cache" if snapshot['revalidated'] else "live API"
+        return True, snapshot_rates(snapshot), snapshot['date'], source
+    
+    # A stale snapshot still beats the hard-coded fallback rates
+    if METRICS_ENABLED:
+        METRICS.inc("currency_cache_lookups_total", result="stale" if cached else "failed")
+    if cached:
+        return True, snapshot_rates(cached), cached['date'], "stale cache"
+    return False, snapshot, None, None
+
+async def gather_all(*awaitables):
+    """Await everything concurrently like asyncio.gather, but cancel the rest as soon as one fails"""
+    tasks = [asyncio.ensure_future(awaitable) for awaitable in awaitables]
+    try:
+        return await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+
+async def conditional_fetch(path, validators=None, client=None):
+    """Non-blocking conditional_get: GET with validators, returning None on 304 Not Modified"""
+    validators = validators or {}
+    response = await (client or get_async_client()).get(path, headers=validator_headers(validators))
+    if response.status_code == 304:
+        return None, validators
+    response.raise_for_status()
+    return response.json(), {"etag": response.headers.get('etag'), "last_modified": response.headers.get('last-modified')}
+
+async def fetch_snapshot(cached=None, client=None):
+    """Fetch rates and the currency list concurrently as a snapshot, revalidating a cached one if given"""
+    validators = cached.get('validators', {}) if cached else {}
+    rates, currencies = await gather_all(conditional_fetch("/rates", validators.get('rates'), client),
+                                         conditional_fetch("/currencies", validators.get('currencies'), client))
+    return merge_snapshot(cached, rates, currencies)
+
+async def pool_snapshot(pool, cached=None):
+    """Fetch a snapshot through a ProviderPool on a worker thread, raising if no provider answered"""
+    success, snapshot = await asyncio.wrap_future(run_in_background(pool.fetch_snapshot, cached))
+    if not success:
+        raise requests.ConnectionError(snapshot)
+    return snapshot
+
+async def load_rates(ttl=None, path=None, client=None, timeout=None, symbols=None):
+    """Load a LiveRates without blocking: fresh cache, else a concurrent revalidating fetch, else stale cache or stored rates
+    
+    timeout bounds the fetch, after which the stale cache or stored rates are
+    used; LiveRates.source tells which one answered. Cancelling the caller
+    cancels the requests in flight. symbols may be a mapping or an awaitable
+    of one, so it can be loaded while the requests are in flight.
+    """
+    ttl = CACHE_TTL if ttl is None else ttl
+    cached = load_cached_snapshot(path)
+    if cached and time.time() - cached.get('fetched_at', 0) < ttl:
+        snapshot, source, result = cached, "cache", "hit"
+    else:
+        # Configured extra providers keep their hedging pool on a worker thread; VATcomply alone is fetched natively
+        pool = get_provider_pool() if client is None else None
+        if pool is not None and [provider.name for provider in pool.providers] != [API_BASE_URL.rstrip("/")]:
+            fetch = pool_snapshot(pool, cached)
+        else:
+            fetch = fetch_snapshot(cached, client)
+        try:
+            snapshot = await asyncio.wait_for(fetch, timeout)
+        except (requests.RequestException, asyncio.TimeoutError, ValueError, KeyError, AttributeError, TypeError) as e:
+            record_error("load_rates", e)
+            snapshot, source, result = cached, "stale cache", "stale" if cached else "failed"
+        else:
+            save_cached_snapshot(snapshot, path)
+            source = "revalidated cache" if snapshot['revalidated'] else "live API"
+            result = "revalidated" if snapshot['revalidated'] else "miss"
+    if METRICS_ENABLED:
+        METRICS.inc("currency_cache_lookups_total", result=result)
+    if inspect.isawaitable(symbols):
+        symbols = await symbols
+    
+    if snapshot is None:
+        return build_live_rates(get_fallback_rates(), None, "stored rates", symbols)
+    names = get_fallback_currency_names()
+    names.update(snapshot.get('names', {}))
+    return build_live_rates(snapshot_rates(snapshot), snapshot['date'], source, symbols, names)
+
+async def fetch_currency_info(client=None, timeout=None):
+    """Get full currency information (code -> name and symbol) from the API without blocking"""
+    return await asyncio.wait_for((client or get_async_client()).get_json("/currencies"), timeout)
+
+async def geolocate(client=None, timeout=None):
+    """Return the (currency code, country name) of the caller's location without blocking"""
+    data = await asyncio.wait_for((client or get_async_client()).get_json("/geolocate"), timeout)
+    country = data.get('country', {})
+    return country.get('currency', 'USD'), country.get('name', 'Unknown')
+
+def rate(live, source, target):
+    """Return how many target units one source unit buys in a LiveRates or RateSnapshot, raising if none is known"""
+    snapshot = getattr(live, 'snapshot', live)
+    value = snapshot.rate(source, target)
+    if value != value:
+        raise ValueError(snapshot.unavailable_reason(source, target))
+    return value
+
+def convert(live, amount, source, target):
+    """Convert an amount between two currencies of a LiveRates or RateSnapshot, raising if no rate connects them"""
+    snapshot = getattr(live, 'snapshot', live)
+    if not math.isfinite(amount):
+        raise ValueError(f"invalid amount {amount!r}")
+    converted = snapshot.convert(amount, source, target)
+    if converted != converted:
+        raise ValueError(snapshot.unavailable_reason(source, target))
+    if not math.isfinite(converted):
+        raise ValueError("result is out of range")
+    return converted
+
+def fold_search_text(text):
+    """Casefold text and strip accents so 'Złoty', 'zloty' and 'ZLOTY' index alike"""
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    return "".join(char for char in decomposed if not unicodedata.combining(char)).strip()
+
+def deletion_variants(term, max_edits):
+    """Return term with up to max_edits characters deleted, for symmetric-delete fuzzy matching"""
+    variants = {term}
+    frontier = {term}
+    for _ in range(max_edits):
+        frontier = {word[:i] + word[i + 1:] for word in frontier if len(word) > 1 for i in range(len(word))}
+        variants |= frontier
+    return variants
+
+def edit_distance(a, b):
+    """Return the edit distance between two short strings, counting adjacent swaps as one edit"""
+    previous, current = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        before, previous, current = previous, current, [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (a[i - 1] != b[j - 1]))
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], before[j - 2] + 1)
+    return current[-1]
+
+class CurrencySearch:
+    """Prefix trie and inverted index over currency codes, names, symbols and regions, with fuzzy fallback"""
+    
+    # Scores for an exact and a prefix match on each kind of term
+    WEIGHTS = {"code": (100, 80), "name": (70, 50), "symbol": (70, 30), "word": (60, 40), "region": (20, 10)}
+    
+    def __init__(self, codes, names=None, symbols=None, regions=None):
+        names = names or {}
+        symbols = symbols or {}
+        self.codes = tuple(sorted(codes))
+        self.names = {code: names.get(code, "") for code in self.codes}
+        self.symbols = {code: symbols.get(code, "") for code in self.codes}
+        self.index = {}    # term -> {code: score for an exact match}
+        self.trie = {}     # character -> child node; the "" key holds {code: score for a prefix match}
+        self.deletes = {}  # term with characters deleted -> terms, for misspellings
+        
+        # Ties go to the order currencies are listed by region, so major currencies come first
+        listed = [code for members in (regions or {}).values() for code in members]
+        self.rank = {code: i for i, code in reversed(list(enumerate(listed)))}
+        
+        for code in self.codes:
+            self.add(code, code, "code")
+            if self.symbols[code]:
+                self.add(code, self.symbols[code], "symbol")
+            if self.names[code]:
+                self.add(code, self.names[code], "name")
+                for word in self.names[code].split():
+                    self.add(code, word, "word")
+        for region, members in (regions or {}).items():
+            for code in members:
+                if code in self.names:
+                    for word in region.split():
+                        self.add(code, word, "region")
+        
+        for term in self.index:
+            if len(term) >= SEARCH_FUZZY_MIN_LENGTH:
+                for variant in deletion_variants(term, SEARCH_MAX_EDITS):
+                    self.deletes.setdefault(variant, set()).add(term)
+    
+    def add(self, code, text, kind):
+        """Index one term for a code under the exact and prefix scores of its kind"""
+        term = fold_search_text(text)
+        if not term:
+            return
+        exact, prefix = self.WEIGHTS[kind]
+        scores = self.index.setdefault(term, {})
+        scores[code] = max(scores.get(code, 0), exact)
+        
+        node = self.trie
+        for char in term:
+            node = node.setdefault(char, {})
+            reach = node.setdefault("", {})
+            reach[code] = max(reach.get(code, 0), prefix)
+    
+    def match_word(self, word):
+        """Score codes for one folded query word: exact terms, then prefixes, then close misspellings"""
+        scores = dict(self.index.get(word, ()))
+        
+        node = self.trie
+        for char in word:
+            node = node.get(char)
+            if node is None:
+                break
+        else:
+            for code, score in node[""].items():
+                if score > scores.get(code, 0):
+                    scores[code] = score
+        
+        if len(word) >= SEARCH_FUZZY_MIN_LENGTH:
+            max_edits = 1 if len(word) <= 5 else SEARCH_MAX_EDITS
+            candidates = set()
+            for variant in deletion_variants(word, max_edits):
+                candidates.update(self.deletes.get(variant, ()))
+            for term in candidates:
+                distance = edit_distance(word, term)
+                if 0 < distance <= max_edits:
+                    for code, score in self.index[term].items():
+                        fuzzy = score // 2 - 5 * distance
+                        if fuzzy > scores.get(code, 0):
+                            scores[code] = fuzzy
+        return scores
+    
+    def search(self, query, limit=SEARCH_LIMIT):
+        """Return the best matching codes for a query; every word must match"""
+        words = fold_search_text(query).split()
+        if not words:
+            return []
+        total = self.match_word(words[0])
+        for word in words[1:]:
+            scores = self.match_word(word)
+            total = {code: score + scores[code] for code, score in total.items() if code in scores}
+        
+        # A query that spells out a whole name beats codes that only share its words
+        if len(words) > 1:
+            for code, score in self.index.get(" ".join(words), {}).items():
+                if code in total:
+                    total[code] += score
+        unranked = len(self.rank)
+        return [code for code, _ in sorted(total.items(), key=lambda item: (-item[1], self.rank.get(item[0], unranked), item[0]))[:limit]]
+    
+    def describe(self, code):
+        """Return a one-line label such as 'JPY ¥ Japanese Yen'"""
+        return " ".join(part for part in (code, self.symbols.get(code, ""), self.names.get(code, "")) if part)
+
+# Everything derived from one rate set; published as a unit so readers never mix two rate sets
+LiveRates = namedtuple("LiveRates", "snapshot rates symbols names regions search date source published_at")
+
+def build_live_rates(rates, date=None, source=None, symbols=None, names=None):
+    """Derive the snapshot, symbols, regions and search index from one rate set and freeze them for publishing"""
+    snapshot = RateSnapshot(rates, date=date, fallback=get_fallback_rates())
+    symbols = MappingProxyType(dict(get_all_currency_symbols() if symbols is None else symbols))
+    names = MappingProxyType(dict(load_currency_names() if names is None else names))
+    regions = MappingProxyType({region: tuple(codes) for region, codes in categorize_currencies({}, rates).items()})
+    return LiveRates(
+        snapshot=snapshot,
+        rates=MappingProxyType(dict(rates)),
+        symbols=symbols,
+        names=names,
+        regions=regions,
+        search=CurrencySearch(snapshot.codes, names, symbols, regions),
+        date=date,
+        source=source,
+        published_at=time.time(),
+    )
+
+class RateRefresher:
+    """Rebuild rates on a background thread and publish each new LiveRates with one reference swap"""
+    
+    def __init__(self, live, interval=REFRESH_INTERVAL, loader=None, on_publish=None):
+        self.current = live
+        self.interval = interval
+        self.loader = loader or (lambda: load_rates_snapshot(ttl=0))
+        self.on_publish = on_publish
+        self.checks = 0
+        self.publishes = 0
+        self.errors = 0
+        self._stop = threading.Event()
+        self._thread = None
+    
+    def refresh(self):
+        """Check upstream once and publish a new LiveRates if the date or any rate changed"""
+        self.checks += 1
+        try:
+            success, rates, date, source = self.loader()
+        except Exception as e:
+            record_error("rate_refresher", e)
+            success = False
+        if not success:
+            self.errors += 1
+            return False
+        
+        current = self.current
+        if date == current.date and rates == current.rates:
+            return False
+        
+        # Build everything off to the side, then publish it with a single assignment
+        live = build_live_rates(rates, date, source, current.symbols)
+        self.current = live
+        self.publishes += 1
+        if self.on_publish:
+            self.on_publish(live)
+        return True
+    
+    def run(self):
+        while not self._stop.wait(self.interval):
+            self.refresh()
+    
+    def start(self):
+        """Start the refresh thread, unless refreshing is disabled with a zero interval"""
+        if self._thread is None and self.interval > 0:
+            self._thread = threading.Thread(target=self.run, name="rate-refresher", daemon=True)
+            self._thread.start()
+        return self
+    
+    def stop(self, timeout=None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+class CurrencyInfo:
+    """Display metadata for one currency in a shared snapshot"""
+    
+    __slots__ = ("code", "symbol", "name", "region")
+    
+    def __init__(self, code, symbol, name, region):
+        self.code = code
+        self.symbol = symbol
+        self.name = name
+        self.region = region
+    
+    def __repr__(self):
+        return f"CurrencyInfo({self.code!r}, {self.symbol!r}, {self.name!r}, {self.region!r})"
+
+def encode_shared_rates(live, generation):
+    """Serialize LiveRates into the shared snapshot layout read by SharedRateSnapshot"""
+    snapshot = live.snapshot
+    count = len(snapshot)
+    region_of = {code: region for region, codes in live.regions.items() for code in codes}
+    
+    # Symbol, name and region strings are stored back to back, located by a table of end offsets
+    strings = []
+    for code in snapshot.codes:
+        strings += [live.symbols.get(code, code), live.names.get(code, code), region_of.get(code, "")]
+    encoded = [text.encode("utf-8") for text in strings]
+    ends = list(itertools.accumulate(map(len, encoded), initial=0))
+    
+    # Gaps routed through stored rates ship their graph, so readers can still explain the route
+    graph = snapshot.graph
+    routes = [] if graph is None else [graph.cost.astype("<f8").tobytes(), graph.matrix.astype("<f8").tobytes(),
+                                       graph.via.astype("<i4").tobytes()]
+    header = SHARED_HEADER.pack(SHARED_RATES_MAGIC, SHARED_RATES_VERSION, count, generation, live.published_at,
+                                (snapshot.date or "").encode("ascii"), (snapshot.base or "").encode("ascii"), ends[-1],
+                                0 if graph is None else SHARED_ROUTED)
+    return b"".join([
+        header,
+        b"".join(code.encode("ascii")[:8].ljust(8, b"\0") for code in snapshot.codes),
+        snapshot.vector.astype("<f8").tobytes(),
+        snapshot.matrix.astype("<f8").tobytes(),
+        *routes,
+        struct.pack(f"<{len(ends)}I", *ends),
+        b"".join(encoded),
+    ])
+
+class SharedSegmentBuffer:
+    """Read-only array interface over an attached segment, so every view of it keeps the segment open"""
+    
+    def __init__(self, segment):
+        np = require_numpy()
+        # The view is released before the segment closes, which would fail while it is still exported
+        self._view = np.frombuffer(segment.buf.toreadonly(), dtype=np.uint8)
+        self._segment = segment
+        self.__array_interface__ = self._view.__array_interface__
+
+def map_shared_segment(name):
+    """Attach a named shared memory segment as a read-only uint8 array, leaving its cleanup to the process that published it"""
+    np = require_numpy()
+    if sys.version_info >= (3, 13):
+        segment = shared_memory.SharedMemory(name, track=False)
+    else:
+        segment = shared_memory.SharedMemory(name)
+        # Attaching registers the segment for removal at exit; that belongs to the publisher's process tree
+        if os.name == "posix" and multiprocessing.parent_process() is None and name not in _published_segments:
+            multiprocessing.resource_tracker.unregister(f"/{segment.name}", "shared_memory")
+    return np.asarray(SharedSegmentBuffer(segment))
+
+class SharedRatePublisher:
+    """Publish LiveRates into shared memory so worker processes map one read-only copy instead of fetching their own
+    
+    Each publish writes a complete, immutable data segment named after its
+    generation, then bumps the generation in a small control segment with a
+    fixed name. Readers poll the control segment to detect newer snapshots;
+    superseded data segments are unlinked but stay mapped by readers that
+    still hold them.
+    """
+    
+    def __init__(self, name=SHARED_RATES_NAME):
+        self.name = name
+        self.generation = 0
+        self._control = shared_memory.SharedMemory(name, create=True, size=SHARED_CONTROL.size)
+        _published_segments.add(name)
+        SHARED_CONTROL.pack_into(self._control.buf, 0, SHARED_RATES_MAGIC, SHARED_RATES_VERSION, 0)
+        self._segment = None
+    
+    def publish(self, live):
+        """Write live as the next generation and point readers at it; returns the new generation"""
+        generation = self.generation + 1
+        data = encode_shared_rates(live, generation)
+        segment_name = f"{self.name}-{generation}"
+        segment = shared_memory.SharedMemory(segment_name, create=True, size=len(data))
+        _published_segments.add(segment_name)
+        segment.buf[:len(data)] = data
+        segment.close()
+        
+        # The data is complete before the control block names it, so readers never see a partial snapshot
+        SHARED_CONTROL.pack_into(self._control.buf, 0, SHARED_RATES_MAGIC, SHARED_RATES_VERSION, generation)
+        if self._segment is not None:
+            self._segment.unlink()
+        self._segment = segment
+        self.generation = generation
+        if METRICS_ENABLED:
+            METRICS.set("currency_shared_generation", generation)
+        return generation
+    
+    def close(self):
+        """Remove the published segments; workers that mapped them keep their copy until they exit"""
+        for segment in (self._segment, self._control):
+            if segment is not None:
+                segment.close()
+                segment.unlink()
+        self._segment = None
+        self._control = None
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+
+class SharedRateSnapshot(RateSnapshot):
+    """RateSnapshot whose codes, rates and cross-rate matrix are read in place from a published shared segment
+    
+    The segment is a fixed header (magic, format version, currency count,
+    generation, publish time, date, base and metadata size), followed by
+    8-byte currency codes, the float64 rate vector, the N×N float64 matrix,
+    a uint32 offset table and the UTF-8 metadata strings. Nothing is parsed
+    on attach beyond the codes; metadata is decoded one currency at a time.
+    """
+    
+    def __init__(self, name=SHARED_RATES_NAME):
+        np = require_numpy()
+        self.name = name
+        self._control = map_shared_segment(name)
+        for _ in range(SHARED_ATTACH_ATTEMPTS):
+            try:
+                data = map_shared_segment(f"{name}-{self.published_generation()}")
+                break
+            except FileNotFoundError:
+                # Superseded and unlinked between reading the control block and attaching
+                continue
+        else:
+            raise FileNotFoundError(f"No shared rate snapshot is published under {name!r}")
+        
+        magic, version, count, self.generation, self.published_at, date, base, meta_size, flags = SHARED_HEADER.unpack_from(data)
+        if magic != SHARED_RATES_MAGIC or version != SHARED_RATES_VERSION:
+            raise ValueError(f"{name!r} is not a version {SHARED_RATES_VERSION} shared rate snapshot")
+        self.date = date.rstrip(b"\0").decode("ascii") or None
+        self.base = base.rstrip(b"\0").decode("ascii") or None
+        
+        # Codes are interned and numbered once; every array below is a zero-copy view of the segment
+        offset = SHARED_HEADER.size
+        codes = data[offset:offset + 8 * count].tobytes()
+        self.codes = tuple(sys.intern(codes[8 * i:8 * i + 8].rstrip(b"\0").decode("ascii")) for i in range(count))
+        self.index = {code: i for i, code in enumerate(self.codes)}
+        offset += 8 * count
+        self.vector = data[offset:offset + 8 * count].view("<f8")
+        offset += 8 * count
+        self.matrix = data[offset:offset + 8 * count * count].view("<f8").reshape(count, count)
+        offset += 8 * count * count
+        self.graph = None
+        if flags & SHARED_ROUTED:
+            cost, matrix = (data[start:start + 8 * count * count].view("<f8").reshape(count, count)
+                            for start in (offset, offset + 8 * count * count))
+            offset += 16 * count * count
+            via = data[offset:offset + 4 * count * count].view("<i4").reshape(count, count)
+            offset += 4 * count * count
+            self.graph = ConversionGraph.from_arrays(self.codes, cost, matrix, via)
+        self._meta_ends = data[offset:offset + 4 * (3 * count + 1)].view("<u4")
+        self._meta_start = offset + 4 * (3 * count + 1)
+        self._data = data
+        self._info = {}
+        self._minor_rates = None
+    
+    def published_generation(self):
+        """Return the generation the publisher currently points readers at"""
+        magic, version, generation = SHARED_CONTROL.unpack_from(self._control)
+        if magic != SHARED_RATES_MAGIC or version != SHARED_RATES_VERSION:
+            raise ValueError(f"{self.name!r} is not a version {SHARED_RATES_VERSION} shared rate snapshot")
+        return generation
+    
+    def is_current(self):
+        return self.published_generation() == self.generation
+    
+    def latest(self):
+        """Return this snapshot if it is still current, otherwise the newer one"""
+        return self if self.is_current() else SharedRateSnapshot(self.name)
+    
+    def info(self, code):
+        """Return the symbol, name and region of a currency"""
+        if code not in self._info:
+            i = 3 * self.index[code]
+            fields = [self._data[self._meta_start + int(self._meta_ends[j]):self._meta_start + int(self._meta_ends[j + 1])].tobytes().decode("utf-8")
+                      for j in range(i, i + 3)]
+            self._info[code] = CurrencyInfo(code, *fields)
+        return self._info[code]
+
+def run_convert(args):
+    """Convert one amount without the menu or geolocation, printing just the result or JSON"""
+    source, target = args.source.upper(), args.target.upper()
+    if args.offline:
+        cached = load_cached_snapshot()
+        success = cached is not None
+        if success:
+            rates, date, origin = snapshot_rates(cached), cached['date'], "cache"
+    else:
+        success, rates, date, origin = load_rates_snapshot()
+    if not success:
+        rates, date, origin = get_fallback_rates(), None, "stored fallback rates"
+    
+    # Same lookup as the menu: live cross rates, with gaps routed through stored rates. A pair quoted
+    # in the rates is one division, so NumPy and the routing graph are only loaded for the rest
+    rate, route, message = float('nan'), None, None
+    if rates.get(source) and rates.get(target) and not args.exact:
+        rate = rates[target] / rates[source]
+    else:
+        snapshot = RateSnapshot(rates, fallback=get_fallback_rates())
+        if source in snapshot and target in snapshot:
+            rate = snapshot.rate(source, target)
+            route = snapshot.route(source, target) if snapshot.uses_stored_rates(source, target) else None
+            message = snapshot.unavailable_reason(source, target)
+        else:
+            message = f"Unsupported currency {source if source not in snapshot else target}"
+    if not math.isfinite(args.amount):
+        rate, message = float('nan'), f"Invalid amount {args.amount}"
+    elif rate == rate and not math.isfinite(args.amount * rate):
+        rate, message = float('nan'), "Result is out of range"
+    
+    # --exact works in integer minor units and prints the decimal result, rounded half-even
+    exact = None
+    if args.exact and rate == rate:
+        try:
+            exact = format_minor_units(convert_minor(to_minor_units(args.amount, source), source, target, snapshot), target)
+        except ValueError as e:
+            rate, message = float('nan'), str(e)
+    
+    if rate != rate:
+        if args.json:
+            print(json.dumps({"error": message, "from": source, "to": target}))
+        else:
+            print(message, file=sys.stderr)
+        return 1
+    
+    result = args.amount * rate
+    if args.json:
+        output = {"amount": args.amount, "from": source, "to": target, "rate": rate,
+                  "result": result, "date": date, "source": origin}
+        if route:
+            output["route"] = route
+        if exact is not None:
+            output["exact"] = exact
+        print(json.dumps(output))
+    elif exact is not None:
+        print(exact)
+    else:
+        print(f"{result:.{currency_exponent(target)}f}")
+    return 0
+
+def run_in_background(func, *args):
+    """Run func on a daemon thread and return a Future for its result"""
+    future = Future()
+    
+    def runner():
+        # Once running, the future can't be cancelled by a caller that gave up waiting on it
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(func(*args))
+        except BaseException as e:
+            future.set_exception(e)
+    
+    threading.Thread(target=runner, daemon=True).start()
+    return future
+
+def timed_call(func, *args):
+    """Call func and return its result together with the elapsed seconds"""
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+async def timed_await(awaitable):
+    """Await awaitable and return its result together with the elapsed seconds"""
+    start = time.perf_counter()
+    result = await awaitable
+    return result, time.perf_counter() - start
+
+async def load_startup(deadline):
+    """Load rates and the user's location concurrently under one deadline, loading the currency symbols meanwhile"""
+    timings = {}
+    
+    async def load_symbols():
+        symbols, timings['symbols'] = await asyncio.wrap_future(run_in_background(timed_call, get_all_currency_symbols))
+        return symbols
+    
+    async def locate():
+        try:
+            location, timings['geolocate'] = await timed_await(geolocate(timeout=deadline))
+            return location
+        except (requests.RequestException, asyncio.TimeoutError, ValueError, AttributeError) as e:
+            record_error("geolocate", e)
+            return None
+    
+    symbols = asyncio.ensure_future(load_symbols())
+    (live, timings['rates']), location = await asyncio.gather(timed_await(load_rates(timeout=deadline, symbols=symbols)), locate())
+    get_async_client().close()
+    return live, location, timings
+
+def print_startup_timings(timings):
+    """Print the per-phase startup timing breakdown"""
+    phases = " | ".join(f"{phase} {seconds * 1000:.0f}ms" for phase, seconds in timings.items())
+    print(Fore.WHITE + Style.DIM + f"Startup: {phases}")
+
+def parse_args(argv=None):
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="Advanced Currency Converter")
+    parser.add_argument("--fast", action="store_true", help="skip the cosmetic startup delays")
+    parser.add_argument("--deadline", type=float, default=STARTUP_DEADLINE,
+                        help=f"overall startup network budget in seconds (default: {STARTUP_DEADLINE})")
+    parser.add_argument("--refresh", type=float, default=REFRESH_INTERVAL,
+                        help=f"seconds between background rate refreshes, 0 to disable (default: {REFRESH_INTERVAL:g})")
+    parser.add_argument("--no-color", action="store_true", help="plain output without colors (also set by NO_COLOR)")
+    parser.add_argument("--metrics-file", metavar="FILE",
+                        help="write metrics to FILE at exit, as Prometheus text if it ends in .prom and JSON otherwise")
+    parser.add_argument("--record-api", metavar="FILE", help="record every API response to a cassette FILE")
+    parser.add_argument("--replay-api", metavar="FILE", default=os.environ.get("CURRENCY_API_REPLAY"),
+                        help="answer API calls from a recorded cassette FILE instead of the network (also CURRENCY_API_REPLAY)")
+    parser.add_argument("--faults", metavar="SPEC", default=os.environ.get("CURRENCY_API_FAULTS", ""),
+                        help="faults to inject while replaying, e.g. latency=0.5,jitter=0.2,error=0.1,status=0.1,truncate=0.1,seed=1 "
+                             "(also CURRENCY_API_FAULTS)")
+    parser.add_argument("--provider", action="append", metavar="SPEC",
+                        help="rate provider in priority order: 'vatcomply', an API base URL or file:PATH; repeatable "
+                             "(default: CURRENCY_PROVIDERS, else vatcomply)")
+    commands = parser.add_subparsers(dest="command")
+    
+    convert = commands.add_parser("convert", help="convert one amount and print the result")
+    convert.add_argument("amount", type=float, help="amount to convert")
+    convert.add_argument("source", metavar="FROM", help="source currency code")
+    convert.add_argument("target", metavar="TO", help="target currency code")
+    convert.add_argument("--json", action="store_true", help="print the result, rate and rate date as JSON")
+    convert.add_argument("--offline", action="store_true", help="never touch the network; use the local snapshot or stored rates")
+    convert.add_argument("--exact", action="store_true", help="convert in integer minor units, without float rounding")
+    
+    pipe = commands.add_parser("pipe", help="convert a CSV or JSONL file of amount,from,to records")
+    pipe.add_argument("input", nargs="?", help="input file (default: stdin)")
+    pipe.add_argument("-o", "--output", help="output file (default: stdout)")
+    pipe.add_argument("--format", choices=["csv", "jsonl"], help="record format (default: from the file extension, else csv)")
+    pipe.add_argument("--rejects", help="write rejected records and the reason to this CSV file")
+    pipe.add_argument("--chunk-size", type=int, default=PIPELINE_CHUNK_SIZE, help=f"records per chunk (default: {PIPELINE_CHUNK_SIZE})")
+    pipe.add_argument("--precision", type=int, default=2, help="decimal places in converted amounts (default: 2)")
+    pipe.add_argument("--workers", type=int, default=1,
+                      help="convert line-aligned shards of the input file on this many processes (default: 1)")
+    pipe.add_argument("--split", action="store_true",
+                      help="with --workers, write each shard to OUTPUT.partNNNNN instead of merging them")
+    
+    backfill = commands.add_parser("backfill", help="download historical rates for a date range")
+    backfill.add_argument("start", help="first day (YYYY-MM-DD)")
+    backfill.add_argument("end", nargs="?", help="last day (YYYY-MM-DD, default: today)")
+    backfill.add_argument("--store", help=f"historical store file (default: {HISTORY_FILE})")
+    backfill.add_argument("--workers", type=int, default=BACKFILL_WORKERS, help=f"concurrent requests (default: {BACKFILL_WORKERS})")
+    backfill.add_argument("--rate", type=float, default=BACKFILL_RATE_LIMIT, help=f"requests per second (default: {BACKFILL_RATE_LIMIT})")
+    
+    serve = commands.add_parser("serve", help="run the JSON conversion service over HTTP")
+    serve.add_argument("--host", default="127.0.0.1", help="address to listen on (default: 127.0.0.1)")
+    serve.add_argument("--port", type=int, default=SERVICE_PORT, help=f"port to listen on (default: {SERVICE_PORT})")
+    serve.add_argument("--refresh", type=float, default=REFRESH_INTERVAL,
+                       help=f"seconds between background rate refreshes, 0 to disable (default: {REFRESH_INTERVAL:g})")
+    serve.add_argument("--workers", type=int, default=1,
+                       help="worker processes sharing the port and one shared-memory copy of the rates (default: 1)")
+    serve.add_argument("--shared-name", default=SHARED_RATES_NAME,
+                       help=f"shared memory name the rates are published under (default: {SHARED_RATES_NAME})")
+    
+    loadtest = commands.add_parser("loadtest", help="measure throughput and latency of the conversion service")
+    loadtest.add_argument("--host", default="127.0.0.1", help="service address (default: 127.0.0.1)")
+    loadtest.add_argument("--port", type=int, help="service port (default: start an in-process service)")
+    loadtest.add_argument("--path", default="/convert?amount=100&from=EUR&to=JPY", help="request path to hit")
+    loadtest.add_argument("--connections", type=int, default=32, help="concurrent keep-alive connections (default: 32)")
+    loadtest.add_argument("--requests", type=int, default=20000, help="total requests (default: 20000)")
+    
+    providers = commands.add_parser("providers", help="probe the rate providers and show their latency and errors")
+    providers.add_argument("--rounds", type=int, default=5, help="snapshot fetches to make (default: 5)")
+    
+    bench = commands.add_parser("bench", help="run the benchmark suite against a local stub API")
+    bench.add_argument("--payloads", help="recorded API payloads to serve (default: derived from the fallback rates)")
+    bench.add_argument("--record", metavar="FILE", help="record live API payloads to FILE and exit")
+    bench.add_argument("--sizes", help=f"comma separated batch sizes (default: {','.join(map(str, BENCH_SIZES))})")
+    bench.add_argument("--filter", help="only run benchmarks whose name contains this text")
+    bench.add_argument("--quick", action="store_true", help="fewer repeats per benchmark")
+    bench.add_argument("--no-startup", action="store_true", help="skip the cold and warm startup benchmarks")
+    bench.add_argument("--save", metavar="FILE", help="save the results as a JSON baseline")
+    bench.add_argument("--compare", metavar="BASELINE", help="compare the results against a saved baseline")
+    bench.add_argument("--results", metavar="FILE", help="compare saved results instead of running the suite")
+    bench.add_argument("--threshold", type=float, default=BENCH_THRESHOLD,
+                       help=f"slowdown that counts as a regression (default: {BENCH_THRESHOLD})")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    """Main function with menu-driven interface and complete currency support"""
+    args = parse_args(argv)
+    if args.no_color or os.environ.get("NO_COLOR"):
+        disable_color()
+    if args.metrics_file:
+        atexit.register(METRICS.dump, args.metrics_file)
+    if args.replay_api and not os.path.exists(args.replay_api):
+        print(Fore.RED + f"✗ No API cassette at {args.replay_api}; record one with --record-api", file=sys.stderr)
+        return 2
+    if args.record_api or args.replay_api:
+        try:
+            configure_cassette(args.record_api or args.replay_api, "record" if args.record_api else "replay", args.faults)
+        except ValueError as e:
+            print(Fore.RED + f"✗ {e}", file=sys.stderr)
+            return 2
+    if args.provider:
+        configure_providers(args.provider)
+    if args.command == "convert":
+        return run_convert(args)
+    if args.command == "pipe":
+        return run_pipeline(args)
+    if args.command == "backfill":
+        return run_backfill(args)
+    if args.command == "serve":
+        return run_service(args)
+    if args.command == "loadtest":
+        return run_loadtest(args)
+    if args.command == "bench":
+        return run_bench(args)
+    if args.command == "providers":
+        return run_providers(args)
+    
+    timings = {}
+    startup = time.perf_counter()
+    
+    # Display the startup splash screen
+    _, timings['splash'] = timed_call(print_header)
+    
+    # Small delay for dramatic effect
+    if not args.fast:
+        time.sleep(0.5)
+    
+    # Rates and location come from the async library API under one deadline, while the currency symbols load
+    print(Fore.YELLOW + "Fetching ALL available currencies...")
+    live, location, phases = asyncio.run(load_startup(args.deadline))
+    timings.update(phases)
+    
+    if live.source == "stored rates":
+        print(Fore.RED + f"✗ Couldn't load live rates within {args.deadline:g}s")
+        print(Fore.YELLOW + "Using stored rates as fallback")
+    else:
+        print(Fore.GREEN + f"✓ Complete currency list loaded with {len(live.rates)} currencies ({live.source})")
+    print(Fore.GREEN + f"✓ {len(live.rates)} currencies available as of {live.date}")
+    refresher = RateRefresher(live, args.refresh).start()
+    
+    # Get user location for currency suggestion
+    if location:
+        suggested_currency, country = location
+        print(Fore.GREEN + f"✓ Detected location: {country} [{suggested_currency}]")
+    else:
+        suggested_currency = "USD"
+        country = "Unknown"
+        print(Fore.YELLOW + "Could not detect location. Using USD as default.")
+    
+    timings['total'] = time.perf_counter() - startup
+    print_startup_timings(timings)
+    for phase, seconds in timings.items():
+        METRICS.set("currency_startup_phase_seconds", seconds, phase=phase)
+    
+    # Small delay before showing menu
+    if not args.fast:
+        time.sleep(1)
+    
+    # Main application loop
+    while True:
+        choice = display_main_menu(suggested_currency, country)
+        live = refresher.current  # One consistent rate set per action, even if a refresh lands meanwhile
+        
+        if choice == '0':  # Exit
+            refresher.stop()
+            Frame().line(Fore.GREEN + Style.BRIGHT + """
+Thank you for using Currency Converter!
+      .--.
+     /.-. '----------.
+     \'-' .--"--""-"-'
+      '--'
+            """).show()
+            break
+            
+        elif choice == '1':  # Convert Currency
+            convert_currency(live.snapshot, live.symbols, suggested_currency, live.search)
+            
+        elif choice == '2':  # View Available Currencies
+            display_currencies(live.rates, live.symbols, live.regions)
+            
+        elif choice == '3':  # Check Exchange Rate
+            check_exchange_rate(live.snapshot, live.symbols, suggested_currency, live.search)
+            
+        elif choice == '4':  # Help
+            show_help()
+
+if __name__ == "__main__":
+    try:
+        sys.exit(main())
+    except KeyboardInterrupt:
+        clear_screen()
+        print(Fore.YELLOW + "\nProgram terminated by user. Goodbye!")
+    except Exception as e:
+        record_error("main", e)
+        print(Fore.RED + f"\nAn unexpected error occurred: {e}")
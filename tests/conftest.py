@@ -0,0 +1,97 @@
+import json
+import os
+import sys
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+# Keep the import-time cache paths out of the real home directory
+os.environ.setdefault("CURRENCY_CACHE_DIR", tempfile.mkdtemp(prefix="currency-tests-"))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import Currency  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def isolated(tmp_path, monkeypatch):
+    """Give every test its own cache files and fresh process-wide API state"""
+    monkeypatch.setattr(Currency, "CACHE_FILE", str(tmp_path / "rates.json.gz"))
+    monkeypatch.setattr(Currency, "HISTORY_FILE", str(tmp_path / "history.bin"))
+    monkeypatch.setattr(Currency, "BREAKER_FILE", str(tmp_path / "breaker.json"))
+    monkeypatch.setattr(Currency, "_breakers", {})
+    monkeypatch.setattr(Currency, "_api_client", None)
+    monkeypatch.setattr(Currency, "_api_bucket", None)
+    monkeypatch.setattr(Currency, "_api_cassette", None)
+    monkeypatch.setattr(Currency, "_provider_pool", None)
+    monkeypatch.setattr(Currency, "METRICS_ENABLED", False)
+    return tmp_path
+
+
+class StubApi:
+    """Local HTTP/1.1 server answering from a route(path, query) callable that returns (status, payload[, headers])"""
+
+    def __init__(self, route):
+        self.route = route
+        self.hits = []
+        self.connections = set()
+        self.active = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+        self.request = threading.local()  # Headers of the request the calling route is answering
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                parts = urlsplit(self.path)
+                query = {name: values[0] for name, values in parse_qs(parts.query).items()}
+                with stub.lock:
+                    stub.hits.append((parts.path, query))
+                    stub.connections.add(self.client_address)
+                    stub.active += 1
+                    stub.peak = max(stub.peak, stub.active)
+                stub.request.headers = self.headers
+                try:
+                    status, payload, *extra = stub.route(parts.path, query)
+                finally:
+                    with stub.lock:
+                        stub.active -= 1
+                body = json.dumps(payload).encode("utf-8") if payload is not None else b""
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in (extra[0] if extra else {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def paths(self):
+        return [path for path, _ in self.hits]
+
+
+@pytest.fixture
+def stub_api():
+    """Start stub APIs on demand and shut them all down after the test"""
+    servers = []
+
+    def start(route):
+        stub = StubApi(route)
+        servers.append(stub)
+        return stub
+
+    yield start
+    for stub in servers:
+        stub.server.shutdown()
+        stub.server.server_close()
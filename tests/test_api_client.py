@@ -0,0 +1,175 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import requests
+
+import Currency
+
+RATES = {"USD": 1.08, "JPY": 160.0, "GBP": 0.85, "CHF": 0.95, "SEK": 11.2, "NOK": 11.6}
+
+
+def symbol_route(delay=0.2):
+    """/rates that ignores multi-symbol batches except USD and answers single symbols slowly"""
+    def route(path, query):
+        symbols = query.get("symbols", "").split(",")
+        if len(symbols) > 1:
+            return 200, {"base": "EUR", "rates": {"USD": RATES["USD"]}}
+        time.sleep(delay)
+        return 200, {"base": "EUR", "rates": {code: RATES[code] for code in symbols if code in RATES}}
+    return route
+
+
+def test_fetch_symbol_rates_queries_batch_misses_concurrently(stub_api):
+    stub = stub_api(symbol_route())
+    client = Currency.ApiClient(stub.url)
+    codes = ["USD", "JPY", "GBP", "CHF", "SEK", "NOK", "XXX"]
+
+    start = time.perf_counter()
+    rates, stats = Currency.fetch_symbol_rates("EUR", codes, client, max_workers=6)
+    elapsed = time.perf_counter() - start
+
+    assert rates == RATES
+    assert stats["calls"] == 1 + 6
+    assert len(stub.hits) == 7
+    # Six 0.2s single-symbol calls in parallel, not one after another
+    assert stub.peak >= 4
+    assert elapsed < 0.2 * 6 / 2
+
+
+def test_fetch_symbol_rates_reuses_pooled_connections(stub_api):
+    stub = stub_api(symbol_route(delay=0.05))
+    client = Currency.ApiClient(stub.url, pool_maxsize=3)
+    codes = ["USD", "JPY", "GBP", "CHF", "SEK", "NOK"]
+
+    Currency.fetch_symbol_rates("EUR", codes, client, max_workers=3)
+    Currency.fetch_symbol_rates("EUR", codes, client, max_workers=3)
+
+    stats = client.stats()
+    assert stats["requests"] == 12
+    assert stats["connections_opened"] <= 3
+    assert stats["connections_reused"] >= 9
+    assert len(stub.connections) == stats["connections_opened"]
+
+
+def test_retries_transient_server_errors_with_backoff(stub_api):
+    answers = [503, 502, 200]
+    stub = stub_api(lambda path, query: (answers.pop(0), {"base": "EUR", "rates": RATES}))
+    client = Currency.ApiClient(stub.url, max_retries=3, backoff_base=0.001)
+
+    assert client.get_json("/rates")["rates"] == RATES
+    stats = client.stats()
+    assert (stats["requests"], stats["retries"], stats["errors"]) == (3, 2, 2)
+    assert stats["latency"]["/rates"]["count"] == 3
+
+
+def test_gives_up_after_max_retries(stub_api):
+    stub = stub_api(lambda path, query: (503, {"error": "unavailable"}))
+    client = Currency.ApiClient(stub.url, max_retries=2, backoff_base=0.001)
+
+    assert client.get("/rates").status_code == 503
+    assert len(stub.hits) == 3
+
+
+def test_every_endpoint_goes_through_the_shared_client(stub_api, monkeypatch):
+    def route(path, query):
+        if path == "/geolocate":
+            return 200, {"country": {"name": "Japan", "currency": "JPY"}}
+        return 200, {"JPY": {"name": "Japanese yen"}}
+
+    stub = stub_api(route)
+    monkeypatch.setattr(Currency, "API_BASE_URL", stub.url)
+
+    assert Currency.get_user_location() == (True, "JPY", "Japan")
+    assert Currency.get_currency_info() == (True, {"JPY": {"name": "Japanese yen"}})
+    assert Currency.get_api_client().stats()["requests"] == 2
+    assert Currency.get_api_client() is Currency.get_api_client()
+
+
+def test_identical_concurrent_gets_share_one_request(stub_api):
+    def route(path, query):
+        time.sleep(0.2)
+        return 200, {"base": "EUR", "rates": RATES}
+
+    stub = stub_api(route)
+    client = Currency.ApiClient(stub.url)
+    barrier = threading.Barrier(5)
+
+    def call():
+        barrier.wait()
+        return client.get_json("/rates")
+
+    with ThreadPoolExecutor(5) as pool:
+        results = list(pool.map(lambda _: call(), range(5)))
+
+    assert all(result["rates"] == RATES for result in results)
+    assert len(stub.hits) == 1
+    assert client.stats()["coalesced"] == 4
+
+    # A finished call is not reused
+    client.get_json("/rates")
+    assert len(stub.hits) == 2
+
+
+def test_a_shared_failure_reaches_every_waiter(stub_api):
+    def route(path, query):
+        time.sleep(0.2)
+        return 500, {"error": "boom"}
+
+    stub = stub_api(route)
+    client = Currency.ApiClient(stub.url, max_retries=0)
+    barrier = threading.Barrier(3)
+
+    def call():
+        barrier.wait()
+        with pytest.raises(requests.HTTPError):
+            client.get_json("/rates")
+
+    with ThreadPoolExecutor(3) as pool:
+        list(pool.map(lambda _: call(), range(3)))
+
+    assert len(stub.hits) == 1
+
+
+def test_token_bucket_holds_requests_to_the_rate_after_the_burst():
+    bucket = Currency.TokenBucket(rate=20, burst=2)
+
+    start = time.perf_counter()
+    waits = [bucket.acquire() for _ in range(4)]
+    elapsed = time.perf_counter() - start
+
+    assert waits[:2] == [0.0, 0.0]
+    assert elapsed >= 0.09
+
+
+def test_transient_server_errors_do_not_trip_the_breaker(stub_api):
+    answers = [503, 503, 503, 200]
+
+    def route(path, query):
+        status = answers.pop(0)
+        return status, {"base": "EUR", "rates": RATES} if status == 200 else {"error": "unavailable"}
+
+    stub = stub_api(route)
+    client = Currency.ApiClient(stub.url, max_retries=3, backoff_base=0.001)
+
+    # Three 503s then a success are one successful request, not three failures
+    assert client.get_json("/rates")["rates"] == RATES
+    assert len(stub.hits) == 4
+    assert client.breaker.failures == 0
+    assert client.breaker.allow()
+
+
+def test_breaker_counts_a_request_once_its_retries_are_exhausted(stub_api):
+    stub = stub_api(lambda path, query: (503, {"error": "unavailable"}))
+    client = Currency.ApiClient(stub.url, max_retries=2, backoff_base=0.001)
+
+    for failures in range(1, Currency.BREAKER_THRESHOLD + 1):
+        assert client.get("/rates").status_code == 503
+        assert client.breaker.failures == failures
+    assert len(stub.hits) == Currency.BREAKER_THRESHOLD * 3
+
+    # Open now: the next request fails without reaching the server
+    with pytest.raises(requests.ConnectionError, match="keeps failing"):
+        client.get("/rates")
+    assert len(stub.hits) == Currency.BREAKER_THRESHOLD * 3
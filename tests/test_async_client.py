@@ -0,0 +1,70 @@
+import asyncio
+import time
+
+import pytest
+import requests
+
+import Currency
+
+RATES = {"USD": 1.08, "JPY": 160.0}
+
+
+@pytest.fixture(autouse=True)
+def no_proxy_env(monkeypatch):
+    for name in ("HTTP_PROXY", "HTTPS_PROXY", "ALL_PROXY", "NO_PROXY", "http_proxy", "https_proxy", "all_proxy", "no_proxy"):
+        monkeypatch.delenv(name, raising=False)
+
+
+def fetch(client, path="/rates"):
+    async def run():
+        try:
+            return await client.get_json(path)
+        finally:
+            client.close()
+    return asyncio.run(run())
+
+
+def test_follows_redirects_within_the_api_origin(stub_api):
+    def route(path, query):
+        if path == "/rates":
+            return 301, None, {"Location": "/v2/rates"}
+        return 200, {"base": "EUR", "rates": RATES}
+
+    stub = stub_api(route)
+
+    assert fetch(Currency.AsyncApiClient(stub.url))["rates"] == RATES
+    assert stub.paths() == ["/rates", "/v2/rates"]
+
+
+def test_follows_redirects_to_another_host(stub_api):
+    target = stub_api(lambda path, query: (200, {"base": "EUR", "rates": RATES}))
+    origin = stub_api(lambda path, query: (302, None, {"Location": f"{target.url}/moved"}))
+
+    assert fetch(Currency.AsyncApiClient(origin.url))["rates"] == RATES
+    assert target.paths() == ["/moved"]
+
+
+def test_timeouts_are_reported_as_requests_timeouts(stub_api):
+    def route(path, query):
+        time.sleep(0.5)
+        return 200, {"base": "EUR", "rates": RATES}
+
+    stub = stub_api(route)
+    client = Currency.AsyncApiClient(stub.url, max_retries=0, timeouts={"/rates": 0.05})
+
+    with pytest.raises(requests.Timeout):
+        fetch(client)
+    assert client.stats()["errors"] == 1
+
+
+def test_requests_go_through_the_configured_proxy(stub_api, monkeypatch):
+    origin = stub_api(lambda path, query: (200, {"base": "EUR", "rates": {}}))
+    proxy = stub_api(lambda path, query: (200, {"base": "EUR", "rates": RATES}))
+    monkeypatch.setenv("HTTP_PROXY", proxy.url)
+
+    client = Currency.AsyncApiClient(origin.url)
+
+    assert client.proxy == proxy.url
+    assert fetch(client)["rates"] == RATES
+    assert proxy.paths() == ["/rates"]
+    assert origin.hits == []
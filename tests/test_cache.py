@@ -0,0 +1,77 @@
+import gzip
+import json
+import time
+
+import Currency
+
+RATES = {"EUR": 0.92, "JPY": 151.2, "GBP": 0.79}
+CURRENCIES = {"EUR": {}, "JPY": {}, "GBP": {}, "USD": {}, "ARS": {}}
+
+
+def api_route(stub, etags=None):
+    """/rates and /currencies with optional ETags, answering 304 when the client already has them"""
+    etags = etags or {}
+
+    def route(path, query):
+        etag = etags.get(path)
+        if etag and stub.request.headers.get("If-None-Match") == etag:
+            return 304, None, {"ETag": etag}
+        payload = {"base": "USD", "date": "2024-06-03", "rates": RATES} if path == "/rates" else CURRENCIES
+        return 200, payload, {"ETag": etag} if etag else {}
+    return route
+
+
+def start(stub_api, etags=None):
+    stub = stub_api(None)
+    stub.route = api_route(stub, etags)
+    return stub
+
+
+def test_fresh_cache_answers_without_network(stub_api):
+    stub = start(stub_api)
+
+    success, rates, date, source = Currency.load_rates_snapshot(client=Currency.ApiClient(stub.url))
+    assert (success, date, source) == (True, "2024-06-03", "live API")
+    assert sorted(stub.paths()) == ["/currencies", "/rates"]
+    assert rates["JPY"] == 151.2 and rates["ARS"] == 0.0
+
+    success, cached, date, source = Currency.load_rates_snapshot(client=Currency.ApiClient(stub.url))
+    assert (success, source) == (True, "cache")
+    assert cached == rates
+    assert len(stub.hits) == 2
+
+
+def test_stale_cache_is_revalidated_with_etags(stub_api):
+    stub = start(stub_api, {"/rates": '"r1"', "/currencies": '"c1"'})
+    Currency.load_rates_snapshot(client=Currency.ApiClient(stub.url))
+
+    success, rates, date, source = Currency.load_rates_snapshot(ttl=0, client=Currency.ApiClient(stub.url))
+
+    assert (success, date, source) == (True, "2024-06-03", "revalidated cache")
+    assert rates["GBP"] == 0.79
+    assert len(stub.hits) == 4
+
+
+def test_stale_cache_beats_fallback_when_the_api_is_down(stub_api):
+    stub = start(stub_api)
+    Currency.load_rates_snapshot(client=Currency.ApiClient(stub.url))
+    down = stub_api(lambda path, query: (503, {"error": "unavailable"}))
+
+    success, rates, date, source = Currency.load_rates_snapshot(ttl=0, client=Currency.ApiClient(down.url, max_retries=0))
+
+    assert (success, date, source) == (True, "2024-06-03", "stale cache")
+    assert rates["JPY"] == 151.2
+
+
+def test_cache_is_written_atomically_and_versioned(tmp_path):
+    snapshot = {"base": "USD", "date": "2024-06-03", "rates": RATES, "currencies": sorted(CURRENCIES),
+                "validators": {}, "fetched_at": time.time(), "revalidated": False}
+
+    assert Currency.save_cached_snapshot(snapshot)
+    assert Currency.load_cached_snapshot()["rates"] == RATES
+    assert [path.name for path in tmp_path.iterdir()] == ["rates.json.gz"]
+
+    # A snapshot written by another cache version is ignored rather than misread
+    with gzip.open(tmp_path / "rates.json.gz", "wt", encoding="utf-8") as f:
+        json.dump(dict(snapshot, version=Currency.CACHE_VERSION + 1), f)
+    assert Currency.load_cached_snapshot() is None
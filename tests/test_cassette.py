@@ -0,0 +1,100 @@
+import json
+
+import pytest
+import requests
+
+import Currency
+
+PAYLOAD = {"base": "EUR", "date": "2024-06-03", "rates": {"USD": 1.0852, "JPY": 158.83}}
+
+
+def rates_route(path, query):
+    return 200, dict(PAYLOAD, symbols=query.get("symbols")), {"ETag": '"v1"'}
+
+
+def test_recorded_traffic_replays_without_the_network(stub_api, tmp_path):
+    path = str(tmp_path / "session.json")
+    stub = stub_api(rates_route)
+
+    Currency.configure_cassette(path, "record")
+    recorded = Currency.ApiClient(stub.url, max_retries=0).get_json("/rates", params={"symbols": "USD,JPY"})
+
+    with open(path, encoding="utf-8") as f:
+        document = json.load(f)
+    assert document["version"] == Currency.CASSETTE_VERSION
+    assert [(item["path"], item["query"], item["status"]) for item in document["interactions"]] == [
+        ("/rates", "symbols=USD%2CJPY", 200)]
+
+    # Replay matches on path and query only, so a dead base URL answers the same
+    Currency.configure_cassette(path, "replay")
+    client = Currency.ApiClient("http://127.0.0.1:9", max_retries=0)
+    assert client.get_json("/rates", params={"symbols": "USD,JPY"}) == recorded
+    assert client.get("/rates", params={"symbols": "USD,JPY"}, headers={"If-None-Match": '"v1"'}).status_code == 304
+    with pytest.raises(requests.ConnectionError, match="No recorded response"):
+        client.get_json("/currencies")
+    assert len(stub.hits) == 1
+
+
+def player(tmp_path, spec):
+    """A replaying transport over one recorded /rates response, with the given faults"""
+    cassette = Currency.Cassette(str(tmp_path / "faults.json"))
+    cassette.interactions = [{"method": "GET", "path": "/rates", "query": "", "status": 200, "elapsed": 0.01,
+                              "headers": {"Content-Type": "application/json"}, "body": json.dumps(PAYLOAD)}]
+    return Currency.CassettePlayer(cassette, Currency.parse_faults(spec))
+
+
+def send(transport, timeout=None):
+    return transport.send(requests.Request("GET", "http://api.test/rates").prepare(), timeout=timeout)
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    slept = []
+    monkeypatch.setattr(Currency.time, "sleep", slept.append)
+    return slept
+
+
+def test_latency_delays_responses_and_times_out_past_the_request_timeout(tmp_path, sleeps):
+    transport = player(tmp_path, "latency=0.5")
+
+    assert send(transport, timeout=2).json() == PAYLOAD
+    assert sleeps == [0.5]
+    with pytest.raises(requests.Timeout, match="within 0.2s"):
+        send(transport, timeout=(1, 0.2))
+    assert sleeps == [0.5, 0.2]
+
+
+def test_jitter_adds_a_seeded_random_delay(tmp_path, sleeps):
+    for _ in range(2):
+        transport = player(tmp_path, "jitter=0.2,seed=3")
+        for _ in range(5):
+            send(transport)
+
+    assert all(0 <= delay <= 0.2 for delay in sleeps)
+    assert len(set(sleeps[:5])) == 5
+    assert sleeps[:5] == sleeps[5:]
+
+
+def test_error_fails_the_connection(tmp_path):
+    with pytest.raises(requests.ConnectionError, match="Injected connection failure"):
+        send(player(tmp_path, "error=1"))
+
+
+def test_status_answers_service_unavailable(tmp_path):
+    response = send(player(tmp_path, "status=1"))
+
+    assert response.status_code == 503
+    assert response.json() == {"error": "Injected failure"}
+
+
+def test_truncate_cuts_the_body_in_half(tmp_path):
+    response = send(player(tmp_path, "truncate=1"))
+
+    assert response.content == json.dumps(PAYLOAD).encode("utf-8")[:len(json.dumps(PAYLOAD)) // 2]
+    with pytest.raises(ValueError):
+        response.json()
+
+
+def test_unknown_faults_are_rejected():
+    with pytest.raises(ValueError, match="Unknown fault 'loss'"):
+        Currency.parse_faults("latency=0.1,loss=0.5")
@@ -0,0 +1,70 @@
+import json
+from datetime import date
+
+import Currency
+
+START, END = date(2024, 1, 1), date(2024, 1, 10)
+
+
+def rates_route(broken=(), undated=()):
+    """/rates?date= that fails some days with a 503 and answers others without a date"""
+    def route(path, query):
+        day = date.fromisoformat(query["date"])
+        rates = {"USD": 1 + day.day / 100}
+        if day in broken:
+            return 503, {"error": "unavailable"}
+        if day in undated:
+            return 200, {"base": "EUR", "rates": rates}
+        return 200, {"date": day.isoformat(), "base": "EUR", "rates": rates}
+    return route
+
+
+def backfill(stub, store, tmp_path):
+    client = Currency.ApiClient(stub.url, max_retries=0)
+    return Currency.backfill_history(START, END, store=store, client=client, workers=4, rate_limit=1000,
+                                     checkpoint_path=str(tmp_path / "backfill.checkpoint"), flush_days=3)
+
+
+def test_backfill_records_partial_failures_and_resumes(stub_api, tmp_path):
+    store = Currency.HistoricalRateStore(str(tmp_path / "history.bin"), codes=["EUR", "USD"])
+    broken, undated = {date(2024, 1, 4)}, {date(2024, 1, 7)}
+
+    stats = backfill(stub_api(rates_route(broken, undated)), store, tmp_path)
+
+    assert stats["fetched"] == 9
+    assert stats["failed"] == 2
+    assert stats["stored"] == 8
+    assert len(store) == 8
+    assert date(2024, 1, 4) not in store and date(2024, 1, 7) not in store
+    with open(tmp_path / "backfill.checkpoint", encoding="utf-8") as f:
+        done = set(json.load(f)["done"])
+    assert done == set(range(START.toordinal(), END.toordinal() + 1)) - {day.toordinal() for day in broken | undated}
+
+    # A second run only asks for the days that failed, and merges them in date order
+    stub = stub_api(rates_route())
+    stats = backfill(stub, store, tmp_path)
+
+    assert sorted(query["date"] for _, query in stub.hits) == ["2024-01-04", "2024-01-07"]
+    assert stats["skipped"] == 8
+    assert stats["stored"] == 2
+    assert len(store) == 10
+    assert list(store.days) == sorted(store.days)
+    assert store.rate("EUR", "USD", date(2024, 1, 4)) == 1.04
+
+    # Nothing is left once every day is stored
+    stub = stub_api(rates_route())
+    stats = backfill(stub, store, tmp_path)
+    assert stub.hits == []
+    assert stats["skipped"] == 10
+
+
+def test_convert_dated_uses_each_days_rate_and_nan_for_unknowns(tmp_path):
+    store = Currency.HistoricalRateStore(str(tmp_path / "history.bin"), codes=["EUR", "USD", "JPY"])
+    store.append_days([("2024-01-02", {"USD": 1.1, "JPY": 160.0}, "EUR"), ("2024-01-05", {"USD": 1.2, "JPY": 150.0}, "EUR")])
+
+    converted = store.convert_dated([10, 10, 10, 10, 10], ["EUR", "USD", "EUR", "XXX", "EUR"], ["USD", "JPY", "USD", "EUR", "YYY"],
+                                    ["2024-01-02", "2024-01-04", "2024-01-01", "2024-01-05", "2024-01-05"])
+
+    assert converted[0] == 10 * 1.1
+    assert converted[1] == 10 * 160.0 / 1.1  # Weekends and holidays use the latest earlier day
+    assert all(value != value for value in converted[2:])
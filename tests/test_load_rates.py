@@ -0,0 +1,123 @@
+import asyncio
+import json
+import time
+
+import Currency
+
+RATES = {"EUR": 0.92, "JPY": 151.2, "GBP": 0.79}
+CURRENCIES = {"EUR": {"name": "Euro"}, "JPY": {"name": "Japanese Yen"}, "GBP": {}, "USD": {}, "ARS": {}}
+
+
+def api_route(stub, delay=0.0):
+    """/rates and /currencies with ETags, answering 304 when the client already has them"""
+    def route(path, query):
+        time.sleep(delay)
+        etag = f'"{path}"'
+        if stub.request.headers.get("If-None-Match") == etag:
+            return 304, None, {"ETag": etag}
+        payload = {"base": "USD", "date": "2024-06-03", "rates": RATES} if path == "/rates" else CURRENCIES
+        return 200, payload, {"ETag": etag}
+    return route
+
+
+def start(stub_api, delay=0.0):
+    stub = stub_api(None)
+    stub.route = api_route(stub, delay)
+    return stub
+
+
+def run(coroutine_function, url):
+    """Run coroutine_function(client) on a fresh event loop with its own async client"""
+    async def main():
+        client = Currency.AsyncApiClient(url, max_retries=0)
+        try:
+            return await coroutine_function(client)
+        finally:
+            client.close()
+    return asyncio.run(main())
+
+
+def load(url, **kwargs):
+    return run(lambda client: Currency.load_rates(client=client, **kwargs), url)
+
+
+def test_falls_back_from_cache_to_api_to_stale_cache_to_stored_rates(stub_api, tmp_path):
+    stub = start(stub_api)
+    down = stub_api(lambda path, query: (503, {"error": "unavailable"}))
+
+    live = load(stub.url)
+    assert (live.source, live.date, live.rates["JPY"]) == ("live API", "2024-06-03", 151.2)
+    assert live.names["JPY"] == "Japanese Yen"
+    assert sorted(stub.paths()) == ["/currencies", "/rates"]
+
+    assert load(stub.url).source == "cache"
+    assert len(stub.hits) == 2
+
+    assert load(stub.url, ttl=0).source == "revalidated cache"
+    assert len(stub.hits) == 4
+
+    live = load(down.url, ttl=0)
+    assert (live.source, live.rates["GBP"]) == ("stale cache", 0.79)
+
+    (tmp_path / "rates.json.gz").unlink()
+    live = load(down.url, ttl=0)
+    assert (live.source, live.date) == ("stored rates", None)
+    assert live.rates == Currency.get_fallback_rates()
+
+
+def test_timeout_falls_back_to_the_stale_cache(stub_api):
+    load(start(stub_api).url)
+    slow = start(stub_api, delay=1.0)
+
+    began = time.perf_counter()
+    live = load(slow.url, ttl=0, timeout=0.1)
+
+    assert time.perf_counter() - began < 0.6
+    assert (live.source, live.rates["JPY"]) == ("stale cache", 151.2)
+
+
+def test_shared_request_runs_until_its_last_caller_gives_up(stub_api):
+    stub = stub_api(lambda path, query: (time.sleep(0.3), (200, {"base": "EUR", "rates": RATES}))[1])
+
+    async def scenario(client):
+        first = asyncio.ensure_future(client.get_json("/rates"))
+        second = asyncio.ensure_future(client.get_json("/rates"))
+        await asyncio.sleep(0.05)
+        (shared, callers), = client._flights.values()
+        assert callers == 2
+
+        # One caller giving up leaves the request running for the other
+        first.cancel()
+        assert (await second)["rates"] == RATES
+        assert first.cancelled() and not shared.cancelled()
+
+        # Once every caller gives up, the request itself is cancelled
+        third = asyncio.ensure_future(client.get_json("/rates"))
+        await asyncio.sleep(0.05)
+        (abandoned, _), = client._flights.values()
+        third.cancel()
+        await asyncio.wait([abandoned], timeout=1)
+        assert abandoned.cancelled() and not client._flights
+        return client.stats()
+
+    stats = run(scenario, stub.url)
+
+    assert stats["coalesced"] == 1
+    assert len(stub.hits) == 2
+
+
+def test_configured_providers_are_fetched_through_the_provider_pool(stub_api, tmp_path, monkeypatch):
+    recorded = tmp_path / "provider.json"
+    recorded.write_text(json.dumps({"/rates": {"base": "EUR", "date": "2024-05-31", "rates": {"USD": 1.0852}},
+                                    "/currencies": {"EUR": {}, "USD": {}}}), encoding="utf-8")
+    unused = start(stub_api)
+    monkeypatch.setattr(Currency, "API_BASE_URL", unused.url)
+    Currency.configure_providers([f"file:{recorded}"])
+
+    async def main():
+        return await Currency.load_rates()
+
+    live = asyncio.run(main())
+
+    assert (live.source, live.date, live.rates["USD"]) == ("live API", "2024-05-31", 1.0852)
+    assert unused.hits == []
@@ -0,0 +1,51 @@
+import json
+
+import Currency
+
+
+def test_prometheus_output_has_cumulative_buckets_and_escaped_labels():
+    metrics = Currency.Metrics(buckets=(0.1, 1.0))
+    metrics.inc("currency_api_requests_total", endpoint="/rates")
+    metrics.inc("currency_api_requests_total", 2, endpoint="/rates")
+    metrics.inc("currency_errors_total", where='say "hi"\n', type="ValueError")
+    for seconds in (0.05, 0.5, 5.0):
+        metrics.observe("currency_api_latency_seconds", seconds, endpoint="/rates")
+
+    lines = metrics.prometheus().splitlines()
+
+    assert 'currency_api_requests_total{endpoint="/rates"} 3' in lines
+    assert 'currency_errors_total{type="ValueError",where="say \\"hi\\"\\n"} 1' in lines
+    assert lines.count("# TYPE currency_api_requests_total counter") == 1
+    assert 'currency_api_latency_seconds_bucket{endpoint="/rates",le="0.1"} 1' in lines
+    assert 'currency_api_latency_seconds_bucket{endpoint="/rates",le="1"} 2' in lines
+    assert 'currency_api_latency_seconds_bucket{endpoint="/rates",le="+Inf"} 3' in lines
+    assert 'currency_api_latency_seconds_count{endpoint="/rates"} 3' in lines
+
+
+def test_cache_hit_ratio_counts_revalidated_lookups_as_hits(tmp_path):
+    metrics = Currency.Metrics()
+    for result in ("hit", "revalidated", "miss", "miss"):
+        metrics.inc("currency_cache_lookups_total", result=result)
+
+    metrics.dump(str(tmp_path / "metrics.json"))
+
+    with open(tmp_path / "metrics.json", encoding="utf-8") as f:
+        dumped = json.load(f)
+    assert dumped["derived"]["currency_cache_hit_ratio"] == 0.5
+    assert dumped["counters"]['currency_cache_lookups_total{result="miss"}'] == 2
+
+
+def test_decorators_leave_functions_untouched_when_metrics_are_off(monkeypatch):
+    def convert(amount):
+        return amount * 2
+
+    assert Currency.timed("currency_test_seconds")(convert) is convert
+    assert Currency.counted("currency_test_total")(convert) is convert
+
+    metrics = Currency.Metrics()
+    monkeypatch.setattr(Currency, "METRICS", metrics)
+    monkeypatch.setattr(Currency, "METRICS_ENABLED", True)
+    wrapped = Currency.counted("currency_test_total", size=len)(lambda: [1, 2, 3])
+
+    assert wrapped() == [1, 2, 3]
+    assert metrics.total("currency_test_total") == 3
@@ -0,0 +1,117 @@
+import decimal
+import json
+
+import numpy as np
+import pytest
+
+import Currency
+
+RATES = {"EUR": 1.0, "USD": 1.0852, "JPY": 158.83, "KWD": 0.33401, "IDR": 17234.5, "CAD": 1.4712, "BHD": 0.40916}
+ROUNDING = {"half-even": decimal.ROUND_HALF_EVEN, "half-up": decimal.ROUND_HALF_UP}
+
+
+def oracle(amount, source, target, rounding="half-even"):
+    """Reference conversion of minor units with 80-digit decimals straight from the quoted rates"""
+    with decimal.localcontext() as context:
+        context.prec = 80
+        major = decimal.Decimal(amount).scaleb(-Currency.currency_exponent(source))
+        converted = major * decimal.Decimal(repr(RATES[target])) / decimal.Decimal(repr(RATES[source]))
+        minor = converted.scaleb(Currency.currency_exponent(target))
+        # Halves round on the magnitude, like the code under test
+        rounded = int(abs(minor).quantize(decimal.Decimal(1), rounding=ROUNDING[rounding]))
+        return -rounded if minor < 0 else rounded
+
+
+@pytest.fixture
+def snapshot():
+    return Currency.RateSnapshot(RATES)
+
+
+@pytest.mark.parametrize("amount, source, target", [
+    (10 ** 11, "EUR", "JPY"),
+    (10 ** 12, "USD", "KWD"),
+    (123456789, "JPY", "BHD"),
+    (-987654321012, "IDR", "CAD"),
+    (1, "KWD", "IDR"),
+])
+def test_convert_minor_matches_decimal_reference(snapshot, amount, source, target):
+    for rounding in ROUNDING:
+        assert Currency.convert_minor(amount, source, target, snapshot, rounding) == oracle(amount, source, target, rounding)
+
+
+@pytest.mark.parametrize("rounding", sorted(ROUNDING))
+def test_convert_minor_batch_matches_decimal_reference(snapshot, rounding):
+    generator = np.random.default_rng(7)
+    codes = np.array(sorted(RATES))
+    size = 20000
+    # Amounts spread over many magnitudes, so both the int64 and the big-integer paths run
+    amounts = (generator.integers(1, 10 ** 6, size) * 10 ** generator.integers(0, 13, size)).astype(np.int64)
+    amounts *= np.where(generator.random(size) < 0.3, -1, 1)
+    from_codes = codes[generator.integers(0, len(codes), size)]
+    to_codes = codes[generator.integers(0, len(codes), size)]
+
+    converted, valid = Currency.convert_minor_batch(amounts, from_codes, to_codes, snapshot, rounding)
+
+    expected = [oracle(a, s, t, rounding) for a, s, t in zip(amounts.tolist(), from_codes.tolist(), to_codes.tolist())]
+    fits = [-Currency.INT64_MAX - 1 <= value <= Currency.INT64_MAX for value in expected]
+    assert valid.tolist() == fits
+    assert 0 < valid.sum() < size
+    assert converted[valid].tolist() == [value for value, ok in zip(expected, fits) if ok]
+
+
+@pytest.fixture
+def rebased():
+    # Rebasing on USD divides every rate by 1.0852, so the cross rates are full-width floats
+    return Currency.RateSnapshot(RATES, base="USD")
+
+
+def test_derived_rates_are_limited_to_int64_fractions(rebased):
+    rates = rebased.minor_rates()
+    n = len(rebased.codes)
+
+    for i in range(n):
+        for j in range(n):
+            numerator, denominator = rates.numerators[i, j], rates.denominators[i, j]
+            assert numerator * denominator <= Currency.INT64_MAX
+            shift = Currency.currency_exponent(rebased.codes[j]) - Currency.currency_exponent(rebased.codes[i])
+            assert numerator / denominator == pytest.approx(rebased.matrix[i, j] * 10 ** shift, rel=1e-15)
+
+
+def test_convert_minor_batch_matches_scalar_on_derived_rates(rebased):
+    generator = np.random.default_rng(11)
+    codes = np.array(sorted(RATES))
+    size = 20000
+    # Up to 1e18, so rows run on the direct, the split and the big-integer paths
+    amounts = (generator.integers(1, 10 ** 6, size) * 10 ** generator.integers(0, 13, size)).astype(np.int64)
+    amounts *= np.where(generator.random(size) < 0.3, -1, 1)
+    from_codes = codes[generator.integers(0, len(codes), size)]
+    to_codes = codes[generator.integers(0, len(codes), size)]
+
+    converted, valid = Currency.convert_minor_batch(amounts, from_codes, to_codes, rebased)
+
+    expected = [Currency.convert_minor(a, s, t, rebased) for a, s, t in zip(amounts.tolist(), from_codes.tolist(), to_codes.tolist())]
+    fits = [-Currency.INT64_MAX - 1 <= value <= Currency.INT64_MAX for value in expected]
+    assert valid.tolist() == fits
+    assert 0 < valid.sum() < size
+    assert converted[valid].tolist() == [value for value, ok in zip(expected, fits) if ok]
+
+
+def test_convert_command_prints_the_exact_result(monkeypatch, capsys):
+    monkeypatch.setattr(Currency, "load_rates_snapshot", lambda: (True, dict(RATES), "2024-06-03", "cache"))
+
+    assert Currency.main(["convert", "0.1", "EUR", "KWD", "--exact"]) == 0
+    assert capsys.readouterr().out == "0.033\n"
+
+    assert Currency.main(["convert", "100", "EUR", "JPY", "--exact", "--json"]) == 0
+    assert json.loads(capsys.readouterr().out)["exact"] == "15883"
+
+
+def test_convert_minor_batch_flags_int64_overflow_and_unknown_codes(snapshot):
+    amounts = np.array([8 * 10 ** 14, 10 ** 6, 10 ** 6], dtype=np.int64)
+    converted, valid = Currency.convert_minor_batch(amounts, ["CAD", "EUR", "XYZ"], ["IDR", "JPY", "EUR"], snapshot)
+
+    assert oracle(8 * 10 ** 14, "CAD", "IDR") > Currency.INT64_MAX
+    assert valid.tolist() == [False, True, False]
+    assert converted[1] == oracle(10 ** 6, "EUR", "JPY")
+    with pytest.raises(ValueError):
+        Currency.convert_minor(1, "EUR", "JPY", Currency.RateSnapshot(dict(RATES, JPY=0.0)))
@@ -0,0 +1,78 @@
+import io
+import json
+
+import pytest
+
+import Currency
+
+RATES = {"EUR": 1.0, "USD": 1.0852, "JPY": 158.83, "GBP": 0.8512}
+PAIRS = [("EUR", "USD"), ("USD", "JPY"), ("GBP", "EUR"), ("JPY", "XXX")]
+
+
+def write_input(path, record_format):
+    lines = ["amount,from,to"] if record_format == "csv" else []
+    for i in range(2000):
+        source, target = PAIRS[i % len(PAIRS)]
+        amount = round(i * 1.25, 2)
+        if record_format == "csv":
+            lines.append(f"{amount},{source},{target}")
+        else:
+            lines.append(json.dumps({"amount": amount, "from": source, "to": target}))
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+def stream(path, record_format):
+    outfile, rejects = io.StringIO(), io.StringIO()
+    with open(path, newline="", encoding="utf-8") as infile:
+        stats = Currency.stream_convert(infile, outfile, RATES, record_format, 256, rejects)
+    return outfile.getvalue(), rejects.getvalue(), stats
+
+
+@pytest.mark.parametrize("record_format", ["csv", "jsonl"])
+def test_sharded_output_matches_the_sequential_pipeline(tmp_path, record_format):
+    path = tmp_path / f"input.{record_format}"
+    write_input(path, record_format)
+    expected, expected_rejects, expected_stats = stream(path, record_format)
+
+    outfile, rejects = io.StringIO(), io.StringIO()
+    stats = Currency.sharded_convert(str(path), outfile, RATES, 2, record_format, 256, rejects, max_shard_size=4096)
+
+    assert stats["shards"] > 2
+    assert outfile.getvalue() == expected
+    assert rejects.getvalue() == expected_rejects
+    assert {key: stats[key] for key in ("rows", "converted", "rejected")} == \
+        {key: expected_stats[key] for key in ("rows", "converted", "rejected")}
+
+    # Split output is the same text, cut at the shard boundaries
+    prefix = str(tmp_path / "out.csv")
+    Currency.sharded_convert(str(path), io.StringIO(), RATES, 2, record_format, 256, max_shard_size=4096, part_prefix=prefix)
+    parts = sorted(tmp_path.glob("out.csv.part*"))
+    assert len(parts) == stats["shards"]
+    assert "".join(part.read_text(encoding="utf-8") for part in parts) == expected
+
+
+def test_shards_start_and_end_on_line_boundaries(tmp_path):
+    path = tmp_path / "input.csv"
+    write_input(path, "csv")
+    data = path.read_bytes()
+
+    shards = Currency.plan_shards(str(path), 3, max_shard_size=1000)
+
+    assert shards[0][0] == 0 and shards[-1][1] == len(data)
+    assert all(end == start for (_, end), (start, _) in zip(shards, shards[1:]))
+    assert all(data[end - 1:end] == b"\n" for _, end in shards)
+
+
+def test_jsonl_records_that_cannot_be_read_are_rejected_without_stopping_the_run():
+    huge = "1" + "0" * 400
+    infile = io.StringIO('{"amount": %s, "from": "EUR", "to": "USD"}\n'
+                         '{"amount": 2, "from": "EUR"}\n'
+                         'not json\n'
+                         '{"amount": 2, "from": "EUR", "to": "USD", "ref": "a"}\n' % huge)
+    outfile, rejects = io.StringIO(), io.StringIO()
+
+    stats = Currency.stream_convert(infile, outfile, RATES, "jsonl", rejects_file=rejects)
+
+    assert stats == dict(stats, rows=4, converted=1, rejected=3)
+    assert json.loads(outfile.getvalue()) == {"amount": 2, "from": "EUR", "to": "USD", "ref": "a", "converted": 2.17}
+    assert [line.rsplit(",", 1)[1] for line in rejects.getvalue().splitlines()] == ["malformed record"] * 3
@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+import Currency
+
+BEFORE = {"EUR": 1.0, "USD": 1.0852, "JPY": 158.83, "GBP": 0.8512, "CHF": 0.9731, "ARS": 0.0}
+AFTER = dict(BEFORE, USD=1.0901, GBP=0.8498, ARS=978.4)
+
+
+@pytest.fixture
+def positions():
+    rng = np.random.default_rng(7)
+    codes = rng.choice(["EUR", "USD", "JPY", "GBP", "CHF", "ARS", "XXX"], size=5000)
+    return rng.uniform(1, 10_000, size=5000), codes
+
+
+def snapshot(rates):
+    return Currency.RateSnapshot(rates, base="EUR", date="2024-06-03")
+
+
+def test_incremental_update_matches_a_full_revaluation(positions):
+    incremental = Currency.Portfolio(*positions, ["USD", "EUR", "JPY"])
+    incremental.revalue(snapshot(BEFORE))
+    assert incremental.unvalued() == ["ARS", "XXX"]
+
+    # USD and GBP moved, and ARS got its first rate
+    assert incremental.update(snapshot(AFTER)) == 3
+
+    full = Currency.Portfolio(*positions, ["USD", "EUR", "JPY"])
+    full.revalue(snapshot(AFTER))
+    assert incremental.unvalued() == full.unvalued() == ["XXX"]
+    assert incremental.totals() == pytest.approx(full.totals(), rel=1e-12)
+    np.testing.assert_allclose(incremental.breakdown(), full.breakdown(), rtol=1e-12)
+    np.testing.assert_allclose(incremental.valuations(), full.valuations(), rtol=1e-12)
+
+
+def test_unchanged_snapshot_recomputes_nothing(positions):
+    portfolio = Currency.Portfolio(*positions, ["USD"])
+    portfolio.revalue(snapshot(BEFORE))
+    totals = portfolio.totals()
+
+    assert portfolio.update(snapshot(dict(BEFORE))) == 0
+    assert portfolio.totals() == totals
+
+
+def test_totals_sum_each_position_in_every_report_currency():
+    portfolio = Currency.Portfolio([100.0, 50.0, 1000.0], ["eur", "usd", "JPY"], ["EUR", "USD"])
+    portfolio.revalue(snapshot(BEFORE))
+
+    expected_eur = 100.0 + 50.0 / BEFORE["USD"] + 1000.0 / BEFORE["JPY"]
+    assert portfolio.totals() == pytest.approx({"EUR": expected_eur, "USD": expected_eur * BEFORE["USD"]})
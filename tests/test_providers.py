@@ -0,0 +1,40 @@
+import time
+
+import Currency
+
+
+class StubProvider:
+    """Provider that answers after a fixed delay, either with rates or with an error"""
+
+    def __init__(self, name, delay, healthy):
+        self.name = name
+        self.delay = delay
+        self.healthy = healthy
+        self.calls = 0
+
+    def fetch_snapshot(self, cached=None):
+        self.calls += 1
+        time.sleep(self.delay)
+        if not self.healthy:
+            return False, "503 Service Unavailable"
+        return True, {"base": "EUR", "date": "2024-06-03", "rates": {"EUR": 1.0, "USD": 1.0852}}
+
+
+def test_fast_failing_provider_ranks_below_slow_healthy_one():
+    broken = StubProvider("broken", delay=0.001, healthy=False)
+    slow = StubProvider("slow", delay=0.05, healthy=True)
+    pool = Currency.ProviderPool([broken, slow])
+
+    for _ in range(Currency.PROVIDER_MIN_SAMPLES):
+        pool.timed_fetch(broken, None)
+        pool.timed_fetch(slow, None)
+
+    assert pool.health["broken"].percentile(0.5) < pool.health["slow"].percentile(0.5)
+    assert [provider.name for provider in pool.ranked()] == ["slow", "broken"]
+    assert pool.health["broken"].score() > pool.health["slow"].score()
+
+    # Once ranked, the healthy provider is asked first and the broken one is left alone
+    calls = broken.calls
+    success, snapshot = pool.fetch_snapshot()
+    assert success and snapshot["provider"] == "slow"
+    assert broken.calls == calls
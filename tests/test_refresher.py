@@ -0,0 +1,75 @@
+import time
+
+import pytest
+
+import Currency
+
+RATES = {"EUR": 1.0, "USD": 1.0852, "JPY": 158.83}
+
+
+def scripted_loader(*answers):
+    """Loader that replays (success, rates, date, source) answers, repeating the last one"""
+    answers = list(answers)
+
+    def load():
+        return answers.pop(0) if len(answers) > 1 else answers[0]
+    return load
+
+
+def test_publishes_only_when_rates_or_date_change():
+    live = Currency.build_live_rates(dict(RATES), "2024-06-03", "cache")
+    moved = dict(RATES, JPY=159.1)
+    published = []
+    refresher = Currency.RateRefresher(live, interval=0, on_publish=published.append, loader=scripted_loader(
+        (True, dict(RATES), "2024-06-03", "revalidated cache"),
+        (True, moved, "2024-06-03", "live API"),
+        (True, dict(moved), "2024-06-04", "live API"),
+    ))
+
+    assert refresher.refresh() is False
+    assert refresher.current is live
+
+    assert refresher.refresh() is True
+    assert refresher.current.snapshot.rate("EUR", "JPY") == 159.1
+    assert refresher.refresh() is True
+    assert refresher.current.date == "2024-06-04"
+    assert refresher.refresh() is False
+
+    assert (refresher.checks, refresher.publishes) == (4, 2)
+    assert len(published) == 2 and published[-1] is refresher.current
+
+
+def test_failed_checks_keep_the_current_rates():
+    live = Currency.build_live_rates(dict(RATES), "2024-06-03", "cache")
+
+    def broken():
+        raise OSError("network down")
+
+    refresher = Currency.RateRefresher(live, interval=0, loader=scripted_loader((False, "503", None, None)))
+    assert refresher.refresh() is False
+    refresher.loader = broken
+    assert refresher.refresh() is False
+
+    assert refresher.current is live
+    assert refresher.errors == 2
+
+
+def test_published_rates_are_immutable_and_swapped_whole():
+    live = Currency.build_live_rates(dict(RATES), "2024-06-03", "cache")
+    refresher = Currency.RateRefresher(live, interval=0.01, loader=scripted_loader(
+        (True, dict(RATES, USD=1.09), "2024-06-04", "live API")))
+
+    refresher.start()
+    try:
+        deadline = time.monotonic() + 2
+        while refresher.publishes == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        refresher.stop(timeout=1)
+
+    current = refresher.current
+    assert current is not live
+    assert (current.date, current.rates["USD"], current.snapshot.rate("EUR", "USD")) == ("2024-06-04", 1.09, 1.09)
+    assert live.rates["USD"] == 1.0852
+    with pytest.raises(TypeError):
+        current.rates["USD"] = 2.0
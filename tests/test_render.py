@@ -0,0 +1,47 @@
+import io
+from types import MappingProxyType
+
+import Currency
+
+
+class Terminal(io.StringIO):
+    """In-memory stream that counts writes and claims to be a TTY"""
+
+    def __init__(self, tty):
+        super().__init__()
+        self.tty = tty
+        self.writes = 0
+
+    def isatty(self):
+        return self.tty
+
+    def write(self, text):
+        self.writes += 1
+        return super().write(text)
+
+
+def test_frame_is_written_in_one_call_and_clears_only_a_terminal():
+    frame = Currency.Frame().line("first").line("second")
+
+    terminal, pipe = Terminal(tty=True), Terminal(tty=False)
+    frame.show(terminal)
+    frame.show(pipe)
+
+    assert terminal.writes == pipe.writes == 1
+    assert terminal.getvalue() == Currency.CLEAR_SEQUENCE + pipe.getvalue()
+    assert pipe.getvalue().splitlines() == ["first" + Currency.Style.RESET_ALL, "second" + Currency.Style.RESET_ALL]
+
+
+def test_currency_screen_is_rerendered_only_for_a_new_rate_set(monkeypatch):
+    monkeypatch.setattr(Currency, "_screen_cache", {})
+    symbols = MappingProxyType({"EUR": "€", "USD": "$"})
+    regions = MappingProxyType({"Major": ["EUR", "USD"]})
+    rates = MappingProxyType({"EUR": 1.0, "USD": 1.0852})
+
+    first = Currency.render_currencies(rates, symbols, regions)
+
+    assert Currency.render_currencies(rates, symbols, regions) is first
+    assert "EUR €" in first and "Total currencies available" in first
+
+    refreshed = MappingProxyType({"EUR": 1.0, "USD": 1.0852, "JPY": 158.83})
+    assert "JPY" in Currency.render_currencies(refreshed, symbols, regions)
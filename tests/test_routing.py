@@ -0,0 +1,51 @@
+import argparse
+import io
+import json
+
+import pytest
+
+import Currency
+
+# VATcomply lists some currencies without a rate; the app keeps them as 0.0 placeholders
+RATES = {"EUR": 1.0, "USD": 1.0852, "JPY": 158.83, "ARS": 0.0}
+
+
+@pytest.fixture
+def snapshot():
+    return Currency.RateSnapshot(RATES, fallback=Currency.get_fallback_rates())
+
+
+def test_pipe_converts_pairs_the_menu_routes_through_stored_rates(snapshot):
+    infile = io.StringIO("100,JPY,ARS\n100,EUR,USD\n100,EUR,XXX\n")
+    outfile, rejects = io.StringIO(), io.StringIO()
+
+    stats = Currency.stream_convert(infile, outfile, RATES, rejects_file=rejects, precision=6)
+
+    assert stats["converted"] == 2
+    converted = [float(line.rsplit(",", 1)[1]) for line in outfile.getvalue().splitlines()]
+    assert converted[0] == pytest.approx(Currency.convert(snapshot, 100, "JPY", "ARS"), abs=1e-6)
+    assert converted[1] == pytest.approx(Currency.convert(snapshot, 100, "EUR", "USD"), abs=1e-6)
+    assert rejects.getvalue() == "\"100,EUR,XXX\",unsupported pair EUR/XXX\n"
+
+
+def test_convert_command_matches_the_menu(snapshot, monkeypatch, capsys):
+    monkeypatch.setattr(Currency, "load_rates_snapshot", lambda: (True, dict(RATES), "2024-06-03", "cache"))
+    args = argparse.Namespace(amount=100.0, source="jpy", target="ars", offline=False, json=True, exact=False)
+
+    assert Currency.run_convert(args) == 0
+
+    output = json.loads(capsys.readouterr().out)
+    assert output["result"] == Currency.convert(snapshot, 100.0, "JPY", "ARS")
+    assert output["route"] == snapshot.route("JPY", "ARS")
+
+
+def test_convert_command_divides_quoted_pairs_without_a_snapshot(monkeypatch, capsys):
+    monkeypatch.setattr(Currency, "load_rates_snapshot", lambda: (True, dict(RATES), "2024-06-03", "cache"))
+    monkeypatch.setattr(Currency, "RateSnapshot", None)
+    args = argparse.Namespace(amount=100.0, source="eur", target="jpy", offline=False, json=True, exact=False)
+
+    assert Currency.run_convert(args) == 0
+
+    output = json.loads(capsys.readouterr().out)
+    assert output["rate"] == RATES["JPY"] / RATES["EUR"]
+    assert "route" not in output
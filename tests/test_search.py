@@ -0,0 +1,37 @@
+import pytest
+
+import Currency
+
+NAMES = {"EUR": "Euro", "USD": "US Dollar", "AUD": "Australian Dollar", "JPY": "Japanese Yen", "GBP": "British Pound"}
+SYMBOLS = {"EUR": "€", "USD": "$", "AUD": "A$", "JPY": "¥", "GBP": "£"}
+REGIONS = {"Major": ["USD", "EUR", "JPY", "GBP"], "Asia Pacific": ["AUD"]}
+
+
+@pytest.fixture
+def search():
+    return Currency.CurrencySearch(NAMES, NAMES, SYMBOLS, REGIONS)
+
+
+@pytest.mark.parametrize("query, best", [
+    ("jpy", "JPY"),
+    ("¥", "JPY"),
+    ("japanese yen", "JPY"),
+    ("pou", "GBP"),
+    ("australian dollar", "AUD"),
+])
+def test_exact_and_prefix_matches(search, query, best):
+    assert search.search(query)[0] == best
+
+
+def test_ties_follow_the_region_listing(search):
+    assert search.search("dollar")[:2] == ["USD", "AUD"]
+
+
+@pytest.mark.parametrize("query, best", [("japanse", "JPY"), ("eruo", "EUR"), ("brittish pund", "GBP")])
+def test_misspellings_still_find_the_currency(search, query, best):
+    assert search.search(query)[0] == best
+
+
+def test_every_query_word_must_match(search):
+    assert search.search("dollar yen") == []
+    assert search.search("   ") == []
@@ -0,0 +1,103 @@
+import asyncio
+import io
+import json
+
+import pytest
+
+import Currency
+
+RATES = {"EUR": 1.0, "USD": 1.0852, "JPY": 158.83}
+
+
+@pytest.fixture
+def service():
+    return Currency.ConversionService(Currency.RateSnapshot(RATES, base="EUR", date="2024-06-03"))
+
+
+def post(service, payload):
+    status, body, _ = service.dispatch("POST", "/convert", payload.encode("utf-8"))
+    return status, json.loads(body)
+
+
+def test_convert_rejects_non_finite_amounts_per_item(service):
+    status, body = post(service, '[{"amount": 1e400, "from": "EUR", "to": "USD"},'
+                                 ' {"amount": "nan", "from": "EUR", "to": "USD"},'
+                                 ' {"amount": 1e307, "from": "EUR", "to": "JPY"},'
+                                 ' {"amount": 10, "from": "EUR", "to": "USD"}]')
+
+    assert status == 200
+    first, second, third, fourth = body["results"]
+    assert first["error"] == second["error"] == "Invalid amount, must be a finite number"
+    assert third["error"] == "Result is out of range"
+    assert fourth["result"] == pytest.approx(10.852)
+
+
+def test_convert_rejects_integers_too_large_for_a_float(service):
+    status, body = post(service, '[{"amount": 1%s, "from": "EUR", "to": "USD"},'
+                                 ' {"amount": 10, "from": "EUR", "to": "USD"}]' % ("0" * 400))
+
+    assert status == 200
+    first, second = body["results"]
+    assert first["error"] == "Invalid amount, must be a finite number"
+    assert second["result"] == pytest.approx(10.852)
+
+
+def exchange(service, raw):
+    """Send raw bytes to the service over a real connection and return everything it answers"""
+    async def run():
+        server = await service.start(port=0)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(raw)
+            await writer.drain()
+            answer = await asyncio.wait_for(reader.read(), 5)
+            writer.close()
+            return answer
+    return asyncio.run(run())
+
+
+def test_malformed_request_lines_get_a_bad_request(service):
+    answer = exchange(service, b"GARBAGE\r\n\r\n")
+
+    assert answer.startswith(b"HTTP/1.1 400 Bad Request\r\n")
+    assert b"Connection: close" in answer
+
+
+def test_unexpected_errors_get_a_server_error_and_close(service, monkeypatch):
+    def broken(method, target, body):
+        raise RuntimeError("bug")
+
+    monkeypatch.setattr(service, "dispatch", broken)
+    answer = exchange(service, b"GET /rates HTTP/1.1\r\nHost: test\r\n\r\n")
+
+    assert answer.startswith(b"HTTP/1.1 500 Internal Server Error\r\n")
+    assert b"Connection: close" in answer
+
+
+def test_single_convert_with_invalid_amount_is_a_bad_request(service):
+    status, body, _ = service.dispatch("GET", "/convert?amount=inf&from=EUR&to=USD", b"")
+
+    assert status == 400
+    assert json.loads(body)["error"] == "Invalid amount, must be a finite number"
+
+
+def test_pipe_rejects_invalid_amounts_instead_of_blaming_the_pair():
+    infile = io.StringIO("nan,EUR,USD\n1e307,EUR,JPY\n2,EUR,USD\n2,EUR,XXX\n")
+    outfile, rejects = io.StringIO(), io.StringIO()
+
+    stats = Currency.stream_convert(infile, outfile, RATES, rejects_file=rejects)
+
+    assert stats["converted"] == 1
+    assert outfile.getvalue() == "2,EUR,USD,2.17\n"
+    assert rejects.getvalue().splitlines() == ["\"nan,EUR,USD\",invalid amount", "\"1e307,EUR,JPY\",result out of range",
+                                               "\"2,EUR,XXX\",unsupported pair EUR/XXX"]
+
+
+def test_convert_raises_for_invalid_amounts():
+    snapshot = Currency.RateSnapshot(RATES, base="EUR")
+
+    with pytest.raises(ValueError, match="invalid amount"):
+        Currency.convert(snapshot, float("nan"), "EUR", "USD")
+    with pytest.raises(ValueError, match="out of range"):
+        Currency.convert(snapshot, 1e307, "EUR", "JPY")
@@ -0,0 +1,76 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+import Currency
+
+# ARS has no live quote, so the snapshot routes it through the stored rates
+RATES = {"EUR": 1.0, "USD": 1.0852, "JPY": 158.83, "ARS": 0.0}
+
+
+@pytest.fixture
+def publisher():
+    with Currency.SharedRatePublisher(f"currency-test-{os.getpid()}") as publisher:
+        yield publisher
+
+
+def test_readers_see_the_published_rates_and_routes(publisher):
+    live = Currency.build_live_rates(RATES, "2024-06-03", "test", {"JPY": "¥"}, {"JPY": "Japanese Yen"})
+    publisher.publish(live)
+
+    shared = Currency.SharedRateSnapshot(publisher.name)
+
+    assert shared.codes == live.snapshot.codes
+    assert shared.rate("USD", "JPY") == live.snapshot.rate("USD", "JPY")
+    assert shared.rate("JPY", "ARS") == live.snapshot.rate("JPY", "ARS")
+    assert shared.route("JPY", "ARS") == live.snapshot.route("JPY", "ARS")
+    assert shared.uses_stored_rates("JPY", "ARS") and not shared.uses_stored_rates("EUR", "USD")
+    info = shared.info("JPY")
+    assert (info.symbol, info.name, info.region) == ("¥", "Japanese Yen", "Major Currencies")
+    assert not shared.matrix.flags.writeable
+
+    # A newer generation is picked up by latest(); the old reader keeps its own copy
+    publisher.publish(Currency.build_live_rates(dict(RATES, USD=1.1), "2024-06-04", "test", {}, {}))
+    assert not shared.is_current()
+    newer = shared.latest()
+    assert newer.generation == shared.generation + 1
+    assert newer.rate("EUR", "USD") == 1.1
+    assert shared.rate("EUR", "USD") == 1.0852
+
+
+def test_a_reader_process_leaves_the_segments_to_the_publisher(publisher):
+    publisher.publish(Currency.build_live_rates(RATES, "2024-06-03", "test", {}, {}))
+    script = f"import Currency; print(Currency.SharedRateSnapshot({publisher.name!r}).route('JPY', 'ARS'))"
+
+    output = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, timeout=60,
+                            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    assert output.returncode == 0, output.stderr
+    assert output.stdout.strip() == str(Currency.RateSnapshot(RATES, fallback=Currency.get_fallback_rates()).route("JPY", "ARS"))
+    assert "leaked" not in output.stderr
+    # The reader exiting did not unlink what it attached to
+    assert Currency.SharedRateSnapshot(publisher.name).generation == 1
+
+
+def test_bench_publishes_only_for_the_shared_case_and_unlinks_after(monkeypatch):
+    published = []
+    publisher_class = Currency.SharedRatePublisher
+
+    def tracked(name):
+        published.append(name)
+        return publisher_class(name)
+
+    monkeypatch.setattr(Currency, "SharedRatePublisher", tracked)
+    payloads = Currency.bench_payloads()
+
+    results = Currency.run_benchmarks(payloads, sizes=(10,), repeat=1, name_filter="convert.single.snapshot", startup=False)
+    assert list(results["benchmarks"]) == ["convert.single.snapshot"]
+    assert published == []
+
+    results = Currency.run_benchmarks(payloads, sizes=(10,), repeat=1, name_filter="shared.attach", startup=False)
+    assert list(results["benchmarks"]) == ["shared.attach"]
+    assert len(published) == 1
+    with pytest.raises(FileNotFoundError):
+        Currency.SharedRateSnapshot(published[0])
@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+import Currency
+
+# VATcomply quotes against EUR; USD is an ordinary currency here, not the base
+PAYLOAD = {"base": "EUR", "date": "2024-06-03", "rates": {"USD": 1.0852, "JPY": 158.83, "GBP": 0.8512, "ARS": 0.0}}
+
+
+@pytest.fixture
+def snapshot():
+    return Currency.RateSnapshot.from_payload(PAYLOAD)
+
+
+def test_cross_rates_use_the_real_base(snapshot):
+    rates = PAYLOAD["rates"]
+
+    assert snapshot.base == "EUR"
+    assert snapshot.rate("EUR", "USD") == 1.0852
+    assert snapshot.rate("USD", "JPY") == pytest.approx(rates["JPY"] / rates["USD"], rel=1e-15)
+    assert snapshot.convert(100, "GBP", "USD") == pytest.approx(100 * rates["USD"] / rates["GBP"], rel=1e-15)
+    assert snapshot.rate("JPY", "JPY") == 1.0
+
+
+def test_row_is_a_read_only_view_of_the_matrix(snapshot):
+    row = snapshot.row("USD")
+
+    assert np.shares_memory(row, snapshot.matrix)
+    assert row[snapshot.index["JPY"]] == snapshot.rate("USD", "JPY")
+    with pytest.raises(ValueError):
+        row[0] = 1.0
+
+
+def test_placeholder_rates_give_nan_instead_of_dividing_by_zero(snapshot):
+    assert np.isnan(snapshot.rate("ARS", "USD"))
+    assert np.isnan(snapshot.rate("USD", "ARS"))
+
+
+def test_base_is_inferred_from_the_rate_quoted_at_one():
+    snapshot = Currency.RateSnapshot({"USD": 1.0, "EUR": 0.92, "JPY": 146.1})
+
+    assert snapshot.base == "USD"
+    assert snapshot.as_dict()["EUR"] == 0.92
+    assert snapshot.rate("EUR", "JPY") == pytest.approx(146.1 / 0.92, rel=1e-15)
+
+
+@pytest.mark.parametrize("dtype", ["U3", "S3", "U8", "S8", object])
+def test_code_columns_intern_like_a_dict_lookup(snapshot, dtype):
+    codes = ["USD", "jpy", "Gbp", "EUR", "XXX", "US", "", "E1R"]
+    expected = [snapshot.index.get(code.upper(), -1) for code in codes]
+
+    interned = Currency.intern_currency_codes(np.array(codes, dtype=dtype), snapshot.index)
+
+    assert interned.dtype == np.int64
+    assert interned.tolist() == expected
@@ -0,0 +1,59 @@
+import time
+
+import pytest
+
+import Currency
+
+DELAY = 0.3
+
+
+def slow_api(delay):
+    """/rates, /currencies and /geolocate that each take delay seconds"""
+    rates = Currency.get_fallback_rates()
+
+    def route(path, query):
+        time.sleep(delay)
+        if path == "/geolocate":
+            return 200, {"country": {"name": "Japan", "currency": "JPY"}}
+        if path == "/currencies":
+            return 200, {code: {} for code in rates}
+        return 200, {"base": "USD", "date": "2024-06-03", "rates": rates}
+    return route
+
+
+@pytest.fixture
+def menu_exit(monkeypatch):
+    monkeypatch.setattr("builtins.input", lambda prompt="": "0")
+
+
+def test_rates_and_location_load_concurrently(stub_api, monkeypatch, menu_exit, capsys):
+    stub = stub_api(slow_api(DELAY))
+    monkeypatch.setattr(Currency, "API_BASE_URL", stub.url)
+
+    start = time.perf_counter()
+    Currency.main(["--fast", "--deadline", "5"])
+    elapsed = time.perf_counter() - start
+
+    output = capsys.readouterr().out
+    assert "as of 2024-06-03" in output
+    assert "Detected location: Japan [JPY]" in output
+    # Geolocation overlaps the rates and currency list requests instead of following them
+    assert elapsed < 3 * DELAY
+    assert sorted(stub.paths()) == ["/currencies", "/geolocate", "/rates"]
+    # Startup goes through the async library API, not the requests client
+    assert Currency._api_client is None
+
+
+def test_startup_falls_back_at_the_deadline(stub_api, monkeypatch, menu_exit, capsys):
+    stub = stub_api(slow_api(2.0))
+    monkeypatch.setattr(Currency, "API_BASE_URL", stub.url)
+
+    start = time.perf_counter()
+    Currency.main(["--fast", "--deadline", "0.3"])
+    elapsed = time.perf_counter() - start
+
+    output = capsys.readouterr().out
+    assert "Couldn't load live rates within 0.3s" in output
+    assert "Using stored rates as fallback" in output
+    assert "Using USD as default" in output
+    assert elapsed < 1.5